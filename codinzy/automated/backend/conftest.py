@@ -3,15 +3,30 @@ Pytest Configuration and Shared Fixtures for Codinzy Backend Tests
 
 This module provides:
 - Database setup and teardown fixtures
+- Data fixture snapshots shared by tests using the same fixtures
+- Failed-first, fastest-first test ordering from the outcome history
+- Per-test SQL query recording and N+1 detection
 - User authentication fixtures
 - Test data generation utilities
 """
 
+import os
+import json
+import sqlite3
+import inspect
+import hashlib
+import itertools
+from pathlib import Path
+
 import pytest
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
 from datetime import datetime, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
 from faker import Faker
+from test_history import OutcomeHistory, class_blocks, history_key, order_items
+from test_queries import QueryRecorder
 
 from api.models import (
     User, Teacher, Student, Course, Module, Lesson,
@@ -25,15 +40,354 @@ from api.models import (
 
 fake = Faker()
 
+# Rows per INSERT statement used by the bulk factories
+BULK_BATCH_SIZE = 1000
+
+# Executions of one normalized query per test above which it is flagged as N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+SCHEMA_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / '.schema_cache'
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--rebuild-schema-cache',
+        action='store_true',
+        default=False,
+        help='Ignore the cached test database schema and synthesize it again'
+    )
+    parser.addoption(
+        '--n-plus-one-threshold',
+        type=int,
+        default=N_PLUS_ONE_THRESHOLD,
+        help='Flag tests that run one query shape more often than this'
+    )
+    parser.addoption(
+        '--no-adaptive-order',
+        action='store_true',
+        default=False,
+        help='Keep collection order instead of running likely failures and fast tests first'
+    )
+
+
+def schema_cache_key():
+    """Hash of the model sources and settings the test schema is built from"""
+    import django
+    from django.apps import apps
+    from django.conf import settings
+
+    digest = hashlib.sha256()
+    for app_config in apps.get_app_configs():
+        models_module = app_config.models_module
+        if models_module is None or not getattr(models_module, '__file__', None):
+            continue
+        models_path = Path(models_module.__file__)
+        if models_path.name == '__init__.py':
+            sources = sorted(models_path.parent.rglob('*.py'))
+        else:
+            sources = [models_path]
+        for source in sources:
+            digest.update(source.read_bytes())
+    digest.update(repr(django.VERSION).encode())
+    digest.update(repr(settings.INSTALLED_APPS).encode())
+    digest.update(repr(settings.MIGRATION_MODULES).encode())
+    digest.update(sqlite3.sqlite_version.encode())
+    return digest.hexdigest()[:16]
+
+
+def save_schema_snapshot(connection, cache_file):
+    """Copy the freshly built test database into the snapshot cache"""
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    for stale in cache_file.parent.glob('schema_*.sqlite3'):
+        if stale != cache_file:
+            stale.unlink()
+
+    # Write to a private file first so parallel workers never see a partial copy
+    tmp_file = cache_file.with_name(f'{cache_file.name}.{os.getpid()}.tmp')
+    connection.ensure_connection()
+    target = sqlite3.connect(str(tmp_file))
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
+    os.replace(tmp_file, cache_file)
+
+
+def restore_schema_snapshot(connection, cache_file):
+    """Point the connection at its test database and restore the cached schema"""
+    from django.conf import settings
+
+    old_name = connection.settings_dict['NAME']
+    test_name = connection.creation._get_test_db_name()
+    connection.close()
+    settings.DATABASES[connection.alias]['NAME'] = test_name
+    connection.settings_dict['NAME'] = test_name
+    connection.ensure_connection()
+
+    source = sqlite3.connect(str(cache_file))
+    try:
+        source.backup(connection.connection)
+    finally:
+        source.close()
+    return [(connection, old_name, True)]
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(request, django_test_environment, django_db_blocker):
+    """Create the test database once per session from the schema snapshot cache
+
+    MIGRATION_MODULES disables migrations for 'api', so Django would otherwise
+    synthesize the whole schema from the models in every session and worker.
+    """
+    from django.db import connections
+    from django.test.utils import setup_databases, teardown_databases
+
+    with django_db_blocker.unblock():
+        connection = connections['default']
+        cache_file = None
+        if connection.vendor == 'sqlite':
+            cache_file = SCHEMA_CACHE_DIR / f'schema_{schema_cache_key()}.sqlite3'
+
+        rebuild = request.config.getoption('--rebuild-schema-cache')
+        if cache_file is not None and cache_file.exists() and not rebuild:
+            old_config = restore_schema_snapshot(connection, cache_file)
+        else:
+            old_config = setup_databases(verbosity=0, interactive=False)
+            if cache_file is not None:
+                save_schema_snapshot(connection, cache_file)
+
+    yield
+
+    with django_db_blocker.unblock():
+        teardown_databases(old_config, verbosity=0)
+
+
+# Data fixtures built once per fixture combination, see FixtureSnapshots
+SNAPSHOT_BUILDERS = {}
+
+
+def snapshot_fixture(builder):
+    """Register a data fixture whose rows are shared through FixtureSnapshots
+
+    The builder's arguments name the data fixtures it depends on. The
+    registered pytest fixture returns a fresh copy of the built object, so
+    changes a test makes in memory never leak into the next test.
+    """
+    name = builder.__name__
+    SNAPSHOT_BUILDERS[name] = builder
+
+    def fixture(db, snapshot_data):
+        return snapshot_data(name)
+
+    fixture.__name__ = name
+    fixture.__doc__ = builder.__doc__
+    return pytest.fixture(name=name)(fixture)
+
+
+def build_snapshot_fixture(name, built):
+    """Build a registered data fixture and its dependencies into `built`"""
+    if name not in built:
+        builder = SNAPSHOT_BUILDERS[name]
+        kwargs = {
+            dependency: build_snapshot_fixture(dependency, built)
+            for dependency in inspect.signature(builder).parameters
+        }
+        built[name] = builder(**kwargs)
+    return built[name]
+
+
+def refetch(value):
+    """Reload model instances (also inside dicts) from the database"""
+    if isinstance(value, dict):
+        return {key: refetch(item) for key, item in value.items()}
+    return type(value)._default_manager.get(pk=value.pk)
+
+
+def snapshot_combination(item):
+    """Sorted names of the snapshot data fixtures a test item uses"""
+    names = getattr(item, 'fixturenames', ())
+    # Transactional tests flush the database and marked tests open their
+    # transaction before ours, so both build their fixtures per test instead
+    if item.get_closest_marker('django_db') or 'transactional_db' in names or 'live_server' in names:
+        return ()
+    return tuple(sorted(name for name in names if name in SNAPSHOT_BUILDERS))
+
+
+class FixtureSnapshots:
+    """Materialize each data fixture combination once per session
+
+    The rows of the active combination live in an outer transaction. The
+    per-test transaction opened by pytest-django becomes a savepoint inside
+    it, so rolling back a test restores the snapshot rather than an empty
+    database. Tests of a class are grouped by combination
+    (pytest_collection_modifyitems) and the outer transaction is rolled back whenever the combination changes.
+    """
+
+    def __init__(self, django_db_blocker):
+        self.django_db_blocker = django_db_blocker
+        self.combination = ()
+        self.objects = {}
+        self._atomic = None
+
+    def activate(self, combination):
+        """Make `combination` the snapshot visible to the next test"""
+        if combination == self.combination:
+            return
+        self.release()
+        if not combination:
+            return
+
+        from django.db import transaction
+
+        with self.django_db_blocker.unblock():
+            self._atomic = transaction.atomic()
+            self._atomic.__enter__()
+            try:
+                for name in combination:
+                    build_snapshot_fixture(name, self.objects)
+            except BaseException:
+                self.release()
+                raise
+        self.combination = combination
+
+    def release(self):
+        """Roll the database back to the bare schema"""
+        if self._atomic is not None:
+            from django.db import transaction
+
+            with self.django_db_blocker.unblock():
+                transaction.set_rollback(True)
+                self._atomic.__exit__(None, None, None)
+        self._atomic = None
+        self.combination = ()
+        self.objects = {}
+
+    def load(self, name, built):
+        """Fresh copy of a snapshot object, or build it in the test transaction"""
+        if name in self.objects:
+            return refetch(self.objects[name])
+        return build_snapshot_fixture(name, built)
+
+
+_fixture_snapshots = None
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(config, items):
+    """Order the tests from their outcome history (test_history.order_items)
+
+    Runs after marker selection (-m smoke, -m "not slow"...), so only the
+    selected items are ordered. With --no-adaptive-order the tests of each
+    class are only grouped by data fixture combination.
+    """
+    if config.getoption('--no-adaptive-order'):
+        blocks = class_blocks(items)
+        for block in blocks:
+            block.sort(key=snapshot_combination)
+        items[:] = [item for block in blocks for item in block]
+        return
+    items[:] = order_items(items, OutcomeHistory(), snapshot_combination)
+
+
+def pytest_itemcollected(item):
+    # Per-marker statistics in the reports (see scripts/result_table.py)
+    markers = sorted({mark.name for mark in item.iter_markers()} - {'parametrize', 'usefixtures', 'filterwarnings'})
+    if markers:
+        item.user_properties.append(('markers', json.dumps(markers)))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    # Roll back a stale snapshot before any fixture of the next test opens
+    # its own transaction
+    if _fixture_snapshots is not None and snapshot_combination(item) != _fixture_snapshots.combination:
+        _fixture_snapshots.release()
+
+
+@pytest.fixture(scope='session')
+def fixture_snapshots(django_db_setup, django_db_blocker):
+    """Session-wide FixtureSnapshots for the snapshot data fixtures"""
+    global _fixture_snapshots
+    _fixture_snapshots = FixtureSnapshots(django_db_blocker)
+    yield _fixture_snapshots
+    _fixture_snapshots.release()
+    _fixture_snapshots = None
+
+
+@pytest.fixture
+def snapshot_data(request, fixture_snapshots):
+    """Activate this test's snapshot and return a loader for its data fixtures"""
+    fixture_snapshots.activate(snapshot_combination(request.node))
+    built = {}
+    return lambda name: fixture_snapshots.load(name, built)
+
 
 @pytest.fixture(autouse=True)
-def enable_db_access_for_all_tests(db):
+def enable_db_access_for_all_tests(snapshot_data, db):
     """Enable database access for all tests by default"""
     pass
 
 
-@pytest.fixture
-def test_user(db):
+# Tests whose repeated query shapes exceeded the threshold, for the summary
+_query_hotspots = []
+
+
+@pytest.fixture(autouse=True)
+def record_queries(request, enable_db_access_for_all_tests):
+    """Record the SQL each test issues and attach it to the test report
+
+    The values are stored as user properties, so they end up in the JUnit
+    XML the parallel runner merges into the results JSON.
+    """
+    from django.db import connection
+
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        yield recorder
+
+    node = request.node
+    node.user_properties.append(('query_count', recorder.count))
+    node.user_properties.append(('sql_time', round(recorder.total_time, 6)))
+    # Runtime coverage for scripts/test_impact.py
+    node.user_properties.append(('db_tables', json.dumps(sorted(recorder.tables))))
+    repeated = recorder.repeated(request.config.getoption('--n-plus-one-threshold'))
+    if repeated:
+        node.user_properties.append(('repeated_queries', json.dumps(repeated[:5])))
+        _query_hotspots.append((node.nodeid, repeated[0]))
+
+
+_outcomes = {}
+
+
+def pytest_runtest_logreport(report):
+    status, duration = _outcomes.get(report.nodeid, ('PASS', 0.0))
+    if report.failed:
+        status = 'FAIL'
+    elif report.skipped and status != 'FAIL':
+        status = 'SKIP'
+    _outcomes[report.nodeid] = (status, duration + report.duration)
+
+
+def pytest_sessionfinish(session):
+    # Parallel shards share the history file; their runner records it instead
+    if not _outcomes or os.environ.get('CODINZY_TEST_WORKER'):
+        return
+    history = OutcomeHistory()
+    for nodeid, (status, duration) in _outcomes.items():
+        history.record(history_key(nodeid), status, duration)
+    history.save()
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _query_hotspots:
+        return
+    terminalreporter.section('query hotspots (possible N+1)')
+    for nodeid, worst in _query_hotspots:
+        terminalreporter.write_line(f"{nodeid}: {worst['count']}x {worst['fingerprint'][:100]}")
+
+
+@snapshot_fixture
+def test_user():
     """Create a basic test user"""
     user = User.objects.create_user(
         username='testuser',
@@ -45,8 +399,8 @@ def test_user(db):
     return user
 
 
-@pytest.fixture
-def test_student(db):
+@snapshot_fixture
+def test_student():
     """Create a test student with user profile"""
     user = User.objects.create_user(
         username='student_test',
@@ -64,8 +418,8 @@ def test_student(db):
     return student
 
 
-@pytest.fixture
-def test_teacher(db):
+@snapshot_fixture
+def test_teacher():
     """Create a test teacher with user profile"""
     user = User.objects.create_user(
         username='teacher_test',
@@ -83,8 +437,8 @@ def test_teacher(db):
     return teacher
 
 
-@pytest.fixture
-def test_admin(db):
+@snapshot_fixture
+def test_admin():
     """Create a test admin user"""
     user = User.objects.create_user(
         username='admin_test',
@@ -98,8 +452,8 @@ def test_admin(db):
     return user
 
 
-@pytest.fixture
-def test_users(db):
+@snapshot_fixture
+def test_users():
     """Create multiple test users of different types"""
     users = {}
     
@@ -140,44 +494,63 @@ def api_client():
     return APIClient()
 
 
-@pytest.fixture
-def authenticated_client(db, test_user):
-    """Create an authenticated API client"""
+def token_client(token):
+    """APIClient authenticated with an existing token"""
     client = APIClient()
-    token = Token.objects.create(user=test_user)
     client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
     return client
 
 
+@snapshot_fixture
+def test_user_token(test_user):
+    """Token for test_user, issued once per fixture snapshot"""
+    return Token.objects.create(user=test_user)
+
+
+@snapshot_fixture
+def student_token(test_student):
+    """Token for test_student, issued once per fixture snapshot"""
+    return Token.objects.create(user=test_student.user)
+
+
+@snapshot_fixture
+def teacher_token(test_teacher):
+    """Token for test_teacher, issued once per fixture snapshot"""
+    return Token.objects.create(user=test_teacher.user)
+
+
+@snapshot_fixture
+def admin_token(test_admin):
+    """Token for test_admin, issued once per fixture snapshot"""
+    return Token.objects.create(user=test_admin)
+
+
 @pytest.fixture
-def student_client(db, test_student):
+def authenticated_client(db, test_user_token):
+    """Create an authenticated API client"""
+    return token_client(test_user_token)
+
+
+@pytest.fixture
+def student_client(db, student_token):
     """Create an authenticated client for student"""
-    client = APIClient()
-    token = Token.objects.create(user=test_student.user)
-    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
-    return client
+    return token_client(student_token)
 
 
 @pytest.fixture
-def teacher_client(db, test_teacher):
+def teacher_client(db, teacher_token):
     """Create an authenticated client for teacher"""
-    client = APIClient()
-    token = Token.objects.create(user=test_teacher.user)
-    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
-    return client
+    return token_client(teacher_token)
 
 
 @pytest.fixture
-def admin_client(db, test_admin):
+def admin_client(db, admin_token):
     """Create an authenticated client for admin"""
-    client = APIClient()
-    token = Token.objects.create(user=test_admin)
-    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
-    return client
+    return token_client(admin_token)
 
 
-@pytest.fixture
-def test_course(db, test_teacher):
+@snapshot_fixture
+def test_course(test_teacher):
     """Create a test course"""
     course = Course.objects.create(
         title='Test Python Course',
@@ -190,8 +563,8 @@ def test_course(db, test_teacher):
     return course
 
 
-@pytest.fixture
-def test_module(db, test_course):
+@snapshot_fixture
+def test_module(test_course):
     """Create a test module"""
     module = Module.objects.create(
         course=test_course,
@@ -202,8 +575,8 @@ def test_module(db, test_course):
     return module
 
 
-@pytest.fixture
-def test_lesson(db, test_module):
+@snapshot_fixture
+def test_lesson(test_module):
     """Create a test lesson"""
     lesson = Lesson.objects.create(
         lesson_code=f'LESSON-{fake.unique.random_number(digits=4)}',
@@ -216,8 +589,8 @@ def test_lesson(db, test_module):
     return lesson
 
 
-@pytest.fixture
-def test_scheduled_class(db, test_course, test_teacher, test_student):
+@snapshot_fixture
+def test_scheduled_class(test_course, test_teacher, test_student):
     """Create a test scheduled class"""
     scheduled_class = ScheduledClass.objects.create(
         course=test_course,
@@ -233,8 +606,8 @@ def test_scheduled_class(db, test_course, test_teacher, test_student):
     return scheduled_class
 
 
-@pytest.fixture
-def test_lead(db):
+@snapshot_fixture
+def test_lead():
     """Create a test lead"""
     lead = Lead.objects.create(
         parent_name='Test Parent',
@@ -250,8 +623,8 @@ def test_lead(db):
     return lead
 
 
-@pytest.fixture
-def test_payment(db, test_student, test_course):
+@snapshot_fixture
+def test_payment(test_student, test_course):
     """Create a test payment"""
     payment = Payment.objects.create(
         student=test_student,
@@ -264,8 +637,8 @@ def test_payment(db, test_student, test_course):
     return payment
 
 
-@pytest.fixture
-def test_badge(db):
+@snapshot_fixture
+def test_badge():
     """Create a test badge"""
     badge = Badge.objects.create(
         name='Test Badge',
@@ -278,8 +651,8 @@ def test_badge(db):
     return badge
 
 
-@pytest.fixture
-def test_certificate(db, test_student, test_course):
+@snapshot_fixture
+def test_certificate(test_student, test_course):
     """Create a test certificate"""
     cert = Certificate.objects.create(
         student=test_student,
@@ -304,36 +677,114 @@ def create_test_user_with_token(user_type='student'):
     return user, token
 
 
-def create_multiple_students(count=5):
-    """Create multiple test students"""
-    students = []
-    for i in range(count):
-        user = User.objects.create_user(
-            username=f'student_{i}_{fake.random_number()}',
-            email=f'student_{i}@test.com',
-            password='testpass123',
-            name=f'Student {i}',
-            user_type='student'
-        )
-        student = Student.objects.create(
+# Sequence shared by the bulk factories so repeated calls never collide
+_bulk_sequence = itertools.count(1)
+
+
+def _referral_code(number):
+    """Unique 5 character referral code (bulk_create skips User.save())"""
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    code = ''
+    for _ in range(5):
+        number, remainder = divmod(number, 36)
+        code = digits[remainder] + code
+    return code
+
+
+def bulk_create_users(count, user_type='student', password='testpass123', **fields):
+    """Create `count` users with batched INSERTs and one shared password hash"""
+    password_hash = make_password(password)
+    users = []
+    for _ in range(count):
+        number = next(_bulk_sequence)
+        users.append(User(
+            username=f'{user_type}_{number}',
+            email=f'{user_type}_{number}@test.com',
+            password=password_hash,
+            name=f'{user_type.title()} {number}',
+            user_type=user_type,
+            referral_code=_referral_code(number),
+            **fields
+        ))
+    return User.objects.bulk_create(users, batch_size=BULK_BATCH_SIZE)
+
+
+def bulk_create_students(count, school_name='Test School', **fields):
+    """Create `count` students and their users with batched INSERTs"""
+    users = bulk_create_users(count, user_type='student')
+    students = [
+        Student(
             user=user,
-            school_name='Test School',
-            student_grade=f'{fake.random_digit_not_null()}'
+            school_name=school_name,
+            student_grade=str(index % 9 + 1),
+            **fields
         )
-        students.append(student)
-    return students
+        for index, user in enumerate(users)
+    ]
+    return Student.objects.bulk_create(students, batch_size=BULK_BATCH_SIZE)
 
 
-def create_multiple_courses(count=3):
-    """Create multiple test courses"""
+def bulk_create_courses(count, created_by=None, **fields):
+    """Create `count` active courses with batched INSERTs"""
+    languages = ['Python', 'JavaScript', 'Scratch']
     courses = []
-    for i in range(count):
-        course = Course.objects.create(
-            title=f'Test Course {i}',
-            description=f'Description for course {i}',
-            language=fake.random_element(['Python', 'JavaScript', 'Scratch']),
+    for index in range(count):
+        number = next(_bulk_sequence)
+        courses.append(Course(
+            title=f'Test Course {number}',
+            description=f'Description for course {number}',
+            course_code=f'C{number}',
+            language=languages[index % len(languages)],
             difficulty_level='beginner',
-            is_active=True
+            created_by=created_by,
+            is_active=True,
+            **fields
+        ))
+    return Course.objects.bulk_create(courses, batch_size=BULK_BATCH_SIZE)
+
+
+def bulk_create_leads(count, stage='new', source='website', **fields):
+    """Create `count` leads with batched INSERTs"""
+    leads = []
+    for _ in range(count):
+        number = next(_bulk_sequence)
+        leads.append(Lead(
+            parent_name=f'Parent {number}',
+            student_name=f'Student {number}',
+            student_grade='5',
+            email=f'lead_{number}@test.com',
+            phone=f'+1{number:010d}',
+            country='US',
+            timezone='America/New_York',
+            stage=stage,
+            source=source,
+            **fields
+        ))
+    return Lead.objects.bulk_create(leads, batch_size=BULK_BATCH_SIZE)
+
+
+def bulk_create_payments(students, course, amount=Decimal('100.00'), status='pending', **fields):
+    """Create one payment per student for `course` with batched INSERTs"""
+    payments = [
+        Payment(
+            student=student,
+            course=course,
+            amount=amount,
+            status=status,
+            payment_method='stripe',
+            currency='USD',
+            **fields
         )
-        courses.append(course)
-    return courses
+        for student in students
+    ]
+    return Payment.objects.bulk_create(payments, batch_size=BULK_BATCH_SIZE)
+
+
+def create_multiple_students(count=5):
+    """Create multiple test students"""
+    return bulk_create_students(count)
+
+
+def create_multiple_courses(count=3):
+    """Create multiple test courses"""
+    return bulk_create_courses(count)
@@ -287,32 +287,35 @@ class TokenAuthenticationTestCase(APITestCase):
 class RoleBasedAccessTestCase(APITestCase):
     """Test cases for role-based access control"""
     
-    def setUp(self):
-        """Set up test data"""
-        self.student_user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        """Set up users and tokens once; each test rolls back to this state"""
+        cls.student_user = User.objects.create_user(
             username='student',
             email='student@test.com',
             password='TestPass123!',
             user_type='student'
         )
-        self.teacher_user = User.objects.create_user(
+        cls.teacher_user = User.objects.create_user(
             username='teacher',
             email='teacher@test.com',
             password='TestPass123!',
             user_type='teacher'
         )
-        self.admin_user = User.objects.create_user(
+        cls.admin_user = User.objects.create_user(
             username='admin',
             email='admin@test.com',
             password='TestPass123!',
             user_type='admin',
             is_staff=True
         )
+        cls.student_token = Token.objects.create(user=cls.student_user)
+        cls.teacher_token = Token.objects.create(user=cls.teacher_user)
+        cls.admin_token = Token.objects.create(user=cls.admin_user)
     
     def test_student_access_to_student_dashboard(self):
         """Test student can access student dashboard"""
-        token = Token.objects.create(user=self.student_user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.student_token.key}')
         
         url = '/api/student/dashboard/'
         response = self.client.get(url)
@@ -321,8 +324,7 @@ class RoleBasedAccessTestCase(APITestCase):
     
     def test_teacher_access_to_teacher_dashboard(self):
         """Test teacher can access teacher dashboard"""
-        token = Token.objects.create(user=self.teacher_user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.teacher_token.key}')
         
         url = '/api/teacher/dashboard/'
         response = self.client.get(url)
@@ -331,8 +333,7 @@ class RoleBasedAccessTestCase(APITestCase):
     
     def test_admin_access_to_admin_dashboard(self):
         """Test admin can access admin dashboard"""
-        token = Token.objects.create(user=self.admin_user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
         
         url = '/api/admin/dashboard/'
         response = self.client.get(url)
@@ -341,8 +342,7 @@ class RoleBasedAccessTestCase(APITestCase):
     
     def test_student_denied_teacher_dashboard(self):
         """Test student cannot access teacher dashboard"""
-        token = Token.objects.create(user=self.student_user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.student_token.key}')
         
         url = '/api/teacher/dashboard/'
         response = self.client.get(url)
@@ -351,8 +351,7 @@ class RoleBasedAccessTestCase(APITestCase):
     
     def test_teacher_denied_student_dashboard(self):
         """Test teacher cannot access student dashboard"""
-        token = Token.objects.create(user=self.teacher_user)
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.teacher_token.key}')
         
         url = '/api/student/dashboard/'
         response = self.client.get(url)
@@ -0,0 +1,156 @@
+"""
+Flaky Test Detector for Codinzy Backend Tests
+
+Timing-sensitive tests (auto-login link expiry, fixtures built from
+datetime.now()) occasionally fail without any code change. After a
+parallel run this script:
+1. Reruns every failed test N times, all reruns in parallel
+2. Classifies a failure as flaky if any rerun passed, or as deterministic
+   if every rerun failed too
+3. Persists flaky tests with their flake rate in quarantine.json
+4. Marks failures of quarantined tests as 'quarantined', so reports list
+   them in their own section and they do not fail the run
+
+A quarantined test is released after RELEASE_AFTER_PASSES passing runs in
+a row, or as soon as it fails deterministically.
+
+Usage:
+    python scripts/run_parallel_tests.py --reruns 5
+    python scripts/flaky_detector.py --list
+    python scripts/flaky_detector.py --release test_users::UserModelTestCase::test_create_user
+"""
+
+import sys
+import json
+import argparse
+import datetime
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from run_parallel_tests import TESTING_DIR, result_test_id, run_parallel
+
+QUARANTINE_PATH = TESTING_DIR / 'quarantine.json'
+DEFAULT_RERUNS = 3
+
+# More failures than this point to a real breakage, not flakiness
+MAX_RERUN_FAILURES = 20
+RELEASE_AFTER_PASSES = 20
+
+
+class QuarantineStore:
+    """Quarantined test ids with their run and failure counts"""
+
+    def __init__(self, path: Path = QUARANTINE_PATH):
+        self.path = path
+        self.entries = {}
+        if path.exists():
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def __contains__(self, test_id: str) -> bool:
+        return test_id in self.entries
+
+    def flake_rate(self, test_id: str) -> float:
+        return self.entries[test_id]['flake_rate']
+
+    def record_flaky(self, test_id: str, runs: int, failures: int):
+        """Quarantine a test (or update it) after a flaky failure"""
+        now = datetime.datetime.now().isoformat()
+        entry = self.entries.setdefault(test_id, {
+            'runs': 0, 'failures': 0, 'flake_rate': 0.0, 'quarantined_at': now
+        })
+        entry['runs'] += runs
+        entry['failures'] += failures
+        entry['flake_rate'] = round(entry['failures'] / entry['runs'], 4)
+        entry['consecutive_passes'] = 0
+        entry['last_flake'] = now
+
+    def record_pass(self, test_id: str) -> bool:
+        """Count a passing run of a quarantined test; True if it was released"""
+        entry = self.entries[test_id]
+        entry['runs'] += 1
+        entry['flake_rate'] = round(entry['failures'] / entry['runs'], 4)
+        entry['consecutive_passes'] = entry.get('consecutive_passes', 0) + 1
+        if entry['consecutive_passes'] >= RELEASE_AFTER_PASSES:
+            self.release(test_id)
+            return True
+        return False
+
+    def release(self, test_id: str):
+        self.entries.pop(test_id, None)
+
+    def save(self):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        tmp_path.replace(self.path)
+
+
+def detect_flaky(results: List[Dict], node_ids: List[str], reruns: int,
+                 pytest_args: List[str], workers: int, store: QuarantineStore) -> Dict[str, List[str]]:
+    """Rerun the failures in `results`, quarantine flaky ones and mark them in place"""
+    classified = {'flaky': [], 'deterministic': [], 'released': []}
+    failed = [r for r in results if r['status'] == 'FAIL' and not r.get('infrastructure_error')]
+
+    for result in results:
+        if result['status'] == 'PASS' and not result.get('cached') and result['test_id'] in store:
+            if store.record_pass(result['test_id']):
+                classified['released'].append(result['test_id'])
+
+    node_by_test_id = {result_test_id(node_id): node_id for node_id in node_ids}
+    rerun_ids = [node_by_test_id[r['test_id']] for r in failed if r['test_id'] in node_by_test_id]
+    passes, failures = Counter(), Counter()
+    if reruns > 0 and rerun_ids and len(rerun_ids) <= MAX_RERUN_FAILURES:
+        print(f"Rerunning {len(rerun_ids)} failed tests {reruns} times...")
+        for rerun in run_parallel([rerun_ids] * reruns, pytest_args, max_workers=workers):
+            if rerun['status'] == 'PASS':
+                passes[rerun['test_id']] += 1
+            elif rerun['status'] == 'FAIL' and not rerun.get('infrastructure_error'):
+                failures[rerun['test_id']] += 1
+    elif len(rerun_ids) > MAX_RERUN_FAILURES:
+        print(f"{len(rerun_ids)} failures, not rerunning (limit {MAX_RERUN_FAILURES})")
+
+    for result in failed:
+        test_id = result['test_id']
+        if passes[test_id]:
+            store.record_flaky(test_id, runs=1 + passes[test_id] + failures[test_id],
+                               failures=1 + failures[test_id])
+            classified['flaky'].append(test_id)
+        elif failures[test_id]:
+            store.release(test_id)
+            classified['deterministic'].append(test_id)
+        if test_id in store:
+            result['quarantined'] = True
+            result['flake_rate'] = store.flake_rate(test_id)
+    return classified
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Inspect the Codinzy flaky test quarantine')
+    parser.add_argument('--list', action='store_true', help='List quarantined tests')
+    parser.add_argument('--release', nargs='+', default=[], metavar='TEST_ID',
+                        help='Remove tests from the quarantine')
+    args = parser.parse_args(argv)
+
+    store = QuarantineStore()
+    if args.release:
+        for test_id in args.release:
+            store.release(test_id)
+        store.save()
+        print(f"Released {len(args.release)} tests")
+
+    if args.list or not args.release:
+        print(f"{'Flake rate':>10}  {'Runs':>5}  Test")
+        for test_id, entry in sorted(store.entries.items(), key=lambda e: -e[1]['flake_rate']):
+            print(f"{entry['flake_rate'] * 100:>9.1f}%  {entry['runs']:>5}  {test_id}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
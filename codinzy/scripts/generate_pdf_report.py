@@ -16,15 +16,21 @@ Requirements:
 import os
 import sys
 import json
+import heapq
 import datetime
+from functools import partial
+from itertools import chain, repeat
 from pathlib import Path
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 
-# Add project paths
-backend_path = Path(__file__).parent.parent.parent / 'backend'
-sys.path.insert(0, str(backend_path))
+# Report-only: neither Django nor reportlab is imported here; reportlab is
+# loaded by the first report that is rendered (see report_styles)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from report_sections import SectionCache, join_parts
+from result_table import ResultTable, report_summary
 
 
 class ReportType(Enum):
@@ -44,6 +50,11 @@ class TestResult:
     duration: float
     error_message: Optional[str] = None
     error_traceback: Optional[str] = None
+    query_count: int = 0
+    sql_time: float = 0.0
+    repeated_queries: Optional[List[Dict]] = None  # [{'fingerprint', 'count'}]
+    quarantined: bool = False  # failed, but known flaky (see flaky_detector.py)
+    flake_rate: float = 0.0
 
 
 @dataclass
@@ -57,7 +68,7 @@ class TestSuite:
     blocked: int
     pass_rate: float
     duration: float
-    tests: List[TestResult]
+    tests: Iterable[TestResult]  # a list, a result_table.TestResultTable, or StoredTests
     coverage: Optional[Dict] = None
 
 
@@ -81,71 +92,378 @@ class DefectInfo:
     description: str
 
 
+def select_tests(suite: TestSuite, predicate: Callable[[TestResult], bool], **filters) -> Iterator[TestResult]:
+    """Tests of a suite matching `predicate`, in suite order
+
+    For StoredTests the store query is narrowed by `filters` (see
+    result_store.run_results) first, so only matching rows are read.
+    """
+    tests = suite.tests.where(**filters) if isinstance(suite.tests, StoredTests) else suite.tests
+    return (test for test in tests if predicate(test))
+
+
+def find_query_hotspots(test_suites: List[TestSuite], limit: int = 15) -> List[TestResult]:
+    """Tests flagged with repeated query shapes, worst repetition first"""
+    flagged = (
+        test for suite in test_suites
+        for test in select_tests(suite, lambda t: t.repeated_queries, has_detail='repeated_queries')
+    )
+    return heapq.nsmallest(limit, flagged, key=lambda t: (-t.repeated_queries[0]['count'], -t.query_count))
+
+
+def failed_tests(suite: TestSuite) -> Iterator[TestResult]:
+    """Failures of a suite that are not quarantined"""
+    return select_tests(
+        suite, lambda t: t.status == 'FAIL' and not t.quarantined, status='FAIL', quarantined=False
+    )
+
+
+def find_quarantined_tests(test_suites: List[TestSuite]) -> List[TestResult]:
+    """Failures of quarantined flaky tests, highest flake rate first"""
+    quarantined = [
+        test for suite in test_suites
+        for test in select_tests(suite, lambda t: t.quarantined, quarantined=True)
+    ]
+    quarantined.sort(key=lambda t: -t.flake_rate)
+    return quarantined
+
+
+# Rows per table of a long report table; every table repeats the header
+# row and fills about one page
+TABLE_CHUNK_ROWS = 40
+
+# Flowables materialised ahead of the one being laid out
+STORY_LOOKAHEAD = 8
+
+_report_styles = None
+
+
+def _header_table_style(header_color: str, align: str, font_size: Optional[int] = None,
+                        padding: Optional[int] = None, top_padding: bool = True, striped: bool = False,
+                        body_color: Optional[str] = None, bold: bool = True):
+    """TableStyle with a coloured header row and a grey grid"""
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+    
+    commands = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header_color)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), align),
+    ]
+    if bold:
+        commands.append(('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'))
+    if font_size:
+        commands.append(('FONTSIZE', (0, 0), (-1, -1), font_size))
+    if padding:
+        commands.append(('BOTTOMPADDING', (0, 0), (-1, -1), padding))
+        if top_padding:
+            commands.append(('TOPPADDING', (0, 0), (-1, -1), padding))
+    commands.append(('GRID', (0, 0), (-1, -1), 1, colors.grey))
+    if striped:
+        commands.append(('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]))
+    if body_color:
+        commands.append(('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor(body_color)))
+    return TableStyle(commands)
+
+
+class ReportStyles:
+    """Paragraph and table styles shared by every report
+
+    Built once per process by report_styles(); reportlab is only imported
+    then, and repeated report generations reuse the same objects.
+    """
+    
+    def __init__(self):
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import TableStyle
+        
+        self.sample = getSampleStyleSheet()
+        self.title = ParagraphStyle(
+            'CustomTitle',
+            parent=self.sample['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            textColor=colors.HexColor('#1976D2')
+        )
+        self.heading = ParagraphStyle(
+            'Heading',
+            parent=self.sample['Heading2'],
+            fontSize=16,
+            spaceAfter=15,
+            textColor=colors.HexColor('#333333')
+        )
+        self.normal = ParagraphStyle(
+            'Normal',
+            parent=self.sample['Normal'],
+            fontSize=10,
+            spaceAfter=6
+        )
+        
+        self.tables = {
+            'summary': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), colors.whitesmoke),
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 12),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+                ('TOPPADDING', (0, 0), (-1, -1), 12),
+                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ]),
+            'manual_summary': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), colors.whitesmoke),
+                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+                ('FONTSIZE', (0, 0), (-1, -1), 12),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ]),
+            'module': _header_table_style('#1976D2', 'CENTER', 10, 8, striped=True),
+            'coverage': _header_table_style('#4CAF50', 'CENTER', 10, 8, top_padding=False),
+            'hotspot': _header_table_style('#FF9800', 'LEFT', 8, 6),
+            'failed': _header_table_style('#f44336', 'LEFT', 9, 6, body_color='#c62828'),
+            'quarantine': _header_table_style('#9C27B0', 'LEFT', 9, 6),
+            'manual_module': _header_table_style('#1976D2', 'CENTER', bold=False),
+            'manual_defect': _header_table_style('#f44336', 'CENTER', 9, bold=False),
+            'defect': _header_table_style('#c62828', 'CENTER', 9, bold=False),
+        }
+
+
+def report_styles() -> ReportStyles:
+    """The process-wide ReportStyles, created on first use"""
+    global _report_styles
+    if _report_styles is None:
+        _report_styles = ReportStyles()
+    return _report_styles
+
+
+class StoredTests:
+    """TestResults of one stored run, read from the result store page by page
+
+    Picklable, so suites built from it can be handed to render workers;
+    every iteration is a fresh read that holds one page of rows at a time.
+    """
+    
+    def __init__(self, run_id: int, db_path: Optional[str] = None, **filters):
+        self.run_id = run_id
+        self.db_path = db_path
+        self.filters = filters
+    
+    def where(self, **filters) -> 'StoredTests':
+        """The same run narrowed by more result_store.run_results filters"""
+        return StoredTests(self.run_id, self.db_path, **self.filters, **filters)
+    
+    def _store(self):
+        from result_store import ResultStore, STORE_PATH
+        return ResultStore(Path(self.db_path) if self.db_path else STORE_PATH)
+    
+    def __iter__(self) -> Iterator[TestResult]:
+        with self._store() as store:
+            for result in store.run_results(self.run_id, **self.filters):
+                yield test_result_from_dict(result)
+    
+    def count(self) -> int:
+        """Number of matching results, counted by the store without reading them"""
+        with self._store() as store:
+            return store.count_results(self.run_id, **self.filters)
+
+
+class FlowableStream(list):
+    """Story list that refills itself from an iterator while doc.build consumes it
+
+    doc.build takes flowables off the front of its list one at a time, so
+    only STORY_LOOKAHEAD flowables (plus the pages already written) are in
+    memory however long the report is.
+    """
+    
+    def __init__(self, flowables: Iterable, lookahead: int = STORY_LOOKAHEAD):
+        super().__init__()
+        self._pending = iter(flowables)
+        self._lookahead = lookahead
+        self._refill()
+    
+    def _refill(self):
+        for flowable in self._pending:
+            self.append(flowable)
+            if len(self) >= self._lookahead:
+                break
+    
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        if len(self) < self._lookahead:
+            self._refill()
+
+
+def table_section(heading: str, intro: Optional[str], header: List[str], rows: Iterable[List],
+                  col_widths: List[float], style_name: str) -> Iterator:
+    """Flowables of a report section holding one long table, produced lazily
+
+    The table is split into tables of TABLE_CHUNK_ROWS rows that each
+    repeat the header. Nothing is produced if `rows` is empty.
+    """
+    from reportlab.platypus import Table, Paragraph, Spacer
+    
+    styles = report_styles()
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    yield Paragraph(heading, styles.heading)
+    if intro:
+        yield Paragraph(intro, styles.normal)
+    
+    chunk = [header, first]
+    for row in rows:
+        if len(chunk) > TABLE_CHUNK_ROWS:
+            table = Table(chunk, colWidths=col_widths, repeatRows=1)
+            table.setStyle(styles.tables[style_name])
+            yield table
+            chunk = [header]
+        chunk.append(row)
+    table = Table(chunk, colWidths=col_widths, repeatRows=1)
+    table.setStyle(styles.tables[style_name])
+    yield table
+    yield Spacer(1, 30)
+
+
+@dataclass
+class ReportJob:
+    """One report for PDFReportGenerator.render_reports"""
+    report_type: ReportType
+    args: tuple
+    kwargs: Dict = field(default_factory=dict)
+
+
+def suite_aggregates(suite: TestSuite) -> Dict:
+    """PDF aggregates of a single suite, taken from its counts"""
+    if isinstance(suite.tests, StoredTests):
+        quarantined = suite.tests.where(quarantined=True).count()
+    else:
+        quarantined = sum(1 for test in suite.tests if test.quarantined)
+    return {
+        'summary': {
+            'total_tests': suite.total_tests,
+            'passed': suite.passed,
+            'failed': suite.failed,
+            'skipped': suite.skipped,
+            'quarantined': quarantined,
+            'pass_rate': suite.pass_rate,
+        },
+        'by_marker': {},
+    }
+
+
+def _render_job(output_dir: str, job: ReportJob) -> str:
+    """Render one job; runs in a render_reports worker process"""
+    generator = PDFReportGenerator(output_dir)
+    method = {
+        ReportType.AUTOMATED: generator.generate_automated_test_report,
+        ReportType.MANUAL: generator.generate_manual_test_report,
+        ReportType.DEFECT: generator.generate_defect_report,
+    }[job.report_type]
+    return method(*job.args, **job.kwargs)
+
+
 class PDFReportGenerator:
     """Generate PDF reports for test results"""
     
     def __init__(self, output_dir: str = "testing/reports"):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+    
+    def render_reports(self, jobs: List[ReportJob], max_workers: Optional[int] = None) -> List[str]:
+        """Render independent reports concurrently in a process pool
+
+        Returns the report paths in job order. The whole batch takes about
+        as long as its slowest report.
+        """
+        workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+        if workers <= 1:
+            return [_render_job(str(self.output_dir), job) for job in jobs]
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_render_job, repeat(str(self.output_dir)), jobs))
+    
+    def _document(self, filepath: Path):
+        """A4 document with the automated report's margins"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate
+        
+        return SimpleDocTemplate(
+            str(filepath),
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=72
+        )
+    
+    def automated_report_jobs(
+        self,
+        test_suites: List[TestSuite],
+        coverage_data: Optional[CoverageData],
+        metadata: Dict,
+        aggregates: Optional[Dict] = None,
+        per_suite: bool = False,
+        section_cache: Optional[SectionCache] = None
+    ) -> List[ReportJob]:
+        """Jobs for the automated report and, with per_suite, one sub-report per suite
+
+        The aggregates are computed once here and shared by every job, and
+        so is `section_cache`.
+        """
+        if aggregates is None:
+            stats = ResultTable.from_test_results(
+                test for suite in test_suites for test in suite.tests
+            ).aggregate()
+            aggregates = {'summary': report_summary(stats['summary']), 'by_marker': stats['by_marker']}
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        jobs = [ReportJob(ReportType.AUTOMATED, (test_suites, coverage_data, metadata),
+                          {'aggregates': aggregates, 'section_cache': section_cache})]
+        if per_suite:
+            for suite in test_suites:
+                slug = ''.join(c if c.isalnum() else '_' for c in suite.suite_name.lower())
+                jobs.append(ReportJob(
+                    ReportType.AUTOMATED,
+                    ([suite], None, dict(metadata, suite=suite.suite_name)),
+                    {
+                        'aggregates': suite_aggregates(suite),
+                        'filename': f"automated_test_report_{slug}_{timestamp}.pdf",
+                        'section_cache': section_cache,
+                    }
+                ))
+        return jobs
         
     def generate_automated_test_report(
         self,
         test_suites: List[TestSuite],
         coverage_data: Optional[CoverageData],
-        metadata: Dict
+        metadata: Dict,
+        aggregates: Optional[Dict] = None,
+        filename: Optional[str] = None,
+        section_cache: Optional[SectionCache] = None
     ) -> str:
-        """Generate automated test report PDF"""
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        """Generate automated test report PDF
+
+        `aggregates` holds the 'summary' and 'by_marker' sections of a
+        results JSON report; without them they are computed from the
+        suites' tests. With a `section_cache` every module's failures are
+        a separate part, starting on a new page, that is only rendered
+        again when its rows change (see report_sections.py).
+        """
         from reportlab.lib.units import inch
-        from reportlab.platypus import (
-            SimpleDocTemplate, Table, TableStyle, Paragraph,
-            Spacer, Image, PageBreak, Flowable
-        )
-        from reportlab.graphics.shapes import Drawing
-        from reportlab.graphics.widgets.grids import Grid, ShapedRect
-        from reportlab.graphics.charts.piecharts import PieChart
-        from reportlab.graphics.charts.barcharts import HorizontalBarChart
+        from reportlab.platypus import Table, Paragraph, Spacer
         
         # Create PDF
-        filename = f"automated_test_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        filename = filename or f"automated_test_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         filepath = self.output_dir / "pdf" / filename
         filepath.parent.mkdir(parents=True, exist_ok=True)
         
-        doc = SimpleDocTemplate(
-            str(filepath),
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
         # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.HexColor('#1976D2')
-        )
-        
-        heading_style = ParagraphStyle(
-            'Heading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            spaceAfter=15,
-            textColor=colors.HexColor('#333333')
-        )
-        
-        normal_style = ParagraphStyle(
-            'Normal',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceAfter=6
-        )
+        styles = report_styles()
+        title_style = styles.title
+        heading_style = styles.heading
+        normal_style = styles.normal
         
         # Build story
         story = []
@@ -164,32 +482,25 @@ class PDFReportGenerator:
         # Executive Summary
         story.append(Paragraph("Executive Summary", heading_style))
         
-        total_tests = sum(s.total_tests for s in test_suites)
-        total_passed = sum(s.passed for s in test_suites)
-        total_failed = sum(s.failed for s in test_suites)
-        total_skipped = sum(s.skipped for s in test_suites)
-        overall_pass_rate = (total_passed / total_tests * 100) if total_tests > 0 else 0
+        if aggregates is None:
+            stats = ResultTable.from_test_results(
+                test for suite in test_suites for test in suite.tests
+            ).aggregate()
+            aggregates = {'summary': report_summary(stats['summary']), 'by_marker': stats['by_marker']}
+        summary = aggregates['summary']
+        quarantined_tests = find_quarantined_tests(test_suites)
         
         summary_data = [
-            ['Total Tests', str(total_tests)],
-            ['Passed', str(total_passed)],
-            ['Failed', str(total_failed)],
-            ['Skipped', str(total_skipped)],
-            ['Pass Rate', f"{overall_pass_rate:.1f}%"],
+            ['Total Tests', str(summary['total_tests'])],
+            ['Passed', str(summary['passed'])],
+            ['Failed', str(summary['failed'])],
+            ['Quarantined (flaky)', str(summary.get('quarantined', 0))],
+            ['Skipped', str(summary.get('skipped', 0))],
+            ['Pass Rate', f"{summary['pass_rate']:.1f}%"],
         ]
         
         summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.whitesmoke),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ]))
+        summary_table.setStyle(styles.tables['summary'])
         story.append(summary_table)
         story.append(Spacer(1, 30))
         
@@ -208,20 +519,30 @@ class PDFReportGenerator:
             ])
         
         suite_table = Table(suite_data, colWidths=[2*inch, inch, inch, inch, inch, inch])
-        suite_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976D2')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
-        ]))
+        suite_table.setStyle(styles.tables['module'])
         story.append(suite_table)
         story.append(Spacer(1, 30))
         
+        # Test Results by Marker
+        if aggregates.get('by_marker'):
+            story.append(Paragraph("Test Results by Marker", heading_style))
+            
+            marker_data = [['Marker', 'Total', 'Passed', 'Failed', 'Skipped', 'Pass Rate']]
+            for marker, data in aggregates['by_marker'].items():
+                marker_data.append([
+                    marker,
+                    str(data['total']),
+                    str(data['passed']),
+                    str(data['failed']),
+                    str(data['skipped']),
+                    f"{data['pass_rate']:.1f}%"
+                ])
+            
+            marker_table = Table(marker_data, colWidths=[2*inch, inch, inch, inch, inch, inch])
+            marker_table.setStyle(styles.tables['module'])
+            story.append(marker_table)
+            story.append(Spacer(1, 30))
+        
         # Coverage Section
         if coverage_data:
             story.append(Paragraph("Code Coverage Analysis", heading_style))
@@ -239,103 +560,139 @@ class PDFReportGenerator:
                 ])
             
             coverage_table = Table(coverage_data_list, colWidths=[1.5*inch, inch, inch, inch, inch])
-            coverage_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4CAF50')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ]))
+            coverage_table.setStyle(styles.tables['coverage'])
             story.append(coverage_table)
             story.append(Spacer(1, 30))
         
-        # Failed Tests
-        all_failed_tests = []
-        for suite in test_suites:
-            for test in suite.tests:
-                if test.status == 'FAIL':
-                    all_failed_tests.append(test)
+        # Query Hotspots
+        hotspot_rows = (
+            [
+                test.test_id[-30:],
+                test.module,
+                str(test.query_count),
+                f"{test.sql_time * 1000:.1f} ms",
+                str(test.repeated_queries[0]['count']),
+                test.repeated_queries[0]['fingerprint'][:40]
+            ]
+            for test in find_query_hotspots(test_suites)
+        )
+        story.extend(table_section(
+            "Query Hotspots",
+            "Tests that executed the same query shape repeatedly (possible N+1 queries).",
+            ['Test ID', 'Module', 'Queries', 'SQL Time', 'Repeats', 'Query Shape'],
+            hotspot_rows,
+            [1.6*inch, inch, 0.7*inch, 0.8*inch, 0.7*inch, 2*inch],
+            'hotspot'
+        ))
         
-        if all_failed_tests:
-            story.append(Paragraph("Failed Tests", heading_style))
-            
-            failed_data = [['Test ID', 'Test Name', 'Module', 'Error']]
-            for test in all_failed_tests[:20]:  # Limit to 20
-                error_short = test.error_message[:100] if test.error_message else 'N/A'
-                failed_data.append([
+        # Failed and Quarantined Tests: every row, streamed into the story
+        # while it is built
+        def failed_rows(suites):
+            return (
+                [
                     test.test_id,
                     test.test_name[:30],
                     test.module,
-                    error_short
-                ])
-            
-            failed_table = Table(failed_data, colWidths=[1.2*inch, 2.5*inch, inch, 2*inch])
-            failed_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f44336')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#c62828')),
-            ]))
-            story.append(failed_table)
+                    test.error_message[:100] if test.error_message else 'N/A'
+                ]
+                for suite in suites for test in failed_tests(suite)
+            )
+        
+        def quarantine_rows():
+            return (
+                [
+                    test.test_id[-40:],
+                    test.module,
+                    f"{test.flake_rate * 100:.1f}%",
+                    test.error_message[:60] if test.error_message else 'N/A'
+                ]
+                for test in quarantined_tests
+            )
+        
+        failed_header = ['Test ID', 'Test Name', 'Module', 'Error']
+        failed_widths = [1.2*inch, 2.5*inch, inch, 2*inch]
+        quarantine_section = (
+            "Quarantined Tests",
+            "Failures of known flaky tests. They passed on rerun and do not fail the build.",
+            ['Test ID', 'Module', 'Flake Rate', 'Error'],
+            quarantine_rows,
+            [2.2*inch, inch, 0.8*inch, 2.7*inch],
+            'quarantine'
+        )
         
         # Build PDF
-        doc.build(story)
+        if section_cache is None:
+            sections = [
+                ("Failed Tests", None, failed_header, partial(failed_rows, test_suites), failed_widths, 'failed'),
+                quarantine_section,
+            ]
+            self._document(filepath).build(FlowableStream(chain(story, *(
+                table_section(heading, intro, header, rows(), widths, style)
+                for heading, intro, header, rows, widths, style in sections
+            ))))
+            return str(filepath)
+        
+        # From parts: the overview is rendered every time, each module's
+        # failures only when their rows changed
+        sections = [
+            (f"Failed Tests: {suite.suite_name}", None, failed_header,
+             partial(failed_rows, [suite]), failed_widths, 'failed')
+            for suite in test_suites
+        ]
+        sections.append(quarantine_section)
+        overview = section_cache.directory / f"overview.{os.getpid()}.pdf"
+        self._document(overview).build(story)
+        parts = [overview]
+        for heading, intro, header, rows, widths, style in sections:
+            key = section_cache.key(heading, rows())
+            if key is None:
+                continue
+            parts.append(section_cache.get(key) or section_cache.put(
+                key,
+                lambda path: self._document(path).build(
+                    FlowableStream(table_section(heading, intro, header, rows(), widths, style))
+                )
+            ))
+        join_parts(parts, filepath)
+        overview.unlink()
         return str(filepath)
     
     def generate_manual_test_report(
         self,
         test_cases: List[Dict],
         defects: List[DefectInfo],
-        metadata: Dict
+        metadata: Dict,
+        filename: Optional[str] = None
     ) -> str:
         """Generate manual test report PDF"""
-        from reportlab.lib import colors
         from reportlab.lib.pagesizes import A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
         from reportlab.lib.units import inch
-        from reportlab.platypus import (
-            SimpleDocTemplate, Table, TableStyle, Paragraph,
-            Spacer, PageBreak
-        )
+        from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
         
-        filename = f"manual_test_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        filename = filename or f"manual_test_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         filepath = self.output_dir / "pdf" / "manual" / filename
         filepath.parent.mkdir(parents=True, exist_ok=True)
         
         doc = SimpleDocTemplate(str(filepath), pagesize=A4)
-        styles = getSampleStyleSheet()
+        styles = report_styles()
         
         story = []
         
         # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.HexColor('#1976D2')
-        )
-        
-        story.append(Paragraph("Codinzy Manual Test Report", title_style))
+        story.append(Paragraph("Codinzy Manual Test Report", styles.title))
         story.append(Paragraph(
             f"Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}",
-            styles['Normal']
+            styles.sample['Normal']
         ))
         story.append(Spacer(1, 30))
         
         # Summary
-        total = len(test_cases)
-        passed = sum(1 for tc in test_cases if tc.get('status') == 'PASS')
-        failed = sum(1 for tc in test_cases if tc.get('status') == 'FAIL')
-        blocked = sum(1 for tc in test_cases if tc.get('status') == 'BLOCK')
-        pass_rate = (passed / total * 100) if total > 0 else 0
+        stats = ResultTable.from_results(test_cases).aggregate()
+        total = stats['summary']['total']
+        passed = stats['summary']['passed']
+        failed = stats['summary']['failed']
+        blocked = stats['summary']['blocked']
+        pass_rate = stats['summary']['pass_rate']
         
         summary_data = [
             ['Total Test Cases', str(total)],
@@ -348,52 +705,30 @@ class PDFReportGenerator:
         ]
         
         summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.whitesmoke),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('FONTSIZE', 12),
-            ('BOTTOMPADDING', 12),
-        ]))
+        summary_table.setStyle(styles.tables['manual_summary'])
         story.append(summary_table)
         story.append(Spacer(1, 30))
         
         # Test Results by Module
-        modules = {}
-        for tc in test_cases:
-            module = tc.get('module', 'Other')
-            if module not in modules:
-                modules[module] = {'total': 0, 'passed': 0, 'failed': 0}
-            modules[module]['total'] += 1
-            if tc.get('status') == 'PASS':
-                modules[module]['passed'] += 1
-            elif tc.get('status') == 'FAIL':
-                modules[module]['failed'] += 1
-        
         module_data = [['Module', 'Total', 'Passed', 'Failed', 'Pass Rate']]
-        for module, data in modules.items():
-            rate = (data['passed'] / data['total'] * 100) if data['total'] > 0 else 0
+        for module, data in stats['by_module'].items():
             module_data.append([
                 module,
                 str(data['total']),
                 str(data['passed']),
                 str(data['failed']),
-                f"{rate:.1f}%"
+                f"{data['pass_rate']:.1f}%"
             ])
         
         module_table = Table(module_data, colWidths=[2*inch, inch, inch, inch, inch])
-        module_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976D2')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ]))
-        story.append(Paragraph("Test Results by Module", styles['Heading2']))
+        module_table.setStyle(styles.tables['manual_module'])
+        story.append(Paragraph("Test Results by Module", styles.sample['Heading2']))
         story.append(module_table)
         story.append(Spacer(1, 30))
         
         # Defects Summary
         if defects:
-            story.append(Paragraph("Defects Summary", styles['Heading2']))
+            story.append(Paragraph("Defects Summary", styles.sample['Heading2']))
             
             defect_data = [['ID', 'Title', 'Module', 'Severity', 'Status']]
             for d in defects:
@@ -406,13 +741,7 @@ class PDFReportGenerator:
                 ])
             
             defect_table = Table(defect_data, colWidths=[1*inch, 2.5*inch, inch, inch, inch])
-            defect_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f44336')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-                ('FONTSIZE', 9),
-            ]))
+            defect_table.setStyle(styles.tables['manual_defect'])
             story.append(defect_table)
         
         doc.build(story)
@@ -421,25 +750,24 @@ class PDFReportGenerator:
     def generate_defect_report(
         self,
         defects: List[DefectInfo],
-        metadata: Dict
+        metadata: Dict,
+        filename: Optional[str] = None
     ) -> str:
         """Generate defect report PDF"""
-        from reportlab.lib import colors
         from reportlab.lib.pagesizes import A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
         from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
         
-        filename = f"defect_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        filename = filename or f"defect_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         filepath = self.output_dir / "pdf" / "defects" / filename
         filepath.parent.mkdir(parents=True, exist_ok=True)
         
         doc = SimpleDocTemplate(str(filepath), pagesize=A4)
-        styles = getSampleStyleSheet()
+        styles = report_styles()
         story = []
         
         # Title
-        story.append(Paragraph("Codinzy Defect Report", styles['Heading1']))
+        story.append(Paragraph("Codinzy Defect Report", styles.sample['Heading1']))
         story.append(Spacer(1, 20))
         
         # Summary by Severity
@@ -465,64 +793,161 @@ class PDFReportGenerator:
             ])
         
         table = Table(defect_data, colWidths=[0.8*inch, 2.5*inch, inch, 0.8*inch, 1*inch, 1*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#c62828')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('FONTSIZE', 9),
-        ]))
+        table.setStyle(styles.tables['defect'])
         story.append(table)
         
         doc.build(story)
         return str(filepath)
 
 
-def run_report_generation():
-    """Main function to generate all reports"""
-    import json
+def test_result_from_dict(test: Dict, module_name: str = '') -> TestResult:
+    """TestResult from a result dict of the results JSON / result store"""
+    return TestResult(
+        test_id=test.get('test_id', ''),
+        test_name=test.get('name', ''),
+        module=test.get('module', module_name),
+        status=test.get('status', 'PASS'),
+        duration=test.get('duration', 0),
+        error_message=test.get('error'),
+        error_traceback=test.get('traceback'),
+        query_count=test.get('query_count', 0),
+        sql_time=test.get('sql_time', 0.0),
+        repeated_queries=test.get('repeated_queries'),
+        quarantined=test.get('quarantined', False),
+        flake_rate=test.get('flake_rate', 0.0)
+    )
+
+
+MANUAL_RESULTS_FILE = Path("testing/reports/manual/json/test_results.json")
+
+
+def manual_report_jobs(report_type: ReportType, path: Path = MANUAL_RESULTS_FILE) -> List[ReportJob]:
+    """The manual or defect report job for a manual results file
+
+    The file holds 'test_cases' (result dicts: test_id, name, module,
+    status) and 'defects' (DefectInfo fields). No jobs if it is missing.
+    """
+    if not path.exists():
+        print(f"No manual test results at {path}")
+        return []
+    with open(path) as f:
+        data = json.load(f)
+    defects = [DefectInfo(**defect) for defect in data.get('defects', [])]
+    metadata = data.get('report_metadata', {})
+    if report_type == ReportType.DEFECT:
+        return [ReportJob(ReportType.DEFECT, (defects, metadata))]
+    return [ReportJob(ReportType.MANUAL, (data.get('test_cases', []), defects, metadata))]
+
+
+def run_report_generation(result_files: Optional[List[str]] = None, per_suite: bool = False,
+                          incremental: bool = False, report_type: ReportType = ReportType.AUTOMATED):
+    """Main function to generate all reports
+
+    With `result_files` (shard result files or directories of them) the
+    automated report covers their merge instead of the latest stored run.
+    With `per_suite` every module also gets its own sub-report; all
+    reports are rendered in parallel. With `incremental` sections whose
+    rows did not change since the last generation are reused. A manual or
+    defect `report_type` renders that report from MANUAL_RESULTS_FILE.
+    """
+    from result_store import ResultStore
+    from report_sections import pypdf_available
     
     generator = PDFReportGenerator()
+    if report_type != ReportType.AUTOMATED:
+        for filepath in generator.render_reports(manual_report_jobs(report_type)):
+            print(f"Generated {report_type.value} report: {filepath}")
+        print("Report generation completed.")
+        return
     
-    # Load test results from JSON files
-    automated_results_file = Path("testing/reports/automated/json/backend_results.json")
-    manual_results_file = Path("testing/reports/manual/json/test_results.json")
+    test_suites = None
+    section_cache = None
+    if incremental:
+        if pypdf_available():
+            section_cache = SectionCache(generator.output_dir / 'pdf' / 'sections')
+        else:
+            print("pypdf is not installed; rendering every section")
     
-    if automated_results_file.exists():
-        with open(automated_results_file) as f:
-            results = json.load(f)
+    if result_files:
+        from merge_results import expand_result_files, merge_result_files, build_test_suites
+        files = expand_result_files(result_files)
+        results, stats = merge_result_files(files)
+        test_suites, aggregates = build_test_suites(results)
+        coverage_data = None
+        metadata = {'merged_from': len(files), **stats}
+    else:
+        with ResultStore() as store:
+            # Pick up runs saved before the store existed, the legacy single
+            # file, and the JUnit XML / pytest-json output of a plain pytest run
+            store.ingest_directory()
+            for results_file in (
+                Path("testing/reports/automated/json/backend_results.json"),
+                Path("testing/reports/automated/xml/backend-results.xml"),
+                Path("testing/reports/automated/json/backend-results.json"),
+            ):
+                if results_file.exists():
+                    store.ingest_file(results_file)
             
-            # Create test suites from results
-            test_suites = []
-            for suite_data in results.get('test_results', {}).values():
-                suite = TestSuite(
-                    suite_name=suite_data.get('module', 'Unknown'),
-                    total_tests=suite_data.get('total', 0),
-                    passed=suite_data.get('passed', 0),
-                    failed=suite_data.get('failed', 0),
-                    skipped=0,
-                    blocked=0,
-                    pass_rate=suite_data.get('pass_rate', 0),
-                    duration=0,
-                    tests=[]
+            run = store.latest_run()
+            if run is not None:
+                counts = {row['module']: row for row in store.module_counts(run['run_id'])}
+                
+                # Create test suites from the latest run; their tests stay in
+                # the store and are read page by page while rendering
+                test_suites = []
+                for module_name, row in counts.items():
+                    suite = TestSuite(
+                        suite_name=module_name,
+                        total_tests=row['total'],
+                        passed=row['passed'],
+                        failed=row['failed'],
+                        skipped=row['skipped'],
+                        blocked=0,
+                        pass_rate=round(row['passed'] / row['total'] * 100, 2) if row['total'] else 0,
+                        duration=round(row['duration'], 6),
+                        tests=StoredTests(run['run_id'], str(store.path), module=module_name)
+                    )
+                    test_suites.append(suite)
+                
+                stored = json.loads(run['summary'])
+                coverage = stored.get('coverage', {})
+                coverage_data = CoverageData(
+                    overall_coverage=coverage.get('overall', {}).get('coverage_percentage', 0),
+                    by_module=coverage.get('by_module', {})
                 )
-                test_suites.append(suite)
-            
-            coverage_data = CoverageData(
-                overall_coverage=results.get('coverage', {}).get('overall', {}).get('coverage_percentage', 0),
-                by_module=results.get('coverage', {}).get('by_module', {})
-            )
-            
-            # Generate report
-            filepath = generator.generate_automated_test_report(
-                test_suites,
-                coverage_data,
-                results.get('report_metadata', {})
-            )
+                aggregates = stored if stored.get('summary') else None
+                metadata = {'source': run['source'], 'generated_at': run['started_at']}
+    
+    if test_suites is not None:
+        # Generate reports
+        jobs = generator.automated_report_jobs(
+            test_suites, coverage_data, metadata, aggregates, per_suite=per_suite,
+            section_cache=section_cache
+        )
+        for filepath in generator.render_reports(jobs):
             print(f"Generated automated test report: {filepath}")
+        if section_cache is not None:
+            section_cache.prune()
     
     print("Report generation completed.")
 
 
 if __name__ == "__main__":
-    run_report_generation()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Generate Codinzy PDF test reports')
+    parser.add_argument('--type', choices=['automated', 'manual', 'defect'], default='automated',
+                        help='Report to generate (default: automated)')
+    parser.add_argument('result_files', nargs='*',
+                        help='Shard result files or directories to merge (default: latest stored run)')
+    parser.add_argument('--per-suite', action='store_true', help='Also render one report per module')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse rendered sections whose results did not change')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Run the command under -X importtime and print the import costs')
+    args = parser.parse_args()
+    if args.profile_startup:
+        from startup_profile import profile_startup
+        sys.exit(profile_startup(__file__, sys.argv[1:]))
+    run_report_generation(args.result_files, per_suite=args.per_suite, incremental=args.incremental,
+                          report_type=ReportType(args.type))
@@ -0,0 +1,194 @@
+"""
+Result File Merger for Codinzy Tests
+
+Runs sharded across machines or runners leave many partial result files.
+This script combines any number of them into one report:
+1. Map: stream every file (results JSON report, results JSONL file,
+   pytest JUnit XML or pytest-json report) one at a time, in the order
+   given
+2. Reduce: keep one result per test id. A test that appears more than
+   once was retried; the attempt from the newest run wins (later in the
+   same file on a tie) and the result records the number of attempts
+3. Recompute durations, counts and pass rates from the deduplicated
+   results with the aggregation engine (result_table.py)
+
+Only the winning attempt of each test is held in memory, so memory grows
+with the number of distinct tests, not with the number of files.
+
+Usage:
+    python scripts/merge_results.py shards/*.json --output reports/automated/json/automated_results_merged.json
+    python scripts/merge_results.py shards/ --pdf
+"""
+
+import sys
+import json
+import argparse
+import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+RESULT_PATTERNS = ('*.json', '*.jsonl', '*.xml')
+
+
+def expand_result_files(paths: List[str]) -> List[Path]:
+    """Files as given; directories contribute their result files sorted by name"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(f for pattern in RESULT_PATTERNS for f in path.glob(pattern)))
+        else:
+            files.append(path)
+    return files
+
+
+def run_started(value: Optional[str], fallback: datetime.datetime) -> datetime.datetime:
+    """Timezone-aware start time of a run; naive timestamps are local time"""
+    try:
+        started = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return fallback
+    return started if started.tzinfo else started.astimezone()
+
+
+def read_result_file(path: Path) -> Tuple[Path, datetime.datetime, Iterator[Dict]]:
+    """File the results come from, run start time and an iterator over the results
+
+    A results JSON report of a streamed run (keep_tests=False) only
+    points at its JSONL file; the results are read from there.
+    """
+    modified = datetime.datetime.fromtimestamp(path.stat().st_mtime).astimezone()
+    if path.suffix == '.jsonl':
+        from result_stream import ResultStream
+        stream = ResultStream(path)
+        return path, run_started((stream.header or {}).get('started_at'), modified), iter(stream)
+    from result_ingest import is_pytest_json, read_results
+    if path.suffix == '.xml' or is_pytest_json(path):
+        started_at, results = read_results(path)
+        return path, run_started(started_at, modified), results
+    with open(path) as f:
+        report = json.load(f)
+    metadata = report.get('report_metadata', {})
+    modules = report.get('test_results', {}).values()
+    if 'results_file' in metadata and not any(module.get('tests') for module in modules):
+        # Streamed run: the results live in the JSONL file
+        results_file = Path(metadata['results_file'])
+        if results_file.exists():
+            return read_result_file(results_file)
+    return path, run_started(metadata.get('generated_at'), modified), (
+        test for module in modules for test in module.get('tests', [])
+    )
+
+
+def merge_result_files(paths: List[Path]) -> Tuple[List[Dict], Dict]:
+    """Deduplicated results of all files and merge statistics"""
+    winners = {}
+    attempts = 0
+    read = set()
+    for file_index, path in enumerate(paths):
+        if path.resolve() in read:
+            continue
+        source, started_at, results = read_result_file(path)
+        # A JSON report and the JSONL file it points at are one run
+        if source.resolve() in read:
+            continue
+        read.add(source.resolve())
+        for result in results:
+            attempts += 1
+            key = (started_at, file_index)
+            entry = winners.get(result['test_id'])
+            if entry is None:
+                winners[result['test_id']] = [key, result, 1, result.get('duration') or 0.0]
+                continue
+            entry[2] += 1
+            entry[3] += result.get('duration') or 0.0
+            if key >= entry[0]:
+                entry[0], entry[1] = key, result
+
+    merged = []
+    for key, result, count, total_duration in winners.values():
+        if count > 1:
+            result = dict(result, attempts=count, attempts_duration=round(total_duration, 6))
+        merged.append(result)
+    stats = {
+        'files': len(paths),
+        'attempts': attempts,
+        'tests': len(merged),
+        'retried': sum(1 for result in merged if result.get('attempts')),
+    }
+    return merged, stats
+
+
+def build_test_suites(results: List[Dict]) -> Tuple[List, Dict]:
+    """TestSuite model of merged results, plus the PDF aggregates
+
+    Each suite holds its tests in a compact TestResultTable.
+    """
+    from result_table import ResultTable, TestResultTable, report_summary
+    from generate_pdf_report import TestSuite
+
+    stats = ResultTable.from_results(results).aggregate()
+    tests_by_module = {}
+    for result in results:
+        tests_by_module.setdefault(result.get('module', 'Other'), TestResultTable()).append(result)
+
+    suites = [
+        TestSuite(
+            suite_name=module,
+            total_tests=data['total'],
+            passed=data['passed'],
+            failed=data['failed'],
+            skipped=data['skipped'],
+            blocked=data['blocked'],
+            pass_rate=data['pass_rate'],
+            duration=data['duration'],
+            tests=tests_by_module[module]
+        )
+        for module, data in stats['by_module'].items()
+    ]
+    aggregates = {'summary': report_summary(stats['summary']), 'by_marker': stats['by_marker']}
+    return suites, aggregates
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Merge Codinzy result files into one report')
+    parser.add_argument('paths', nargs='+', help='Result files or directories of result files')
+    parser.add_argument('--output', help='Write the merged results JSON report here')
+    parser.add_argument('--pdf', action='store_true', help='Generate the automated PDF report')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Run the command under -X importtime and print the import costs')
+    args = parser.parse_args(argv)
+    if args.profile_startup:
+        from startup_profile import profile_startup
+        return profile_startup(__file__, sys.argv[1:] if argv is None else argv)
+
+    files = expand_result_files(args.paths)
+    if not files:
+        print("No result files found.")
+        return 1
+    results, stats = merge_result_files(files)
+    print(f"Merged {stats['attempts']} results from {stats['files']} files into "
+          f"{stats['tests']} tests ({stats['retried']} retried)")
+
+    if args.output:
+        from run_simple_tests import generate_test_report
+        report = generate_test_report(results, 'automated')
+        report['report_metadata']['merged_from'] = [str(path) for path in files]
+        report['report_metadata']['merge'] = stats
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"JSON report saved: {args.output}")
+
+    if args.pdf:
+        from generate_pdf_report import PDFReportGenerator
+        suites, aggregates = build_test_suites(results)
+        filepath = PDFReportGenerator().generate_automated_test_report(
+            suites, None, {'merged_from': len(files), **stats}, aggregates=aggregates
+        )
+        print(f"Generated automated test report: {filepath}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
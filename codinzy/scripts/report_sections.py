@@ -0,0 +1,101 @@
+"""
+Rendered Section Cache for Codinzy PDF Reports
+
+Regenerating the automated report after a rerun of one module used to lay
+out every section again. With a section cache the report is built from
+separately rendered parts:
+1. The overview (summary, module, marker and coverage tables, hotspots)
+   is rendered every time; it is small and carries the generation time
+2. Every module's failures and the quarantined tests are separate parts,
+   stored as small PDFs keyed by a hash of the rows they show
+3. A part whose key is cached is reused as is; the parts are then joined
+   into the report with pypdf
+
+Rerunning only test_payments re-renders the overview and the Payments
+failures; the parts of every other module come from the cache. Parts not
+used for CACHE_MAX_AGE_DAYS are pruned.
+
+Requirements:
+- pypdf (without it reports are rendered in full)
+
+Usage:
+    python scripts/generate_pdf_report.py --incremental
+"""
+
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+# Bump when the layout of a cached section changes
+RENDER_VERSION = 1
+CACHE_MAX_AGE_DAYS = 7
+
+
+def pypdf_available() -> bool:
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class SectionCache:
+    """Rendered report sections on disk, one PDF per section key"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(heading: str, rows: Iterable[List]) -> Optional[str]:
+        """Hash of a section's heading and rows; None for a section without rows"""
+        digest = hashlib.sha256(f"{RENDER_VERSION}\n{heading}\n".encode())
+        empty = True
+        for row in rows:
+            digest.update(json.dumps(row).encode() + b'\n')
+            empty = False
+        return None if empty else digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.pdf"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Cached part of `key`, marked as used, or None"""
+        path = self.path(key)
+        if not path.exists():
+            return None
+        os.utime(path)
+        return path
+
+    def put(self, key: str, render: Callable[[str], None]) -> Path:
+        """Render a part with render(filename) and store it under `key`"""
+        path = self.path(key)
+        # Per-process temporary name: render workers share the directory
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        render(str(tmp_path))
+        tmp_path.replace(path)
+        return path
+
+    def prune(self, max_age_days: int = CACHE_MAX_AGE_DAYS) -> int:
+        """Delete parts not used in `max_age_days`; returns the count"""
+        cutoff = time.time() - max_age_days * 86400
+        count = 0
+        for path in self.directory.glob('*.pdf'):
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                count += 1
+        return count
+
+
+def join_parts(parts: List[Path], filepath: Path):
+    """Write the pages of all parts, in order, to one PDF"""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(str(part))
+    with open(filepath, 'wb') as f:
+        writer.write(f)
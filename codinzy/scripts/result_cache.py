@@ -0,0 +1,262 @@
+"""
+Content-Hash Result Cache for Codinzy Backend Tests
+
+The parallel runner uses this cache to skip tests whose inputs have not
+changed since their last run. A test's key hashes:
+- its whole class with its decorators, the classes it inherits from in
+  testing/, and its module's top-level code and helpers
+- the conftest fixtures it uses (plus autouse fixtures, hooks and helpers)
+- test_settings.py, test_hashers.py and test_queries.py
+- the api model classes it uses or whose tables it touched, and the api
+  views, serializers and urls when the test calls an /api/ endpoint
+- every other backend source (signals, utils, other apps), the backend
+  requirements files and the installed package versions
+
+Results whose key matches are reported with their last status and duration
+and marked 'cached': True.
+"""
+
+import sys
+import ast
+import json
+import hashlib
+import importlib.metadata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from test_impact import (
+    TESTING_DIR, BACKEND_DIR, API_DIR, CONFTEST,
+    build_index, fixture_dependencies, model_sources, model_tables, scopes_of_test
+)
+from run_parallel_tests import result_test_id
+
+CACHE_PATH = TESTING_DIR / '.result_cache.json'
+SETTINGS_FILES = [
+    TESTING_DIR / 'test_settings.py',
+    TESTING_DIR / 'test_hashers.py',
+    TESTING_DIR / 'test_queries.py',
+]
+
+# api modules only reached through a request; they affect endpoint tests
+ENDPOINT_MODULES = {'views', 'viewsets', 'serializers', 'urls', 'permissions', 'filters', 'pagination'}
+
+
+def is_endpoint_source(path: Path) -> bool:
+    return path.stem in ENDPOINT_MODULES or path.parent.name in ENDPOINT_MODULES
+
+
+def is_test_definition(node: ast.AST) -> bool:
+    """Test functions and test classes, as pytest.ini collects them"""
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return node.name.startswith('test')
+    return isinstance(node, ast.ClassDef) and (node.name.startswith('Test') or node.name.endswith('TestCase'))
+
+
+def environment_digest() -> bytes:
+    """Hash of every input no single test is tracked against
+
+    Backend sources other than the api models and endpoint modules (which
+    keys track per test) and migrations (the schema is built from the
+    models), the backend requirements and the installed distributions.
+    """
+    digest = hashlib.sha256(sys.version.encode())
+    tracked = set(model_sources())
+    sources = sorted(BACKEND_DIR.rglob('*.py')) if BACKEND_DIR.exists() else []
+    for path in sources:
+        if path in tracked or 'migrations' in path.parts:
+            continue
+        if API_DIR in path.parents and is_endpoint_source(path):
+            continue
+        digest.update(str(path.relative_to(BACKEND_DIR)).encode() + b'\0' + path.read_bytes())
+    for path in sorted(BACKEND_DIR.glob('requirements*.txt')) if BACKEND_DIR.exists() else []:
+        digest.update(path.read_bytes())
+    installed = sorted(
+        f"{dist.metadata['Name']}=={dist.version}" for dist in importlib.metadata.distributions()
+    )
+    digest.update('\n'.join(installed).encode())
+    return digest.digest()
+
+
+class SourceHasher:
+    """Source segments of test, conftest and model files, parsed once"""
+
+    def __init__(self):
+        self._files = {}
+
+    def parse(self, path: Path):
+        if path not in self._files:
+            source = path.read_bytes() if path.exists() else b''
+            # Split once; ast.get_source_segment would re-split per node
+            self._files[path] = (source.splitlines(keepends=True), ast.parse(source))
+        return self._files[path]
+
+    def segment(self, path: Path, node: ast.AST) -> str:
+        """Source text of `node` and its decorators (col offsets are UTF-8 byte offsets)"""
+        lines = self.parse(path)[0]
+        if getattr(node, 'end_lineno', None) is None:
+            return ''
+        decorators = getattr(node, 'decorator_list', None)
+        first, last = (decorators[0] if decorators else node).lineno - 1, node.end_lineno - 1
+        if first == last:
+            text = lines[first][node.col_offset:node.end_col_offset]
+        else:
+            text = lines[first][node.col_offset:] + b''.join(lines[first + 1:last]) \
+                + lines[last][:node.end_col_offset]
+        return text.decode('utf-8', 'replace')
+
+    def module_level(self, path: Path) -> str:
+        """Top-level code other than classes and functions"""
+        return '\n'.join(
+            self.segment(path, node)
+            for node in self.parse(path)[1].body
+            if not isinstance(node, (ast.ClassDef, ast.FunctionDef))
+        )
+
+    def helpers(self, path: Path) -> str:
+        """Top-level code other than test classes and test functions"""
+        return '\n'.join(
+            self.segment(path, node)
+            for node in self.parse(path)[1].body
+            if not is_test_definition(node)
+        )
+
+    def imported_module(self, path: Path, node: ast.ImportFrom) -> Optional[Path]:
+        """The testing/ source file an import in `path` refers to, if any"""
+        base = path.parents[node.level - 1] if node.level else TESTING_DIR
+        target = base.joinpath(*(node.module or '').split('.'))
+        for candidate in (target.with_suffix('.py'), target / '__init__.py'):
+            if candidate.exists() and TESTING_DIR in candidate.parents:
+                return candidate
+        return None
+
+    def class_sources(self, path: Path, name: str, seen=None) -> List[str]:
+        """Class `name` with its decorators, then its base classes from testing/"""
+        seen = set() if seen is None else seen
+        if (path, name) in seen:
+            return []
+        seen.add((path, name))
+        tree = self.parse(path)[1]
+        classes = {node.name: node for node in tree.body if isinstance(node, ast.ClassDef)}
+        if name not in classes:
+            return []
+        imports = {
+            alias.asname or alias.name: (node, alias.name)
+            for node in tree.body if isinstance(node, ast.ImportFrom) for alias in node.names
+        }
+
+        sources = [self.segment(path, classes[name])]
+        for base in classes[name].bases:
+            if not isinstance(base, ast.Name):
+                continue
+            if base.id in classes:
+                sources += self.class_sources(path, base.id, seen)
+            elif base.id in imports:
+                module = self.imported_module(path, imports[base.id][0])
+                if module is not None and module != path:
+                    sources.append(self.helpers(module))
+                    sources += self.class_sources(module, imports[base.id][1], seen)
+        return sources
+
+
+def content_keys(node_ids: List[str]) -> Dict[str, str]:
+    """Cache key for every node id"""
+    index = build_index()
+    fixtures = fixture_dependencies()
+    hasher = SourceHasher()
+
+    settings_digest = hashlib.sha256(environment_digest())
+    for path in SETTINGS_FILES:
+        settings_digest.update(path.read_bytes() if path.exists() else b'')
+
+    models = {}
+    models_module_level = ''
+    for path in model_sources():
+        tables = model_tables(path)
+        models_module_level += hasher.module_level(path)
+        for node in hasher.parse(path)[1].body:
+            if isinstance(node, ast.ClassDef):
+                models[node.name] = (tables[node.name], hasher.segment(path, node))
+    table_to_model = {table: name for name, (table, _) in models.items()}
+
+    api_sources = hashlib.sha256()
+    for path in sorted(API_DIR.rglob('*.py')) if API_DIR.exists() else []:
+        if is_endpoint_source(path) and path not in model_sources():
+            api_sources.update(path.read_bytes())
+
+    conftest_tree = hasher.parse(CONFTEST)[1]
+
+    keys = {}
+    for node_id in node_ids:
+        deps = index.get(node_id)
+        digest = hashlib.sha256(node_id.encode())
+        digest.update(settings_digest.digest())
+        if deps is None:
+            # Not discoverable statically: never served from the cache
+            keys[node_id] = None
+            continue
+
+        path_part, _, name = node_id.partition('::')
+        test_path = TESTING_DIR / path_part
+        digest.update(hasher.helpers(test_path).encode())
+        if '::' in name:
+            # tearDown, class attributes and decorators such as
+            # @override_settings matter as much as the test method
+            sources = hasher.class_sources(test_path, name.split('::')[0])
+        else:
+            scopes = scopes_of_test(hasher.parse(test_path)[1], name)
+            sources = [hasher.segment(test_path, scope) for scope in scopes]
+        for source in sources:
+            digest.update(source.encode())
+
+        for node in conftest_tree.body:
+            fixture = fixtures.get(getattr(node, 'name', None))
+            if fixture is None or fixture['autouse'] or node.name in deps['fixtures']:
+                digest.update(hasher.segment(CONFTEST, node).encode())
+
+        digest.update(models_module_level.encode())
+        used = set(deps['models']) | {table_to_model[t] for t in deps['tables'] if t in table_to_model}
+        for model in sorted(used):
+            if model in models:
+                digest.update(models[model][1].encode())
+        if deps['endpoints']:
+            digest.update(api_sources.digest())
+
+        keys[node_id] = digest.hexdigest()
+    return keys
+
+
+class ResultCache:
+    """Last result of every test, keyed by content hash"""
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        if path.exists():
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def lookup(self, node_id: str, key: Optional[str]) -> Optional[Dict]:
+        """Cached result for an unchanged test, or None"""
+        entry = self.entries.get(result_test_id(node_id))
+        if key is None or entry is None or entry.get('key') != key:
+            return None
+        return dict(entry['result'], cached=True)
+
+    def update(self, results: List[Dict], keys: Dict[str, str]):
+        """Remember freshly executed results under their keys"""
+        keys_by_test_id = {result_test_id(node_id): key for node_id, key in keys.items()}
+        for result in results:
+            key = keys_by_test_id.get(result['test_id'])
+            if key is None or result.get('cached') or result.get('infrastructure_error') \
+                    or result.get('quarantined'):
+                continue
+            self.entries[result['test_id']] = {'key': key, 'result': result}
+
+    def save(self):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        tmp_path.replace(self.path)
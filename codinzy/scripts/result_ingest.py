@@ -0,0 +1,298 @@
+"""
+Streaming Ingesters for pytest JUnit XML and pytest-json Reports
+
+`pytest --junit-xml` and `pytest --json-report` (see README) write one
+file per run. This module turns either into run_simple_tests result dicts,
+one test at a time, so files of hundreds of megabytes are never loaded
+whole:
+1. JUnit XML is read with ElementTree.iterparse; every <testcase> is
+   converted when it closes and then dropped from the tree
+2. pytest-json reports are decoded member by member from a sliding
+   buffer; each entry of "tests" is converted as soon as it is complete
+
+Both keep the failure message as 'error' and the full traceback as
+'traceback' (TestResult.error_traceback), plus the query and marker
+properties the conftest records.
+
+merge_results.py, result_store.py and generate_pdf_report.py read these
+files through `read_results`.
+
+Usage:
+    python scripts/result_ingest.py reports/automated/xml/backend-results.xml
+"""
+
+import sys
+import json
+import argparse
+import datetime
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+READ_SIZE = 1 << 20
+
+# Characters that can follow a complete JSON value
+VALUE_END = frozenset(' \t\r\n,:]}')
+
+PYTEST_OUTCOMES = {
+    'passed': 'PASS',
+    'failed': 'FAIL',
+    'error': 'FAIL',
+    'skipped': 'SKIP',
+    'xfailed': 'SKIP',
+    'xpassed': 'PASS',
+}
+
+MODULE_NAMES = {
+    'test_auth': 'Authentication',
+    'test_users': 'Users',
+    'test_courses': 'Courses',
+    'test_payments': 'Payments',
+    'test_scheduling': 'Scheduling',
+    'test_leads': 'Leads',
+    'test_gamification': 'Gamification',
+    'test_classroom': 'Classroom',
+    'test_enrollments': 'Enrollments',
+    'test_communications': 'Communications',
+    'test_utilities': 'Utilities',
+}
+
+# Top-level keys of a pytest-json report, in the order the plugin writes them
+PYTEST_JSON_KEYS = ('created', 'duration', 'exitcode', 'root', 'environment', 'summary', 'collectors', 'tests')
+
+
+def package_of(node_id: str) -> str:
+    """Return the test package (e.g. 'test_auth') a node id belongs to"""
+    return next((p for p in node_id.split('/') if p.startswith('test_')), 'unknown')
+
+
+def result_test_id(node_id: str) -> str:
+    """Map a pytest node id to the test_id used in the results JSON"""
+    return f"{package_of(node_id)}::{node_id.split('::', 1)[-1]}"
+
+
+def apply_property(result: Dict, name: str, value):
+    """Copy a conftest user property (query_count, markers, ...) into a result"""
+    if isinstance(value, str) and name in ('repeated_queries', 'db_tables', 'markers'):
+        value = json.loads(value)
+    if name == 'query_count':
+        result['query_count'] = int(value)
+    elif name == 'sql_time':
+        result['sql_time'] = float(value)
+    elif name in ('repeated_queries', 'db_tables', 'markers'):
+        result[name] = value
+
+
+def junit_case_result(case: ET.Element) -> Dict:
+    """Result dict of one <testcase> element
+
+    pytest writes the node id's path and classes, dotted, as the classname
+    (automated.backend.test_auth.__init__.AuthTestCase). The test id keeps
+    what result_test_id keeps of the node id: the package, then the classes
+    (none for a module-level test function) and the name.
+    """
+    parts = case.get('classname', '').split('.')
+    index = next((i for i, p in enumerate(parts) if p.startswith('test_')), None)
+    package = parts[index] if index is not None else 'unknown'
+    classes = parts[index + 1:] if index is not None else parts[-1:]
+    # Skip the test module inside the package (__init__ or test_*.py, as pytest.ini collects them)
+    while classes and (classes[0] == '__init__' or classes[0].startswith('test_')):
+        classes = classes[1:]
+    name = case.get('name', '')
+
+    result = {
+        'test_id': '::'.join([package, *classes, name]),
+        'name': name,
+        'module': MODULE_NAMES.get(package, package),
+        'status': 'PASS',
+        'duration': float(case.get('time') or 0),
+    }
+    for prop in case.iter('property'):
+        apply_property(result, prop.get('name'), prop.get('value', ''))
+    for tag in ('failure', 'error'):
+        element = case.find(tag)
+        if element is not None:
+            result['status'] = 'FAIL'
+            result['error'] = element.get('message', '')
+            result['traceback'] = element.text or ''
+            break
+    else:
+        if case.find('skipped') is not None:
+            result['status'] = 'SKIP'
+    return result
+
+
+def iter_junit_results(path: Path) -> Iterator[Dict]:
+    """Results of a JUnit XML file, read incrementally"""
+    parents = []
+    for event, element in ET.iterparse(str(path), events=('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            continue
+        parents.pop()
+        if element.tag == 'testcase':
+            yield junit_case_result(element)
+            # Finished cases are the only thing that would accumulate
+            if parents:
+                parents[-1].remove(element)
+            element.clear()
+
+
+def junit_started_at(path: Path) -> Optional[str]:
+    """Timestamp of the first <testsuite>, read without parsing the rest"""
+    for event, element in ET.iterparse(str(path), events=('start',)):
+        if element.tag == 'testsuite':
+            return element.get('timestamp')
+    return None
+
+
+class _JSONReader:
+    """Decode a JSON document value by value from a file, buffering only what is needed"""
+
+    def __init__(self, f):
+        self.file = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, size: int = READ_SIZE):
+        chunk = self.file.read(size)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Next non-whitespace character, '' at the end of the file"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} of the buffer")
+        self.pos += 1
+
+    def value(self):
+        """The next complete JSON value"""
+        size = READ_SIZE
+        while True:
+            self.peek()
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+                # A number ending at the end of the buffer, or before the cut-off
+                # rest of its fraction or exponent, may be incomplete
+                if self.eof or (end < len(self.buffer) and self.buffer[end] in VALUE_END):
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size *= 2
+
+    def members(self) -> Iterator[str]:
+        """Keys of the top-level object; the caller reads each value"""
+        self.expect('{')
+        while self.peek() not in ('}', ''):
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+        self.expect('}')
+
+
+def pytest_json_result(test: Dict) -> Dict:
+    """Result dict of one entry of a pytest-json report's "tests" list"""
+    nodeid = test['nodeid']
+    package = package_of(nodeid)
+    phases = [test.get(phase) or {} for phase in ('setup', 'call', 'teardown')]
+    result = {
+        'test_id': result_test_id(nodeid),
+        'name': nodeid.split('::')[-1],
+        'module': MODULE_NAMES.get(package, package),
+        'status': PYTEST_OUTCOMES.get(test.get('outcome'), 'FAIL'),
+        'duration': round(sum(phase.get('duration', 0) for phase in phases), 6),
+    }
+    for phase in phases:
+        if phase.get('outcome') == 'failed':
+            result['error'] = (phase.get('crash') or {}).get('message', '')
+            result['traceback'] = phase.get('longrepr', '')
+            break
+    for name, value in test.get('user_properties') or ():
+        apply_property(result, name, value)
+    return result
+
+
+def iter_pytest_json_results(path: Path) -> Iterator[Dict]:
+    """Results of a pytest-json report, decoded one test at a time"""
+    with open(path) as f:
+        reader = _JSONReader(f)
+        for key in reader.members():
+            if key != 'tests':
+                reader.value()
+                continue
+            reader.expect('[')
+            while reader.peek() not in (']', ''):
+                yield pytest_json_result(reader.value())
+                if reader.peek() == ',':
+                    reader.pos += 1
+            reader.expect(']')
+
+
+def pytest_json_created(path: Path) -> Optional[str]:
+    """Run start of a pytest-json report, or None if it is not one"""
+    with open(path) as f:
+        reader = _JSONReader(f)
+        for key in reader.members():
+            if key not in PYTEST_JSON_KEYS or key == 'tests':
+                return None
+            if key == 'created':
+                return datetime.datetime.fromtimestamp(reader.value()).isoformat()
+            reader.value()
+    return None
+
+
+def is_pytest_json(path: Path) -> bool:
+    """True for a pytest-json report, False for a results JSON report"""
+    try:
+        with open(path) as f:
+            for key in _JSONReader(f).members():
+                return key in PYTEST_JSON_KEYS
+    except ValueError:
+        pass
+    return False
+
+
+def read_results(path: Path) -> Tuple[Optional[str], Iterator[Dict]]:
+    """Run start (None if the file does not say) and streamed results of a JUnit XML or pytest-json file"""
+    path = Path(path)
+    if path.suffix == '.xml':
+        return junit_started_at(path), iter_junit_results(path)
+    return pytest_json_created(path), iter_pytest_json_results(path)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Summarise a JUnit XML or pytest-json report')
+    parser.add_argument('path', help='JUnit XML (.xml) or pytest-json (.json) file')
+    args = parser.parse_args(argv)
+
+    from result_table import ResultTable
+
+    started_at, results = read_results(Path(args.path))
+    summary = ResultTable.from_results(results).aggregate()['summary']
+    print(f"Run started: {started_at or 'unknown'}")
+    print(f"Tests: {summary['total']}, Passed: {summary['passed']}, Failed: {summary['failed']}, "
+          f"Skipped: {summary['skipped']}, Pass Rate: {summary['pass_rate']}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
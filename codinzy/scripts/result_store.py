@@ -0,0 +1,357 @@
+"""
+Historical Result Store for Codinzy Tests
+
+Every run used to leave only its own timestamped JSON report. This module
+keeps all runs in one indexed SQLite database so questions across runs
+are answered by index lookups:
+1. `ingest` adds a run (a results JSON report, a results JSONL file, or
+   a pytest JUnit XML / pytest-json file); re-ingesting the same file is a
+   no-op
+2. `trend` shows the duration and status of one test over its last runs
+3. `pass-rates` shows the pass rate per module per day
+
+The parallel and simple runners ingest every run they write, and
+generate_pdf_report.run_report_generation reads the latest run from here.
+
+Usage:
+    python scripts/result_store.py ingest reports/automated/json/automated_results_*.json
+    python scripts/result_store.py trend test_auth::AuthenticationTestCase::test_login_success --runs 200
+    python scripts/result_store.py pass-rates --days 30
+"""
+
+import sys
+import json
+import sqlite3
+import argparse
+import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from merge_results import run_started
+
+TESTING_DIR = Path(__file__).resolve().parent.parent
+REPORTS_DIR = TESTING_DIR / 'reports' / 'automated'
+STORE_PATH = REPORTS_DIR / 'results.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL UNIQUE,
+    started_at TEXT NOT NULL,
+    test_type TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs (started_at);
+
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    test_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    module TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL NOT NULL DEFAULT 0,
+    query_count INTEGER NOT NULL DEFAULT 0,
+    sql_time REAL NOT NULL DEFAULT 0,
+    peak_memory_kb REAL NOT NULL DEFAULT 0,
+    quarantined INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    traceback TEXT,
+    details TEXT,
+    PRIMARY KEY (run_id, test_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_test ON results (test_id, run_id, duration, status);
+CREATE INDEX IF NOT EXISTS results_run_module ON results (run_id, module, status);
+CREATE INDEX IF NOT EXISTS results_status ON results (status, run_id);
+CREATE INDEX IF NOT EXISTS results_run_status ON results (run_id, status, module, test_id);
+
+-- Daily per-module rollup, maintained on ingest
+CREATE TABLE IF NOT EXISTS module_days (
+    day TEXT NOT NULL,
+    module TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    PRIMARY KEY (day, module)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS module_days_module ON module_days (module, day);
+"""
+
+# Result keys with their own column; everything else goes to `details`
+_COLUMNS = ('test_id', 'name', 'module', 'status', 'duration', 'query_count',
+            'sql_time', 'peak_memory_kb', 'quarantined', 'error', 'traceback')
+
+# Rows fetched per query when streaming a run's results
+PAGE_SIZE = 1000
+
+
+def utc_timestamp(value: Optional[str]) -> str:
+    """A run start time as fixed-width UTC ISO text, so it sorts and groups by day as text
+
+    Naive times are local time; unreadable ones become the current time.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return run_started(value, now).astimezone(datetime.timezone.utc).isoformat(timespec='microseconds')
+
+
+class ResultStore:
+    """All ingested runs and their results in one SQLite database"""
+
+    def __init__(self, path: Path = STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def has_run(self, source: str) -> bool:
+        return self.conn.execute('SELECT 1 FROM runs WHERE source = ?', (source,)).fetchone() is not None
+
+    def ingest(self, results: Iterable[Dict], source: str, started_at: str,
+               test_type: str = 'automated', summary: Optional[Dict] = None) -> Optional[int]:
+        """Store one run; returns its run_id, or None if `source` was ingested before"""
+        if self.has_run(source):
+            return None
+        started_at = utc_timestamp(started_at)
+        with self.conn:
+            run_id = self.conn.execute(
+                'INSERT INTO runs (source, started_at, test_type, summary) VALUES (?, ?, ?, ?)',
+                (source, started_at, test_type, json.dumps(summary or {}))
+            ).lastrowid
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self._row(run_id, result) for result in results)
+            )
+            self.conn.execute(
+                """
+                INSERT INTO module_days (day, module, total, passed)
+                SELECT substr(?, 1, 10), module, COUNT(*), SUM(status = 'PASS')
+                FROM results WHERE run_id = ? GROUP BY module
+                ON CONFLICT (day, module) DO UPDATE
+                SET total = total + excluded.total, passed = passed + excluded.passed
+                """,
+                (started_at, run_id)
+            )
+        return run_id
+
+    @staticmethod
+    def _row(run_id: int, result: Dict) -> tuple:
+        details = {key: value for key, value in result.items() if key not in _COLUMNS}
+        return (
+            run_id,
+            result['test_id'],
+            result.get('name', ''),
+            result.get('module', 'Other'),
+            result.get('status', 'PASS'),
+            result.get('duration') or 0.0,
+            result.get('query_count') or 0,
+            result.get('sql_time') or 0.0,
+            result.get('peak_memory_kb') or 0.0,
+            1 if result.get('quarantined') else 0,
+            result.get('error'),
+            result.get('traceback'),
+            json.dumps(details) if details else None,
+        )
+
+    def ingest_report(self, report: Dict, source: str) -> Optional[int]:
+        """Store a generate_test_report() report (with its per-module tests)"""
+        metadata = report.get('report_metadata', {})
+        return self.ingest(
+            (test for module in report.get('test_results', {}).values() for test in module.get('tests', [])),
+            source,
+            started_at=metadata.get('generated_at') or datetime.datetime.now().isoformat(),
+            test_type='manual' if metadata.get('report_id', '').startswith('MAN') else 'automated',
+            summary={
+                'summary': report.get('summary', {}),
+                'by_marker': report.get('by_marker', {}),
+                'coverage': report.get('coverage', {}),
+            },
+        )
+
+    def ingest_file(self, path: Path, summary: Optional[Dict] = None) -> Optional[int]:
+        """Store a results JSON report or results JSONL file, keyed by file name
+
+        pytest JUnit XML and pytest-json reports are accepted too. pytest
+        overwrites them on every run, so they are keyed by name and start time.
+        """
+        from result_ingest import is_pytest_json, read_results
+        path = Path(path)
+        if path.suffix == '.xml' or (path.suffix == '.json' and is_pytest_json(path)):
+            started_at, results = read_results(path)
+            started_at = started_at or datetime.datetime.fromtimestamp(path.stat().st_mtime).isoformat()
+            return self.ingest(results, f'{path.name}@{started_at}', started_at, summary=summary)
+        if self.has_run(path.name):
+            return None
+        if path.suffix == '.jsonl':
+            from result_stream import ResultStream
+            stream = ResultStream(path)
+            header = stream.header or {}
+            started_at = header.get('started_at') or datetime.datetime.fromtimestamp(path.stat().st_mtime).isoformat()
+            return self.ingest(stream, path.name, started_at, header.get('test_type', 'automated'), summary)
+        with open(path) as f:
+            report = json.load(f)
+        if 'results_file' in report.get('report_metadata', {}) and not any(
+                module.get('tests') for module in report.get('test_results', {}).values()):
+            # Streamed run: the results live in the JSONL file
+            results_file = Path(report['report_metadata']['results_file'])
+            if results_file.exists():
+                return self.ingest_file(results_file, {
+                    'summary': report.get('summary', {}), 'by_marker': report.get('by_marker', {})
+                })
+        return self.ingest_report(report, path.name)
+
+    def ingest_directory(self, json_dir: Path = REPORTS_DIR / 'json') -> int:
+        """Ingest every automated_results_*.json not stored yet; returns the count"""
+        count = 0
+        for path in sorted(json_dir.glob('automated_results_*.json')) if json_dir.exists() else []:
+            try:
+                if self.ingest_file(path) is not None:
+                    count += 1
+            except (OSError, ValueError, KeyError):
+                continue
+        return count
+
+    def latest_run(self, test_type: str = 'automated') -> Optional[sqlite3.Row]:
+        return self.conn.execute(
+            'SELECT * FROM runs WHERE test_type = ? ORDER BY started_at DESC, run_id DESC LIMIT 1',
+            (test_type,)
+        ).fetchone()
+
+    def run_results(self, run_id: int, status: Optional[str] = None, module: Optional[str] = None,
+                    quarantined: Optional[bool] = None, has_detail: Optional[str] = None,
+                    page_size: int = PAGE_SIZE) -> Iterator[Dict]:
+        """Result dicts of one run, module by module, read page by page
+
+        `has_detail` keeps results whose details hold that key, such as
+        'repeated_queries'.
+
+        Every page is a separate keyset query, so no more than `page_size`
+        rows are fetched at a time and no cursor stays open between pages.
+        """
+        where, params = self._filters(run_id, status, module, quarantined, has_detail)
+        query = (f"SELECT * FROM results WHERE {where} AND (module, test_id) > (?, ?) "
+                 f"ORDER BY module, test_id LIMIT ?")
+        last = ('', '')
+        while True:
+            rows = self.conn.execute(query, (*params, *last, page_size)).fetchall()
+            for row in rows:
+                result = {key: row[key] for key in _COLUMNS}
+                result['quarantined'] = bool(row['quarantined'])
+                if row['details']:
+                    result.update(json.loads(row['details']))
+                yield result
+            if len(rows) < page_size:
+                return
+            last = (rows[-1]['module'], rows[-1]['test_id'])
+
+    def count_results(self, run_id: int, status: Optional[str] = None, module: Optional[str] = None,
+                      quarantined: Optional[bool] = None, has_detail: Optional[str] = None) -> int:
+        """Number of results of one run matching the run_results filters"""
+        where, params = self._filters(run_id, status, module, quarantined, has_detail)
+        return self.conn.execute(f'SELECT COUNT(*) FROM results WHERE {where}', params).fetchone()[0]
+
+    @staticmethod
+    def _filters(run_id: int, status: Optional[str], module: Optional[str],
+                 quarantined: Optional[bool], has_detail: Optional[str]) -> tuple:
+        """WHERE clause and parameters shared by run_results and count_results"""
+        where, params = ['run_id = ?'], [run_id]
+        if status is not None:
+            where.append('status = ?')
+            params.append(status)
+        if module is not None:
+            where.append('module = ?')
+            params.append(module)
+        if quarantined is not None:
+            where.append('quarantined = ?')
+            params.append(int(quarantined))
+        if has_detail is not None:
+            where.append("json_extract(details, '$.' || ?) IS NOT NULL")
+            params.append(has_detail)
+        return ' AND '.join(where), params
+
+    def module_counts(self, run_id: int) -> List[sqlite3.Row]:
+        """Total, passed, failed, skipped, quarantined and duration per module of one run"""
+        return self.conn.execute(
+            """
+            SELECT module,
+                   COUNT(*) AS total,
+                   SUM(status = 'PASS') AS passed,
+                   SUM(status = 'FAIL' AND NOT quarantined) AS failed,
+                   SUM(status = 'SKIP') AS skipped,
+                   SUM(quarantined) AS quarantined,
+                   SUM(duration) AS duration
+            FROM results WHERE run_id = ? GROUP BY module ORDER BY module
+            """,
+            (run_id,)
+        ).fetchall()
+
+    def duration_trend(self, test_id: str, runs: int = 200) -> List[sqlite3.Row]:
+        """Duration and status of a test over its last `runs` runs, oldest first"""
+        rows = self.conn.execute(
+            """
+            SELECT runs.run_id, runs.started_at, results.duration, results.status
+            FROM results JOIN runs ON runs.run_id = results.run_id
+            WHERE results.test_id = ?
+            ORDER BY runs.started_at DESC, runs.run_id DESC LIMIT ?
+            """,
+            (test_id, runs)
+        ).fetchall()
+        return rows[::-1]
+
+    def pass_rates_by_day(self, days: Optional[int] = None, module: Optional[str] = None) -> List[sqlite3.Row]:
+        """Pass rate per module per UTC day, optionally for the last `days` days"""
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        since = (today - datetime.timedelta(days=days)).isoformat() if days else ''
+        return self.conn.execute(
+            """
+            SELECT day, module, total, passed,
+                   ROUND(100.0 * passed / total, 2) AS pass_rate
+            FROM module_days
+            WHERE day >= ? AND (? IS NULL OR module = ?)
+            ORDER BY day, module
+            """,
+            (since, module, module)
+        ).fetchall()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Query the Codinzy historical result store')
+    parser.add_argument('--db', default=str(STORE_PATH), help='Result store database')
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help='Add results JSON/JSONL, JUnit XML or pytest-json files (default: all saved reports)')
+    ingest.add_argument('files', nargs='*')
+    trend = commands.add_parser('trend', help='Duration trend of one test')
+    trend.add_argument('test_id')
+    trend.add_argument('--runs', type=int, default=200)
+    rates = commands.add_parser('pass-rates', help='Pass rate per module per day')
+    rates.add_argument('--days', type=int, default=None)
+    rates.add_argument('--module', default=None)
+    args = parser.parse_args(argv)
+
+    with ResultStore(Path(args.db)) as store:
+        if args.command == 'ingest':
+            if args.files:
+                count = sum(1 for path in args.files if store.ingest_file(Path(path)) is not None)
+            else:
+                count = store.ingest_directory()
+            print(f"Ingested {count} runs")
+        elif args.command == 'trend':
+            for row in store.duration_trend(args.test_id, args.runs):
+                print(f"{row['started_at'][:19]}  {row['status']:<5} {row['duration']:.3f}s")
+        else:
+            for row in store.pass_rates_by_day(args.days, args.module):
+                print(f"{row['day']}  {row['module']:<20} {row['passed']:>5}/{row['total']:<5} {row['pass_rate']:.1f}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
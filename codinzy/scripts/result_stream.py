@@ -0,0 +1,146 @@
+"""
+Streaming JSONL Result Files for Codinzy Tests
+
+Runners append every result to a JSONL file the moment the test finishes
+instead of holding all results in memory until the end:
+1. The first line is a header record with the test type and start time
+2. Every following line is one result dict
+3. The last line is a footer record with the result count, written when
+   the run ends (status 'complete', or 'interrupted' on an exception)
+
+Every line is flushed as it is written, so a crashed run leaves all
+finished results on disk. A file without a footer, or with a torn last
+line, is read as a partial run. Reports are aggregated from the stream
+with bounded memory (see run_simple_tests.generate_test_report).
+
+Usage:
+    python scripts/result_stream.py reports/automated/jsonl/automated_results_20250101_120000.jsonl
+"""
+
+import os
+import sys
+import json
+import argparse
+import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+RECORD_KEY = '_record'
+
+
+class ResultSink:
+    """JSONL file receiving one line per finished test
+
+    An existing file at `path` is replaced: each file holds exactly one run.
+    """
+
+    def __init__(self, path: Path, test_type: str = 'automated'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self._file = open(self.path, 'w', buffering=1)
+        self._write({
+            RECORD_KEY: 'header',
+            'test_type': test_type,
+            'started_at': datetime.datetime.now().isoformat(),
+        })
+
+    def _write(self, record: Dict):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def append(self, result: Dict):
+        """Write one result; same interface as list.append"""
+        self._write(result)
+        self.count += 1
+
+    def close(self, status: str = 'complete'):
+        if self._file.closed:
+            return
+        self._write({
+            RECORD_KEY: 'footer',
+            'status': status,
+            'count': self.count,
+            'finished_at': datetime.datetime.now().isoformat(),
+        })
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close('complete' if exc_type is None else 'interrupted')
+
+
+class ResultStream:
+    """Iterate the results of a JSONL file; header and footer are kept aside"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.header: Optional[Dict] = None
+        self.footer: Optional[Dict] = None
+        with open(self.path) as f:
+            try:
+                first = json.loads(f.readline() or '{}')
+            except ValueError:
+                first = {}
+        if first.get(RECORD_KEY) == 'header':
+            self.header = first
+
+    def __iter__(self) -> Iterator[Dict]:
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn line from a crash mid-write
+                    continue
+                kind = record.get(RECORD_KEY)
+                if kind == 'header':
+                    self.header = record
+                elif kind == 'footer':
+                    self.footer = record
+                else:
+                    yield record
+
+    @property
+    def complete(self) -> bool:
+        """True once iterated if the run wrote a 'complete' footer"""
+        return self.footer is not None and self.footer.get('status') == 'complete'
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Build a report from a results JSONL file')
+    parser.add_argument('jsonl', help='Results JSONL file, complete or partial')
+    parser.add_argument('--output', help='Path of the JSON report (default: next to the JSONL file)')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Run the command under -X importtime and print the import costs')
+    args = parser.parse_args(argv)
+    if args.profile_startup:
+        from startup_profile import profile_startup
+        return profile_startup(__file__, sys.argv[1:] if argv is None else argv)
+
+    from run_simple_tests import generate_test_report, create_pdf_report
+
+    stream = ResultStream(Path(args.jsonl))
+    test_type = (stream.header or {}).get('test_type', 'automated')
+    report = generate_test_report(stream, test_type, keep_tests=False)
+    report['report_metadata']['partial'] = not stream.complete
+    report['report_metadata']['results_file'] = str(Path(args.jsonl).resolve())
+    if not stream.complete:
+        print("Run did not finish; reporting the results written so far")
+
+    json_path = Path(args.output) if args.output else Path(args.jsonl).with_suffix('.json')
+    with open(json_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Tests: {report['summary']['total_tests']}, Failed: {report['summary']['failed']}")
+    print(f"JSON report saved: {json_path}")
+    print(f"PDF report saved: {create_pdf_report(report, test_type)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,452 @@
+"""
+Columnar Result Table and Aggregation Engine for Codinzy Reports
+
+Reports used to recount the same result lists several times (passed,
+failed, failed_tests, per module, then again in every PDF section). This
+module stores results column by column in typed arrays, with statuses,
+modules and markers interned as small integer codes, and computes every
+statistic the reports need in a single pass over those columns:
+- summary: totals per status, pass rate, duration, queries, peak memory
+- by_module and by_marker: the same counters per module / pytest marker
+- by_status: count and total duration per status
+
+run_simple_tests.generate_test_report stores the result in the JSON
+report and generate_pdf_report reads it from there instead of recounting.
+
+ResultCounters computes the same statistics while results stream past
+without storing them, for reports that do not list every test.
+
+TestResultTable extends the table with every TestResult field: float32
+durations, and test ids, names, messages and tracebacks in UTF-8 string
+pools. It holds the tests of a TestSuite in a fraction of the
+memory of TestResult objects and iterates as TestResult-like views.
+"""
+
+import copy
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional
+
+STATUSES = ('PASS', 'FAIL', 'SKIP', 'BLOCK')
+
+# Bits of the flags column
+CACHED = 1
+QUARANTINED = 2
+
+MAX_MARKERS = 32
+
+
+def _group_stats() -> Dict:
+    return {
+        'total': 0, 'passed': 0, 'failed': 0, 'skipped': 0, 'blocked': 0,
+        'quarantined': 0, 'cached': 0, 'pass_rate': 0,
+        'duration': 0.0, 'queries': 0, 'max_peak_memory_kb': 0,
+    }
+
+
+_STATUS_FIELDS = {'PASS': 'passed', 'FAIL': 'failed', 'SKIP': 'skipped', 'BLOCK': 'blocked'}
+
+
+def report_summary(summary: Dict) -> Dict:
+    """The engine's summary under the key names of the JSON report"""
+    return {
+        'total_tests': summary['total'],
+        'passed': summary['passed'],
+        'failed': summary['failed'],
+        'skipped': summary['skipped'],
+        'quarantined': summary['quarantined'],
+        'pass_rate': summary['pass_rate'],
+        'total_duration': summary['duration'],
+        'total_queries': summary['queries'],
+        'max_peak_memory_kb': summary['max_peak_memory_kb'],
+        'cached': summary['cached'],
+    }
+
+
+class ResultTable:
+    """Results stored as parallel typed arrays, one entry per test"""
+
+    def __init__(self):
+        self.statuses: List[str] = list(STATUSES)
+        self.modules: List[str] = []
+        self.markers: List[str] = []
+        self._status_codes = {status: code for code, status in enumerate(self.statuses)}
+        self._module_codes = {}
+        self._marker_codes = {}
+
+        self.status = array('B')
+        self.module = array('I')
+        self.marker_bits = array('L')
+        self.flags = array('B')
+        self.duration = array('d')
+        self.queries = array('L')
+        self.peak_memory_kb = array('d')
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    @staticmethod
+    def _intern(value: str, values: List[str], codes: Dict[str, int]) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def append(self, result: Dict):
+        """Add one result dict (run_simple_tests / results JSON shape)"""
+        self.status.append(self._intern(result.get('status', 'PASS'), self.statuses, self._status_codes))
+        self.module.append(self._intern(result.get('module', 'Other'), self.modules, self._module_codes))
+        bits = 0
+        for marker in result.get('markers') or ():
+            code = self._intern(marker, self.markers, self._marker_codes)
+            if code < MAX_MARKERS:
+                bits |= 1 << code
+        self.marker_bits.append(bits)
+        self.flags.append(
+            (CACHED if result.get('cached') else 0) | (QUARANTINED if result.get('quarantined') else 0)
+        )
+        self.duration.append(result.get('duration') or 0.0)
+        self.queries.append(result.get('query_count') or 0)
+        self.peak_memory_kb.append(result.get('peak_memory_kb') or 0.0)
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict]) -> 'ResultTable':
+        table = cls()
+        for result in results:
+            table.append(result)
+        return table
+
+    @classmethod
+    def from_test_results(cls, tests: Iterable) -> 'ResultTable':
+        """Build from generate_pdf_report.TestResult objects"""
+        return cls.from_results(
+            {
+                'status': test.status, 'module': test.module, 'duration': test.duration,
+                'query_count': test.query_count, 'quarantined': test.quarantined,
+            }
+            for test in tests
+        )
+
+    def aggregate(self) -> Dict:
+        """Summary, per-module, per-marker and per-status statistics in one pass"""
+        summary = _group_stats()
+        by_module = [_group_stats() for _ in self.modules]
+        by_marker = [_group_stats() for _ in self.markers[:MAX_MARKERS]]
+        status_count = [0] * len(self.statuses)
+        status_duration = [0.0] * len(self.statuses)
+        status_field = [_STATUS_FIELDS.get(status) for status in self.statuses]
+
+        columns = zip(self.status, self.module, self.marker_bits, self.flags,
+                      self.duration, self.queries, self.peak_memory_kb)
+        for status, module, bits, flags, duration, queries, memory in columns:
+            status_count[status] += 1
+            status_duration[status] += duration
+            # Quarantined failures are reported apart from real failures
+            field = 'quarantined' if flags & QUARANTINED else status_field[status]
+            groups = [summary, by_module[module]]
+            while bits:
+                low = bits & -bits
+                groups.append(by_marker[low.bit_length() - 1])
+                bits ^= low
+            for group in groups:
+                group['total'] += 1
+                if field:
+                    group[field] += 1
+                if flags & CACHED:
+                    group['cached'] += 1
+                group['duration'] += duration
+                group['queries'] += queries
+                if memory > group['max_peak_memory_kb']:
+                    group['max_peak_memory_kb'] = memory
+
+        return _finish_stats(summary, dict(zip(self.modules, by_module)), dict(zip(self.markers, by_marker)),
+                             zip(self.statuses, status_count, status_duration))
+
+
+def _finish_stats(summary: Dict, by_module: Dict, by_marker: Dict, by_status: Iterable) -> Dict:
+    """Pass rates and rounding for the counters of aggregate()"""
+    for group in [summary, *by_module.values(), *by_marker.values()]:
+        group['pass_rate'] = round(group['passed'] / group['total'] * 100, 2) if group['total'] else 0
+        group['duration'] = round(group['duration'], 6)
+    return {
+        'summary': summary,
+        'by_module': by_module,
+        'by_marker': by_marker,
+        'by_status': {
+            status: {'count': count, 'duration': round(duration, 6)}
+            for status, count, duration in by_status
+            if count
+        },
+    }
+
+
+class ResultCounters:
+    """ResultTable's statistics counted as results arrive, keeping no rows
+
+    Memory grows with the number of modules and markers, not of results.
+    """
+
+    def __init__(self):
+        self.summary = _group_stats()
+        self.by_module: Dict[str, Dict] = {}
+        self.by_marker: Dict[str, Dict] = {}
+        self.status_count: Dict[str, int] = dict.fromkeys(STATUSES, 0)
+        self.status_duration: Dict[str, float] = dict.fromkeys(STATUSES, 0.0)
+
+    def __len__(self) -> int:
+        return self.summary['total']
+
+    def append(self, result: Dict):
+        """Count one result dict (run_simple_tests / results JSON shape)"""
+        status = result.get('status', 'PASS')
+        duration = result.get('duration') or 0.0
+        queries = result.get('query_count') or 0
+        memory = result.get('peak_memory_kb') or 0.0
+        cached = result.get('cached')
+        self.status_count[status] = self.status_count.get(status, 0) + 1
+        self.status_duration[status] = self.status_duration.get(status, 0.0) + duration
+        # Quarantined failures are reported apart from real failures
+        field = 'quarantined' if result.get('quarantined') else _STATUS_FIELDS.get(status)
+
+        module = result.get('module', 'Other')
+        if module not in self.by_module:
+            self.by_module[module] = _group_stats()
+        markers = set()
+        for marker in result.get('markers') or ():
+            # Same cap as ResultTable's marker bits
+            if marker not in self.by_marker and len(self.by_marker) < MAX_MARKERS:
+                self.by_marker[marker] = _group_stats()
+            if marker in self.by_marker:
+                markers.add(marker)
+        groups = [self.summary, self.by_module[module], *(self.by_marker[marker] for marker in markers)]
+
+        for group in groups:
+            group['total'] += 1
+            if field:
+                group[field] += 1
+            if cached:
+                group['cached'] += 1
+            group['duration'] += duration
+            group['queries'] += queries
+            if memory > group['max_peak_memory_kb']:
+                group['max_peak_memory_kb'] = memory
+
+    def aggregate(self) -> Dict:
+        """Summary, per-module, per-marker and per-status statistics"""
+        return _finish_stats(
+            copy.deepcopy(self.summary), copy.deepcopy(self.by_module), copy.deepcopy(self.by_marker),
+            ((status, count, self.status_duration[status]) for status, count in self.status_count.items())
+        )
+
+
+class StringPool:
+    """Strings stored back to back in one UTF-8 buffer, addressed by index
+
+    Index 0 stands for None. A compressed pool deflates every string on its
+    own, primed with the first string added as a preset dictionary: texts
+    such as tracebacks share most of their lines, so each one shrinks to
+    the part that differs.
+    """
+
+    def __init__(self, compressed: bool = False):
+        self.compressed = compressed
+        self.data = bytearray()
+        # 32-bit offsets until the buffer outgrows them
+        self.offsets = array('I', [0, 0])
+        self._zdict = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        encoded = value.encode()
+        if self.compressed:
+            if self._zdict is None:
+                self._zdict = encoded[-32768:]
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15, 1, zdict=self._zdict)
+            encoded = compressor.compress(encoded) + compressor.flush()
+        self.data += encoded
+        if len(self.data) > 0xFFFFFFFF and self.offsets.typecode == 'I':
+            self.offsets = array('Q', self.offsets)
+        self.offsets.append(len(self.data))
+        return len(self.offsets) - 2
+
+    def get(self, index: int) -> Optional[str]:
+        if index == 0:
+            return None
+        encoded = bytes(self.data[self.offsets[index]:self.offsets[index + 1]])
+        if self.compressed:
+            decompressor = zlib.decompressobj(wbits=-15, zdict=self._zdict)
+            encoded = decompressor.decompress(encoded) + decompressor.flush()
+        return encoded.decode()
+
+
+class TestResultView:
+    """One row of a TestResultTable with the attributes of generate_pdf_report.TestResult"""
+
+    # Not a test class, whatever pytest's python_classes = Test* says
+    __test__ = False
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table: 'TestResultTable', row: int):
+        self._table = table
+        self._row = row
+
+    @property
+    def test_id(self) -> str:
+        ref = self._table.test_ref[self._row]
+        if ref & 1:
+            return self._table.strings.get(ref >> 1)
+        return self._table.prefixes[ref >> 1] + self.test_name
+
+    @property
+    def test_name(self) -> str:
+        return self._table.names.get(self._row + 1)
+
+    @property
+    def module(self) -> str:
+        return self._table.modules[self._table.module[self._row]]
+
+    @property
+    def status(self) -> str:
+        return self._table.statuses[self._table.status[self._row]]
+
+    @property
+    def duration(self) -> float:
+        return self._table.duration[self._row]
+
+    @property
+    def error_message(self) -> Optional[str]:
+        failure = self._table.failure(self._row)
+        return None if failure is None else self._table.messages.get(self._table.error_message[failure])
+
+    @property
+    def error_traceback(self) -> Optional[str]:
+        failure = self._table.failure(self._row)
+        return None if failure is None else self._table.tracebacks.get(self._table.error_traceback[failure])
+
+    @property
+    def query_count(self) -> int:
+        return self._table.queries[self._row]
+
+    @property
+    def sql_time(self) -> float:
+        return self._table.sql_time[self._row]
+
+    @property
+    def repeated_queries(self) -> Optional[List[Dict]]:
+        return self._table.repeated_queries.get(self._row)
+
+    @property
+    def quarantined(self) -> bool:
+        return bool(self._table.flags[self._row] & QUARANTINED)
+
+    @property
+    def flake_rate(self) -> float:
+        return self._table.flake_rates.get(self._row, 0.0)
+
+    def __repr__(self) -> str:
+        return f"TestResultView({self.test_id!r}, {self.status!r})"
+
+
+class TestResultTable(ResultTable):
+    """Columnar replacement for a list of TestResult objects
+
+    - statuses and modules are interned codes
+    - test ids are an interned 'package::Class::' prefix plus the name
+    - names are kept in a StringPool (row n at index n + 1), error
+      messages and tracebacks in compressed ones
+    - messages and tracebacks only take space in rows that have them
+    - durations, SQL times and memory peaks are float32; module codes and
+      query counts are 8 and 16 bits wide until a value needs more
+    - the rare repeated_queries lists and flake rates are kept by row
+
+    Iterating yields TestResultViews.
+    """
+
+    __test__ = False
+
+    def __init__(self):
+        super().__init__()
+        self.module = array('B')
+        self.marker_bits = array('I')
+        self.duration = array('f')
+        self.queries = array('H')
+        self.peak_memory_kb = array('f')
+
+        self.prefixes: List[str] = []
+        self._prefix_codes = {}
+        self.names = StringPool()
+        self.strings = StringPool()
+        self.messages = StringPool(compressed=True)
+        self.tracebacks = StringPool(compressed=True)
+
+        # prefix code << 1, or string pool index << 1 | 1 when the id is not prefix + name
+        self.test_ref = array('I')
+        self.sql_time = array('f')
+        # Rows with a message or traceback, ascending, and their pool indexes
+        self.failure_rows = array('I')
+        self.error_message = array('I')
+        self.error_traceback = array('I')
+        self.repeated_queries: Dict[int, List[Dict]] = {}
+        self.flake_rates: Dict[int, float] = {}
+
+    def append(self, result: Dict):
+        """Add one result dict (run_simple_tests / results JSON shape)"""
+        row = len(self)
+        if result.get('repeated_queries'):
+            self.repeated_queries[row] = result['repeated_queries']
+        if result.get('flake_rate'):
+            self.flake_rates[row] = result['flake_rate']
+        if self.module.typecode == 'B' and len(self.modules) >= 0xFF:
+            self.module = array('H', self.module)
+        if self.queries.typecode == 'H' and (result.get('query_count') or 0) > 0xFFFF:
+            self.queries = array('I', self.queries)
+        super().append(result)
+
+        test_id, name = result.get('test_id', ''), result.get('name') or ''
+        if name and test_id.endswith(name):
+            self.test_ref.append(self._intern(test_id[:-len(name)], self.prefixes, self._prefix_codes) << 1)
+        else:
+            self.test_ref.append(self.strings.add(test_id) << 1 | 1)
+        self.names.add(name)
+        self.sql_time.append(result.get('sql_time') or 0.0)
+
+        error, traceback = result.get('error'), result.get('traceback')
+        if error is not None or traceback is not None:
+            self.failure_rows.append(row)
+            self.error_message.append(self.messages.add(error))
+            self.error_traceback.append(self.tracebacks.add(traceback))
+
+    def failure(self, row: int) -> Optional[int]:
+        """Index of `row` in the message and traceback columns, or None"""
+        index = bisect_left(self.failure_rows, row)
+        if index < len(self.failure_rows) and self.failure_rows[index] == row:
+            return index
+        return None
+
+    def append_test(self, test):
+        """Add one TestResult (or TestResultView)"""
+        self.append({
+            'test_id': test.test_id, 'name': test.test_name, 'module': test.module,
+            'status': test.status, 'duration': test.duration,
+            'error': test.error_message, 'traceback': test.error_traceback,
+            'query_count': test.query_count, 'sql_time': test.sql_time,
+            'repeated_queries': test.repeated_queries,
+            'quarantined': test.quarantined, 'flake_rate': test.flake_rate,
+        })
+
+    def __getitem__(self, row: int) -> TestResultView:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return TestResultView(self, row)
+
+    def __iter__(self) -> Iterator[TestResultView]:
+        for row in range(len(self)):
+            yield TestResultView(self, row)
@@ -0,0 +1,337 @@
+"""
+Parallel Test Runner for Codinzy Backend Tests
+
+This script shards the backend test packages across a pool of worker
+processes and merges their results into a single report:
+1. Discover test ids in automated/backend/test_* without importing Django
+2. Bin-pack the test classes into one shard per worker, weighted by the
+   durations recorded in earlier automated_results_*.json reports
+3. Run every shard in its own pytest process (own Django bootstrap and
+   own ':memory:' SQLite database from test_settings.DATABASES)
+4. Merge the per-shard JUnit XML files into one automated results JSON
+   and record every outcome in the rolling history (test_history.py) that
+   orders each shard failed-first, fastest-first
+5. Rerun failures in parallel and quarantine flaky tests (flaky_detector.py)
+
+Tests whose content hash is unchanged since their last run are reported
+from the result cache (see result_cache.py) unless --force is given.
+
+Usage:
+    python scripts/run_parallel_tests.py --workers 8
+    python scripts/run_parallel_tests.py test_auth test_users -- -m smoke
+    python scripts/run_parallel_tests.py --plan
+"""
+
+import os
+import sys
+import ast
+import json
+import argparse
+import datetime
+import tempfile
+import statistics
+import collections
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TESTING_DIR = Path(__file__).resolve().parent.parent
+BACKEND_TESTS_DIR = TESTING_DIR / 'automated' / 'backend'
+REPORTS_DIR = TESTING_DIR / 'reports' / 'automated'
+
+# Estimate (seconds) for tests with no recorded duration in any package
+DEFAULT_TEST_DURATION = 0.5
+HISTORY_FILES = 20
+# Lines of a crashed shard's pytest output printed with its failure
+LOG_TAIL_LINES = 40
+
+sys.path.insert(0, str(TESTING_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from result_ingest import MODULE_NAMES, iter_junit_results, package_of, result_test_id
+from run_simple_tests import generate_test_report
+from test_history import OutcomeHistory
+
+
+def discover_test_ids(packages: Optional[List[str]] = None) -> List[str]:
+    """Collect pytest node ids by parsing the test packages (no imports)"""
+    test_ids = []
+    for package_dir in sorted(BACKEND_TESTS_DIR.glob('test_*')):
+        if packages and package_dir.name not in packages:
+            continue
+        source_file = package_dir / '__init__.py'
+        if not source_file.exists():
+            continue
+
+        tree = ast.parse(source_file.read_text(), filename=str(source_file))
+        rel_path = source_file.relative_to(TESTING_DIR).as_posix()
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and (
+                node.name.startswith('Test') or node.name.endswith('TestCase')
+            ):
+                for item in node.body:
+                    if isinstance(item, ast.FunctionDef) and item.name.startswith('test_'):
+                        test_ids.append(f'{rel_path}::{node.name}::{item.name}')
+            elif isinstance(node, ast.FunctionDef) and node.name.startswith('test_'):
+                test_ids.append(f'{rel_path}::{node.name}')
+    return test_ids
+
+
+def load_duration_history(json_dir: Path = REPORTS_DIR / 'json',
+                          max_files: int = HISTORY_FILES) -> Dict[str, float]:
+    """Read per-test durations from the most recent saved results files"""
+    samples = {}
+    files = sorted(json_dir.glob('automated_results_*.json'))[-max_files:] if json_dir.exists() else []
+    for path in files:
+        try:
+            with open(path) as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for module in report.get('test_results', {}).values():
+            for test in module.get('tests', []):
+                if test.get('status') in ('PASS', 'FAIL') and test.get('duration') is not None:
+                    samples.setdefault(test['test_id'], []).append(float(test['duration']))
+    return {test_id: statistics.median(values) for test_id, values in samples.items()}
+
+
+def estimate_durations(test_ids: List[str], history: Dict[str, float]) -> Dict[str, float]:
+    """Expected duration per node id; unknown tests get their package median"""
+    by_package = {}
+    for test_id, duration in history.items():
+        by_package.setdefault(test_id.split('::', 1)[0], []).append(duration)
+    overall = statistics.median(history.values()) if history else DEFAULT_TEST_DURATION
+
+    durations = {}
+    for node_id in test_ids:
+        known = history.get(result_test_id(node_id))
+        if known is None:
+            package_durations = by_package.get(package_of(node_id))
+            known = statistics.median(package_durations) if package_durations else overall
+        durations[node_id] = known
+    return durations
+
+
+def shard_tests(test_ids: List[str], workers: int,
+                durations: Optional[Dict[str, float]] = None) -> List[List[str]]:
+    """Bin-pack test ids into at most `workers` shards of similar total duration
+
+    A test class is never split: its setUpClass / setUpTestData would run in
+    every shard holding one of its tests. Module-level test functions are
+    packed one by one.
+    """
+    durations = durations or {}
+    groups = {}
+    for node_id in test_ids:
+        path, _, name = node_id.partition('::')
+        key = f"{path}::{name.split('::')[0]}" if '::' in name else node_id
+        groups.setdefault(key, []).append(node_id)
+    weights = {
+        key: sum(durations.get(node_id, DEFAULT_TEST_DURATION) for node_id in group)
+        for key, group in groups.items()
+    }
+
+    shards = [[] for _ in range(max(1, min(workers, len(groups))))]
+    loads = [0.0] * len(shards)
+    # Longest-processing-time first: heaviest class goes to the lightest shard
+    for key in sorted(groups, key=lambda k: (-weights[k], k)):
+        index = loads.index(min(loads))
+        shards[index].extend(groups[key])
+        loads[index] += weights[key]
+    return [sorted(shard) for shard in shards if shard]
+
+
+def print_shard_plan(shards: List[List[str]], durations: Dict[str, float], history: Dict[str, float]):
+    """Print the estimated load of every shard so the split can be audited"""
+    print("-" * 50)
+    print(f"{'Shard':<8}{'Tests':>8}{'Known':>8}{'Packages':>10}{'Est. (s)':>12}")
+    print("-" * 50)
+    for index, shard in enumerate(shards):
+        known = sum(1 for node_id in shard if result_test_id(node_id) in history)
+        packages = len({package_of(node_id) for node_id in shard})
+        estimate = sum(durations.get(node_id, DEFAULT_TEST_DURATION) for node_id in shard)
+        print(f"{index:<8}{len(shard):>8}{known:>8}{packages:>10}{estimate:>12.2f}")
+    print("-" * 50)
+
+
+def run_shard(index: int, test_ids: List[str], output_dir: Path, pytest_args: List[str]) -> Path:
+    """Run one shard in a separate pytest process and return its JUnit XML path
+
+    The process output goes to shard_NNN.log next to the XML file.
+    """
+    junit_path = output_dir / f'shard_{index:03d}.xml'
+    args_file = output_dir / f'shard_{index:03d}.args'
+    args_file.write_text('\n'.join(test_ids))
+
+    env = dict(os.environ)
+    env['CODINZY_TEST_WORKER'] = str(index)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'test_settings')
+
+    command = [
+        sys.executable, '-m', 'pytest',
+        '-p', 'no:cacheprovider',
+        '-q',
+        f'--junit-xml={junit_path}',
+        f'@{args_file}',
+    ] + pytest_args
+    with open(junit_path.with_suffix('.log'), 'wb') as log:
+        subprocess.run(command, cwd=str(TESTING_DIR), env=env,
+                       stdout=log, stderr=subprocess.STDOUT)
+    return junit_path
+
+
+def log_tail(log_path: Path, lines: int = LOG_TAIL_LINES) -> List[str]:
+    """Last lines of a shard's output"""
+    if not log_path.exists():
+        return []
+    with open(log_path, errors='replace') as f:
+        return [line.rstrip('\n') for line in collections.deque(f, maxlen=lines)]
+
+
+def parse_junit_results(junit_path: Path) -> List[Dict]:
+    """Convert a pytest JUnit XML file into run_simple_tests result dicts"""
+    if not junit_path.exists():
+        return []
+    return list(iter_junit_results(junit_path))
+
+
+def run_parallel(shards: List[List[str]], pytest_args: List[str],
+                 max_workers: Optional[int] = None) -> List[Dict]:
+    """Run the shards concurrently (all at once by default) and return the merged results"""
+    print(f"Running {sum(len(s) for s in shards)} tests in {len(shards)} shards...")
+
+    with tempfile.TemporaryDirectory(prefix='codinzy_shards_') as tmp:
+        output_dir = Path(tmp)
+        # Each shard is its own pytest process; the threads only wait on them
+        with ThreadPoolExecutor(max_workers=min(max_workers or len(shards), len(shards))) as pool:
+            futures = [
+                pool.submit(run_shard, index, shard, output_dir, pytest_args)
+                for index, shard in enumerate(shards)
+            ]
+            junit_paths = [future.result() for future in futures]
+
+        results = []
+        for index, (shard, junit_path) in enumerate(zip(shards, junit_paths)):
+            if junit_path.exists():
+                results.extend(parse_junit_results(junit_path))
+            else:
+                # The log goes away with the temporary directory; show why it crashed now
+                print(f"Shard {index} exited without producing results. Last output:")
+                for line in log_tail(junit_path.with_suffix('.log')):
+                    print(f"  {line}")
+                results.extend(crashed_shard_results(shard))
+    return results
+
+
+def crashed_shard_results(test_ids: List[str]) -> List[Dict]:
+    """Report every test of a shard whose pytest process produced no XML as failed"""
+    results = []
+    for node_id in test_ids:
+        package = package_of(node_id)
+        results.append({
+            'test_id': result_test_id(node_id),
+            'name': node_id.rsplit('::', 1)[-1],
+            'module': MODULE_NAMES.get(package, package),
+            'status': 'FAIL',
+            'duration': 0.0,
+            'error': 'Shard worker exited without producing results',
+            'infrastructure_error': True,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run Codinzy backend tests in parallel')
+    parser.add_argument('packages', nargs='*', help='Test packages to run (default: all)')
+    parser.add_argument('--workers', '-n', type=int, default=os.cpu_count() or 1,
+                        help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--output', help='Path of the merged JSON report')
+    parser.add_argument('--history-dir', default=str(REPORTS_DIR / 'json'),
+                        help='Directory of earlier automated_results_*.json files')
+    parser.add_argument('--plan', action='store_true',
+                        help='Print the shard plan and exit without running tests')
+    parser.add_argument('--tests', nargs='+', default=None,
+                        help='Explicit pytest node ids to run instead of discovering them')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-execute every test instead of reusing cached results')
+    parser.add_argument('--reruns', type=int, default=None,
+                        help='Rerun each failure this many times to detect flaky tests (default: 3)')
+    argv = list(sys.argv[1:] if argv is None else argv)
+    pytest_args = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, pytest_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    test_ids = args.tests or discover_test_ids(args.packages)
+    if not test_ids:
+        print("No tests found.")
+        return 1
+
+    # Extra pytest options can change what runs, so they bypass the cache
+    cache, keys, cached_results = None, {}, []
+    if not pytest_args:
+        from result_cache import ResultCache, content_keys
+        cache = ResultCache()
+        keys = content_keys(test_ids)
+        if not args.force:
+            pending = []
+            for node_id in test_ids:
+                cached = cache.lookup(node_id, keys[node_id])
+                if cached is None:
+                    pending.append(node_id)
+                else:
+                    cached_results.append(cached)
+            test_ids = pending
+            print(f"{len(cached_results)} unchanged tests reported from cache")
+
+    history = load_duration_history(Path(args.history_dir))
+    durations = estimate_durations(test_ids, history)
+    shards = shard_tests(test_ids, args.workers, durations)
+    print_shard_plan(shards, durations, history)
+    if args.plan:
+        return 0
+
+    results = run_parallel(shards, pytest_args) if shards else []
+
+    from flaky_detector import DEFAULT_RERUNS, QuarantineStore, detect_flaky
+    quarantine = QuarantineStore()
+    reruns = DEFAULT_RERUNS if args.reruns is None else args.reruns
+    classified = detect_flaky(results, test_ids, reruns, pytest_args, args.workers, quarantine)
+    quarantine.save()
+    for label in ('flaky', 'deterministic', 'released'):
+        if classified[label]:
+            print(f"{label.capitalize()}: {', '.join(classified[label])}")
+
+    if cache is not None:
+        cache.update(results, keys)
+        cache.save()
+    outcomes = OutcomeHistory()
+    for result in results:
+        if not result.get('infrastructure_error'):
+            outcomes.record(result['test_id'], result['status'], result.get('duration', 0))
+    outcomes.save()
+    report = generate_test_report(cached_results + results, 'automated')
+
+    print(f"Tests completed: {report['summary']['total_tests']} ({report['summary']['cached']} cached)")
+    print(f"Passed: {report['summary']['passed']}, Failed: {report['summary']['failed']}, "
+          f"Quarantined: {report['summary']['quarantined']}")
+
+    json_path = Path(args.output) if args.output else (
+        REPORTS_DIR / 'json' /
+        f'automated_results_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    )
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(json_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"JSON report saved: {json_path}")
+
+    from result_store import ResultStore
+    with ResultStore() as store:
+        store.ingest_report(report, json_path.name)
+    return 0 if report['summary']['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,34 +1,98 @@
 """
 Simple test runner script that simulates test execution and generates reports.
 This avoids Django configuration issues.
+
+Django is only set up when tests run; `--report` regenerates the text
+report from an existing results file without loading it.
+
+Usage:
+    python scripts/run_simple_tests.py
+    python scripts/run_simple_tests.py --report reports/automated/json/automated_results_20250101_120000.json
 """
 
 import os
 import sys
 import json
+import argparse
+import time
+import heapq
 import datetime
+import tracemalloc
 from pathlib import Path
 
-# Add paths
-sys.path.insert(0, '/root/codinzy/backend')
-sys.path.insert(0, '/root/codinzy/testing')
+# Failed, quarantined and hotspot results listed in a report built with keep_tests=False
+MAX_LISTED_RESULTS = 1000
 
-# Set up Django
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'codinzy.settings')
 
-import django
-django.setup()
+def setup_django():
+    """Configure Django; only the model tests need it, report helpers do not"""
+    sys.path.insert(0, '/root/codinzy/backend')
+    sys.path.insert(0, '/root/codinzy/testing')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'codinzy.settings')
+    
+    import django
+    django.setup()
 
-from django.contrib.auth.models import User
-from api.models import Student, Teacher, Course, Lesson, ScheduledClass, Payment, Lead
 
-def run_model_tests():
-    """Run simple model validation tests"""
-    results = []
-    
+class BlockMetrics:
+    """Duration, peak traced memory and SQL query count of one test block"""
+
+    query_count = 0
+
+    def __init__(self):
+        tracemalloc.reset_peak()
+        self._memory_start = tracemalloc.get_traced_memory()[0]
+        self._queries_start = BlockMetrics.query_count
+        self._start = time.perf_counter()
+        self._metrics = None
+
+    @staticmethod
+    def count_query(execute, sql, params, many, context):
+        """connection.execute_wrappers hook counting every executed query"""
+        BlockMetrics.query_count += 1
+        return execute(sql, params, many, context)
+
+    def finish(self):
+        """Stop measuring (on first call) and return the result fields"""
+        if self._metrics is None:
+            duration = time.perf_counter() - self._start
+            peak_memory = tracemalloc.get_traced_memory()[1] - self._memory_start
+            self._metrics = {
+                'duration': round(duration, 6),
+                'peak_memory_kb': round(max(peak_memory, 0) / 1024, 1),
+                'query_count': BlockMetrics.query_count - self._queries_start,
+            }
+        return self._metrics
+
+
+def run_model_tests(results=None):
+    """Run simple model validation tests
+
+    Results are appended to `results` as each test finishes; pass a
+    result_stream.ResultSink to stream them to disk instead of a list.
+    """
+    setup_django()
+
+    from django.db import connection
+
+    tracemalloc.start()
+    connection.execute_wrappers.append(BlockMetrics.count_query)
+    try:
+        return _run_model_tests([] if results is None else results)
+    finally:
+        connection.execute_wrappers.remove(BlockMetrics.count_query)
+        tracemalloc.stop()
+
+
+def _run_model_tests(results):
+    """Model test blocks; each result carries the metrics of its block"""
+    from django.contrib.auth.models import User
+    from api.models import Student, Teacher, Course, Lesson, ScheduledClass, Payment, Lead
+
     print("Running model tests...")
     
     # Test 1: User Creation
+    metrics = BlockMetrics()
     try:
         user = User.objects.create_user(
             username='test_user_001',
@@ -42,7 +106,7 @@ def run_model_tests():
             'name': 'User creation',
             'module': 'User',
             'status': 'PASS',
-            'duration': 0.1
+            **metrics.finish()
         })
         user.delete()
     except Exception as e:
@@ -56,10 +120,11 @@ def run_model_tests():
             'name': 'User creation',
             'module': 'User',
             'status': 'PASS',  # Consider PASS if user exists
-            'duration': 0.1
+            **metrics.finish()
         })
     
     # Test 2: User Type Methods
+    metrics = BlockMetrics()
     try:
         user = User.objects.create_user(
             username='test_teacher_001',
@@ -73,7 +138,7 @@ def run_model_tests():
                 'name': 'User type methods',
                 'module': 'User',
                 'status': 'PASS',
-                'duration': 0.05
+                **metrics.finish()
             })
         else:
             results.append({
@@ -81,7 +146,7 @@ def run_model_tests():
                 'name': 'User type methods',
                 'module': 'User',
                 'status': 'FAIL',
-                'duration': 0.05,
+                **metrics.finish(),
                 'error': 'User type methods returned incorrect values'
             })
         user.delete()
@@ -91,11 +156,12 @@ def run_model_tests():
             'name': 'User type methods',
             'module': 'User',
             'status': 'FAIL',
-            'duration': 0.05,
+            **metrics.finish(),
             'error': str(e)[:100]
         })
     
     # Test 3: Referral Code Generation
+    metrics = BlockMetrics()
     try:
         user = User.objects.create_user(
             username='test_ref_001',
@@ -108,7 +174,7 @@ def run_model_tests():
                 'name': 'Referral code generation',
                 'module': 'User',
                 'status': 'PASS',
-                'duration': 0.05
+                **metrics.finish()
             })
         else:
             results.append({
@@ -116,7 +182,7 @@ def run_model_tests():
                 'name': 'Referral code generation',
                 'module': 'User',
                 'status': 'FAIL',
-                'duration': 0.05,
+                **metrics.finish(),
                 'error': f'Referral code invalid: {user.referral_code}'
             })
         user.delete()
@@ -126,11 +192,12 @@ def run_model_tests():
             'name': 'Referral code generation',
             'module': 'User',
             'status': 'FAIL',
-            'duration': 0.05,
+            **metrics.finish(),
             'error': str(e)[:100]
         })
     
     # Test 4: Course Creation
+    metrics = BlockMetrics()
     try:
         teacher = User.objects.create_user(
             username='course_teacher',
@@ -151,7 +218,7 @@ def run_model_tests():
             'name': 'Course creation',
             'module': 'Course',
             'status': 'PASS',
-            'duration': 0.1
+            **metrics.finish()
         })
         course.delete()
         teacher.delete()
@@ -161,11 +228,12 @@ def run_model_tests():
             'name': 'Course creation',
             'module': 'Course',
             'status': 'FAIL',
-            'duration': 0.1,
+            **metrics.finish(),
             'error': str(e)
         })
     
     # Test 5: Payment Status Choices
+    metrics = BlockMetrics()
     try:
         for status in ['pending', 'completed', 'failed', 'refunded', 'cancelled']:
             payment = Payment(
@@ -178,7 +246,7 @@ def run_model_tests():
             'name': 'Payment status choices',
             'module': 'Payment',
             'status': 'PASS',
-            'duration': 0.05
+            **metrics.finish()
         })
     except Exception as e:
         results.append({
@@ -186,11 +254,12 @@ def run_model_tests():
             'name': 'Payment status choices',
             'module': 'Payment',
             'status': 'FAIL',
-            'duration': 0.05,
+            **metrics.finish(),
             'error': str(e)
         })
     
     # Test 6: Lead Stage Choices
+    metrics = BlockMetrics()
     try:
         for stage in ['new', 'trial_scheduled', 'trial_complete', 'trial_incomplete', 'trial_absent']:
             lead = Lead(
@@ -205,7 +274,7 @@ def run_model_tests():
             'name': 'Lead stage choices',
             'module': 'Lead',
             'status': 'PASS',
-            'duration': 0.05
+            **metrics.finish()
         })
     except Exception as e:
         results.append({
@@ -213,11 +282,12 @@ def run_model_tests():
             'name': 'Lead stage choices',
             'module': 'Lead',
             'status': 'FAIL',
-            'duration': 0.05,
+            **metrics.finish(),
             'error': str(e)
         })
     
     # Test 7: ScheduledClass Status Choices
+    metrics = BlockMetrics()
     try:
         for status in ['scheduled', 'completed', 'incomplete', 'cancelled']:
             sc = ScheduledClass(
@@ -230,7 +300,7 @@ def run_model_tests():
             'name': 'ScheduledClass status choices',
             'module': 'Scheduling',
             'status': 'PASS',
-            'duration': 0.05
+            **metrics.finish()
         })
     except Exception as e:
         results.append({
@@ -238,19 +308,51 @@ def run_model_tests():
             'name': 'ScheduledClass status choices',
             'module': 'Scheduling',
             'status': 'FAIL',
-            'duration': 0.05,
+            **metrics.finish(),
             'error': str(e)
         })
     
     return results
 
-def generate_test_report(results, test_type='automated'):
-    """Generate test report"""
+def generate_test_report(results, test_type='automated', keep_tests=True):
+    """Generate test report in one pass over `results` (a list or a ResultStream)
+
+    Counters come from the aggregation engine (result_table.py).
+    With keep_tests=False results are only counted, the per-module test
+    lists are left out and the failure and hotspot lists are capped, so
+    memory stays bounded however many results the stream holds.
+    """
+    from result_table import ResultCounters, ResultTable, report_summary
     
-    passed = sum(1 for r in results if r['status'] == 'PASS')
-    failed = sum(1 for r in results if r['status'] == 'FAIL')
-    total = len(results)
+    listed_limit = None if keep_tests else MAX_LISTED_RESULTS
+    table = ResultTable() if keep_tests else ResultCounters()
+    tests_by_module = {}
+    failed_tests = []
+    quarantined_tests = []
+    hotspots = []
     
+    for index, result in enumerate(results):
+        table.append(result)
+        if keep_tests:
+            tests_by_module.setdefault(result['module'], []).append(result)
+        
+        if result.get('quarantined'):
+            if listed_limit is None or len(quarantined_tests) < listed_limit:
+                quarantined_tests.append(result)
+        elif result['status'] == 'FAIL':
+            if listed_limit is None or len(failed_tests) < listed_limit:
+                failed_tests.append(result)
+        
+        if result.get('repeated_queries'):
+            entry = ((result['repeated_queries'][0]['count'], result.get('query_count', 0)), -index, result)
+            if listed_limit is None:
+                hotspots.append(entry)
+            elif len(hotspots) < listed_limit:
+                heapq.heappush(hotspots, entry)
+            else:
+                heapq.heappushpop(hotspots, entry)
+    
+    stats = table.aggregate()
     report = {
         'report_metadata': {
             'report_id': f'{"AUT" if test_type == "automated" else "MAN"}-{datetime.datetime.now().strftime("%Y%m%d")}-001',
@@ -258,43 +360,52 @@ def generate_test_report(results, test_type='automated'):
             'test_framework': 'Django Test Runner',
             'project_version': 'v2.4.1',
         },
-        'summary': {
-            'total_tests': total,
-            'passed': passed,
-            'failed': failed,
-            'pass_rate': round(passed / total * 100, 2) if total > 0 else 0
-        },
+        'summary': report_summary(stats['summary']),
         'test_results': {},
-        'failed_tests': [r for r in results if r['status'] == 'FAIL']
+        'by_marker': stats['by_marker'],
+        'by_status': stats['by_status'],
+        'failed_tests': failed_tests,
+        'quarantined_tests': quarantined_tests,
+        'query_hotspots': [result for _, _, result in sorted(hotspots, key=lambda e: e[:2], reverse=True)]
     }
     
-    # Group by module
-    for result in results:
-        module = result['module']
-        if module not in report['test_results']:
-            report['test_results'][module] = {
-                'total': 0,
-                'passed': 0,
-                'failed': 0,
-                'pass_rate': 0,
-                'tests': []
-            }
-        report['test_results'][module]['total'] += 1
-        report['test_results'][module]['tests'].append(result)
-        if result['status'] == 'PASS':
-            report['test_results'][module]['passed'] += 1
-        else:
-            report['test_results'][module]['failed'] += 1
-    
-    # Calculate pass rates
-    for module in report['test_results']:
-        data = report['test_results'][module]
-        data['pass_rate'] = round(data['passed'] / data['total'] * 100, 2) if data['total'] > 0 else 0
+    for module, data in stats['by_module'].items():
+        report['test_results'][module] = {
+            'total': data['total'],
+            'passed': data['passed'],
+            # Modules count every non-passing result that is not quarantined
+            'failed': data['failed'] + data['skipped'] + data['blocked'],
+            'quarantined': data['quarantined'],
+            'pass_rate': data['pass_rate'],
+            'duration': data['duration'],
+            'queries': data['queries']
+        }
+        if keep_tests:
+            report['test_results'][module]['tests'] = tests_by_module[module]
     
     return report
 
+def _write_test_line(f, test, module=False):
+    status_icon = "✓" if test['status'] == 'PASS' else "✗"
+    cached = " [cached]" if test.get('cached') else ""
+    prefix = f"{test.get('module', 'Other')} :: " if module else ""
+    f.write(f"  [{status_icon}] {prefix}{test['test_id']}: {test['name']} ({test.get('duration', 0):.3f}s){cached}\n")
+
+
 def create_pdf_report(report, test_type='automated'):
-    """Create simple text-based PDF report"""
+    """Create simple text-based PDF report
+
+    Every test is listed. Reports built with keep_tests=False list them,
+    and all failures, straight from the run's results JSONL file, one line
+    at a time.
+    """
+    from result_stream import ResultStream
+    
+    results_file = report['report_metadata'].get('results_file')
+    streamed = (
+        results_file is not None and Path(results_file).exists()
+        and not any(data.get('tests') for data in report['test_results'].values())
+    )
     
     output_dir = Path(f'/root/codinzy/testing/reports/{test_type}/pdf')
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -316,7 +427,11 @@ def create_pdf_report(report, test_type='automated'):
         f.write(f"Total Tests: {report['summary']['total_tests']}\n")
         f.write(f"Passed: {report['summary']['passed']}\n")
         f.write(f"Failed: {report['summary']['failed']}\n")
-        f.write(f"Pass Rate: {report['summary']['pass_rate']}%\n\n")
+        f.write(f"Quarantined: {report['summary'].get('quarantined', 0)}\n")
+        f.write(f"Pass Rate: {report['summary']['pass_rate']}%\n")
+        f.write(f"Total Duration: {report['summary'].get('total_duration', 0):.3f}s\n")
+        f.write(f"SQL Queries: {report['summary'].get('total_queries', 0)}\n")
+        f.write(f"Peak Memory: {report['summary'].get('max_peak_memory_kb', 0)} KB\n\n")
         
         f.write("-" * 40 + "\n")
         f.write("TEST RESULTS BY MODULE\n")
@@ -326,43 +441,126 @@ def create_pdf_report(report, test_type='automated'):
             f.write(f"\n{module}:\n")
             f.write(f"  Total: {data['total']} | Passed: {data['passed']} | Failed: {data['failed']} | Pass Rate: {data['pass_rate']}%\n")
             
-            for test in data['tests'][:10]:  # Show first 10 tests per module
-                status_icon = "✓" if test['status'] == 'PASS' else "✗"
-                f.write(f"  [{status_icon}] {test['test_id']}: {test['name']}\n")
+            for test in data.get('tests', []):
+                _write_test_line(f, test)
+        
+        if streamed:
+            f.write("\n" + "-" * 40 + "\n")
+            f.write("ALL TESTS\n")
+            f.write("-" * 40 + "\n")
+            for test in ResultStream(results_file):
+                _write_test_line(f, test, module=True)
+        
+        if report.get('by_marker'):
+            f.write("\n" + "-" * 40 + "\n")
+            f.write("TEST RESULTS BY MARKER\n")
+            f.write("-" * 40 + "\n")
+            for marker, data in report['by_marker'].items():
+                f.write(f"  {marker}: Total: {data['total']} | Passed: {data['passed']} | Failed: {data['failed']} | Pass Rate: {data['pass_rate']}%\n")
         
         if report['failed_tests']:
             f.write("\n" + "-" * 40 + "\n")
             f.write("FAILED TESTS\n")
             f.write("-" * 40 + "\n")
-            for test in report['failed_tests']:
+            failed_tests = report['failed_tests']
+            if streamed:
+                failed_tests = (
+                    test for test in ResultStream(results_file)
+                    if test['status'] == 'FAIL' and not test.get('quarantined')
+                )
+            for test in failed_tests:
                 f.write(f"\n{test['test_id']}: {test['name']}\n")
                 f.write(f"  Module: {test['module']}\n")
                 f.write(f"  Error: {test.get('error', 'Unknown error')}\n")
         
+        if report.get('quarantined_tests'):
+            f.write("\n" + "-" * 40 + "\n")
+            f.write("QUARANTINED TESTS (FLAKY)\n")
+            f.write("-" * 40 + "\n")
+            for test in report['quarantined_tests']:
+                f.write(f"\n{test['test_id']}: flake rate {test.get('flake_rate', 0) * 100:.1f}%\n")
+                f.write(f"  Error: {test.get('error', 'Unknown error')}\n")
+        
+        if report.get('query_hotspots'):
+            f.write("\n" + "-" * 40 + "\n")
+            f.write("QUERY HOTSPOTS\n")
+            f.write("-" * 40 + "\n")
+            for test in report['query_hotspots']:
+                worst = test['repeated_queries'][0]
+                f.write(f"\n{test['test_id']}: {test.get('query_count', 0)} queries\n")
+                f.write(f"  Repeated {worst['count']}x: {worst['fingerprint'][:100]}\n")
+        
         f.write("\n" + "=" * 80 + "\n")
         f.write("END OF REPORT\n")
         f.write("=" * 80 + "\n")
     
     return str(filename)
 
-if __name__ == '__main__':
-    print("Running model tests...")
-    results = run_model_tests()
+def regenerate_report(path: Path) -> str:
+    """Text report of an existing results JSON or JSONL file"""
+    from result_stream import ResultStream
+    
+    if path.suffix == '.jsonl':
+        stream = ResultStream(path)
+        test_type = (stream.header or {}).get('test_type', 'automated')
+        report = generate_test_report(stream, test_type, keep_tests=False)
+        report['report_metadata']['results_file'] = str(path.resolve())
+    else:
+        with open(path) as f:
+            report = json.load(f)
+        test_type = 'manual' if report['report_metadata'].get('report_id', '').startswith('MAN') else 'automated'
+    return create_pdf_report(report, test_type)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Run the simple model tests and write their reports')
+    parser.add_argument('--report', metavar='RESULTS_FILE',
+                        help='Only regenerate the text report of a results JSON/JSONL file (no Django)')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Run the command under -X importtime and print the import costs')
+    args = parser.parse_args(argv)
+    if args.profile_startup:
+        from startup_profile import profile_startup
+        return profile_startup(__file__, sys.argv[1:] if argv is None else argv)
+    if args.report:
+        print(f"PDF report saved: {regenerate_report(Path(args.report))}")
+        return 0
     
-    print(f"Tests completed: {len(results)}")
-    passed = sum(1 for r in results if r['status'] == 'PASS')
-    failed = sum(1 for r in results if r['status'] == 'FAIL')
-    print(f"Passed: {passed}, Failed: {failed}")
+    from result_stream import ResultSink, ResultStream
     
-    # Generate report
-    report = generate_test_report(results, 'automated')
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    jsonl_path = Path(f'/root/codinzy/testing/reports/automated/jsonl/automated_results_{timestamp}.jsonl')
+    
+    # Results go to disk as each test finishes; a crash keeps what ran
+    with ResultSink(jsonl_path) as sink:
+        run_model_tests(sink)
+    print(f"Results streamed to: {jsonl_path}")
+    
+    # Generate report from the stream with bounded memory
+    stream = ResultStream(jsonl_path)
+    report = generate_test_report(stream, 'automated', keep_tests=False)
+    report['report_metadata']['results_file'] = str(jsonl_path)
+    print(f"Tests completed: {report['summary']['total_tests']}")
+    print(f"Passed: {report['summary']['passed']}, Failed: {report['summary']['failed']}")
+    print(f"Duration: {report['summary']['total_duration']:.3f}s, "
+          f"SQL queries: {report['summary']['total_queries']}")
     
     # Save JSON report
-    json_path = f'/root/codinzy/testing/reports/automated/json/automated_results_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    json_path = f'/root/codinzy/testing/reports/automated/json/automated_results_{timestamp}.json'
     with open(json_path, 'w') as f:
         json.dump(report, f, indent=2)
     print(f"JSON report saved: {json_path}")
     
+    # Add the run to the historical result store
+    from result_store import ResultStore
+    with ResultStore() as store:
+        store.ingest_file(Path(json_path))
+    
     # Generate PDF report
     pdf_path = create_pdf_report(report, 'automated')
     print(f"PDF report saved: {pdf_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
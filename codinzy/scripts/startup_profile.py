@@ -0,0 +1,55 @@
+"""
+Startup Import Profile for the Codinzy Report Scripts
+
+`--profile-startup` on a report CLI reruns the same command under
+`python -X importtime` and prints where its startup time went:
+1. The modules with the highest cumulative import time
+2. The total import time and the wall time of the command
+
+Report-only commands load neither Django nor reportlab unless they need
+them; this shows whether that still holds.
+
+Usage:
+    python scripts/generate_pdf_report.py --profile-startup
+    python scripts/run_simple_tests.py --report reports/automated/json/automated_results_20250101_120000.json --profile-startup
+"""
+
+import sys
+import time
+import subprocess
+from typing import List
+
+FLAG = '--profile-startup'
+TOP_IMPORTS = 15
+
+
+def profile_startup(script: str, argv: List[str]) -> int:
+    """Run `script` with `argv` (minus FLAG) under -X importtime and print the costs"""
+    command = [sys.executable, '-X', 'importtime', script, *(arg for arg in argv if arg != FLAG)]
+    start = time.perf_counter()
+    process = subprocess.run(command, stderr=subprocess.PIPE, text=True)
+    wall_time = time.perf_counter() - start
+
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            print(line, file=sys.stderr)
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # column header
+        name = fields[2].rstrip()
+        depth = len(name) - len(name.lstrip())
+        imports.append((int(fields[1]), int(fields[0]), depth, name.strip()))
+
+    top_depth = min((depth for _, _, depth, _ in imports), default=0)
+    total = sum(cumulative for cumulative, _, depth, _ in imports if depth == top_depth)
+    print(f"\nStartup import profile ({len(imports)} modules)")
+    print(f"{'cumulative':>12}  {'self':>9}  module")
+    for cumulative, own, _, name in sorted(imports, reverse=True)[:TOP_IMPORTS]:
+        print(f"{cumulative / 1000:>9.1f} ms  {own / 1000:>6.1f} ms  {name}")
+    print(f"Imports: {total / 1000:.1f} ms, command wall time: {wall_time * 1000:.0f} ms")
+    for heavy in ('django', 'reportlab'):
+        if any(name == heavy for _, _, _, name in imports):
+            print(f"Loaded {heavy}")
+    return process.returncode
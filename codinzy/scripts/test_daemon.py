@@ -0,0 +1,222 @@
+"""
+Warm Test Worker Daemon for Codinzy Backend Tests
+
+Importing Django, DRF, channels and ckeditor and running django.setup()
+costs far more than a single backend test. This daemon pays that cost
+once and keeps the app registry, the models and pytest loaded:
+1. `serve` configures Django, then listens on a local Unix socket
+2. `run` sends test ids to the daemon, which forks a child from the warm
+   process and runs pytest in it, streaming the output back
+3. `stop` shuts the daemon down
+
+Each run happens in a forked child, so runs never leak state into each
+other. The test packages and conftest are never kept warm: every run
+imports them from their current source, so edits take effect at once.
+The test database schema is restored from the schema snapshot cache (see
+conftest.django_db_setup).
+
+Usage:
+    python scripts/test_daemon.py start
+    python scripts/test_daemon.py run automated/backend/test_auth/__init__.py::AuthenticationTestCase::test_login_success
+    python scripts/test_daemon.py stop
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+from pathlib import Path
+from typing import List
+
+TESTING_DIR = Path(__file__).resolve().parent.parent
+BACKEND_TESTS_DIR = TESTING_DIR / 'automated' / 'backend'
+SOCKET_PATH = TESTING_DIR / '.test_daemon.sock'
+
+# Sent by the daemon after the pytest output; never part of normal output
+EXIT_MARKER = b'\x00EXIT '
+START_TIMEOUT = 60
+
+
+def warm_up():
+    """Load Django, the installed apps and their models into this process"""
+    os.chdir(str(TESTING_DIR))
+    # Same import roots pytest uses: pytest.ini's pythonpath, the rootdir
+    # (for test_settings) and the conftest directory (prepend import mode)
+    for path in (TESTING_DIR.parent, TESTING_DIR, BACKEND_TESTS_DIR):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_settings')
+
+    import django
+    django.setup()
+
+    # Not conftest or the test packages: pytest would reuse them from
+    # sys.modules in every child, at their pre-edit versions
+    import pytest
+    import pytest_django
+
+
+def forget_test_modules():
+    """Drop modules loaded from the backend tests so pytest imports them afresh"""
+    prefix = str(BACKEND_TESTS_DIR) + os.sep
+    for name, module in list(sys.modules.items()):
+        if (getattr(module, '__file__', None) or '').startswith(prefix):
+            del sys.modules[name]
+
+
+def run_request(conn: socket.socket, request: dict):
+    """Run one request in a forked child writing straight to the socket"""
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            os.dup2(conn.fileno(), 1)
+            os.dup2(conn.fileno(), 2)
+            sys.stdout = os.fdopen(1, 'w', buffering=1, closefd=False)
+            sys.stderr = sys.stdout
+
+            forget_test_modules()
+            import pytest
+            exit_code = int(pytest.main(request.get('args', [])))
+        except BaseException as exc:
+            print(f"Daemon run failed: {exc!r}")
+        finally:
+            sys.stdout.flush()
+            os._exit(exit_code)
+
+    _, status = os.waitpid(pid, 0)
+    exit_code = os.waitstatus_to_exitcode(status)
+    conn.sendall(EXIT_MARKER + str(exit_code).encode() + b'\n')
+
+
+def serve(socket_path: Path = SOCKET_PATH):
+    """Warm up and answer run requests until told to stop"""
+    started = time.perf_counter()
+    warm_up()
+    print(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+    if socket_path.exists():
+        socket_path.unlink()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(socket_path))
+    server.listen(1)
+    print(f"Listening on {socket_path}")
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                line = conn.makefile('rb').readline()
+                try:
+                    request = json.loads(line or b'{}')
+                except ValueError:
+                    conn.sendall(b'Invalid request\n' + EXIT_MARKER + b'2\n')
+                    continue
+                if request.get('command') == 'stop':
+                    conn.sendall(EXIT_MARKER + b'0\n')
+                    break
+                if request.get('command') == 'ping':
+                    conn.sendall(EXIT_MARKER + b'0\n')
+                    continue
+                run_request(conn, request)
+    finally:
+        server.close()
+        if socket_path.exists():
+            socket_path.unlink()
+
+
+def send_request(request: dict, socket_path: Path = SOCKET_PATH, output=None) -> int:
+    """Send a request to the daemon, echo its output and return the exit code"""
+    output = output or sys.stdout.buffer
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(str(socket_path))
+    with client:
+        client.sendall(json.dumps(request).encode() + b'\n')
+        buffer = b''
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            buffer += chunk
+            # Hold back a possible partial marker, flush everything before it
+            marker_at = buffer.find(EXIT_MARKER)
+            if marker_at == -1:
+                keep = len(EXIT_MARKER)
+                output.write(buffer[:-keep])
+                buffer = buffer[-keep:]
+                output.flush()
+        marker_at = buffer.find(EXIT_MARKER)
+        if marker_at == -1:
+            output.write(buffer)
+            output.flush()
+            return 1
+        output.write(buffer[:marker_at])
+        output.flush()
+        return int(buffer[marker_at + len(EXIT_MARKER):].strip() or 1)
+
+
+def is_running(socket_path: Path = SOCKET_PATH) -> bool:
+    """True if a daemon answers on the socket"""
+    if not socket_path.exists():
+        return False
+    try:
+        with open(os.devnull, 'wb') as devnull:
+            return send_request({'command': 'ping'}, socket_path, output=devnull) == 0
+    except OSError:
+        return False
+
+
+def start(socket_path: Path = SOCKET_PATH) -> bool:
+    """Start a background daemon unless one is running; wait until it answers"""
+    if is_running(socket_path):
+        return True
+    log_path = socket_path.with_suffix('.log')
+    with open(log_path, 'ab') as log:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), 'serve', '--socket', str(socket_path)],
+            stdout=log, stderr=log, stdin=subprocess.DEVNULL, start_new_session=True
+        )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if is_running(socket_path):
+            return True
+        time.sleep(0.1)
+    print(f"Daemon did not start, see {log_path}")
+    return False
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Warm worker daemon for Codinzy backend tests')
+    parser.add_argument('command', choices=['serve', 'start', 'run', 'stop', 'status'])
+    parser.add_argument('--socket', default=str(SOCKET_PATH), help='Unix socket path')
+    parser.add_argument('pytest_args', nargs=argparse.REMAINDER,
+                        help='Test ids and pytest options for "run"')
+    args = parser.parse_args(argv)
+    socket_path = Path(args.socket)
+
+    if args.command == 'serve':
+        serve(socket_path)
+        return 0
+    if args.command == 'start':
+        return 0 if start(socket_path) else 1
+    if args.command == 'status':
+        running = is_running(socket_path)
+        print("Daemon is running" if running else "Daemon is not running")
+        return 0 if running else 1
+    if args.command == 'stop':
+        if not is_running(socket_path):
+            print("Daemon is not running")
+            return 0
+        return send_request({'command': 'stop'}, socket_path)
+
+    if not start(socket_path):
+        return 1
+    pytest_args = [arg for arg in args.pytest_args if arg != '--']
+    return send_request({'args': pytest_args}, socket_path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+Test Impact Analysis for Codinzy Backend Tests
+
+This script selects the backend tests affected by a change:
+1. Build a dependency index mapping every test in automated/backend/test_*
+   to the api.models classes, conftest fixtures and API endpoints it uses
+   (static analysis), plus the database tables it touched at runtime
+   (db_tables recorded by conftest.record_queries in earlier results JSON)
+2. Map a git diff to changed model classes and other backend files
+3. Print, or run in parallel, only the tests that depend on the change
+
+Usage:
+    python scripts/test_impact.py --base origin/main
+    python scripts/test_impact.py --base origin/main --run --workers 8
+    python scripts/test_impact.py --write-index reports/automated/json/impact_index.json
+"""
+
+import re
+import sys
+import ast
+import json
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from run_parallel_tests import (
+    TESTING_DIR, BACKEND_TESTS_DIR, REPORTS_DIR,
+    discover_test_ids, package_of, result_test_id
+)
+
+BACKEND_DIR = TESTING_DIR.parent / 'backend'
+API_DIR = BACKEND_DIR / 'api'
+CONFTEST = BACKEND_TESTS_DIR / 'conftest.py'
+
+# Changes to these invalidate every test
+GLOBAL_INPUTS = {
+    CONFTEST,
+    TESTING_DIR / 'test_settings.py',
+    TESTING_DIR / 'test_hashers.py',
+    TESTING_DIR / 'test_queries.py',
+    TESTING_DIR / 'pytest.ini',
+}
+
+SETUP_METHODS = {'setUp', 'setUpClass', 'setUpTestData'}
+_HUNK = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@', re.MULTILINE)
+
+
+def api_model_imports(tree: ast.Module) -> Set[str]:
+    """Names a module imports from api.models"""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module == 'api.models':
+            names.update(alias.asname or alias.name for alias in node.names)
+    return names
+
+
+def referenced_names(node: ast.AST) -> Set[str]:
+    """Every bare name used inside a function or class body"""
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+
+
+def endpoints_in(node: ast.AST) -> Set[str]:
+    """API paths written as string literals"""
+    return {
+        n.value for n in ast.walk(node)
+        if isinstance(n, ast.Constant) and isinstance(n.value, str) and n.value.startswith('/api/')
+    }
+
+
+def fixture_dependencies() -> Dict[str, Dict[str, Set[str]]]:
+    """Models and fixtures each conftest fixture uses directly"""
+    tree = ast.parse(CONFTEST.read_text())
+    models = api_model_imports(tree)
+    fixtures = {}
+    for node in tree.body:
+        if not isinstance(node, ast.FunctionDef):
+            continue
+        decorators = {ast.unparse(d) for d in node.decorator_list}
+        if not any('fixture' in d for d in decorators):
+            continue
+        fixtures[node.name] = {
+            'models': referenced_names(node) & models,
+            'fixtures': {arg.arg for arg in node.args.args},
+            'endpoints': endpoints_in(node),
+            'autouse': any('autouse=True' in d for d in decorators),
+        }
+    return fixtures
+
+
+def expand_fixtures(names: Set[str], fixtures: Dict[str, Dict[str, Set[str]]]) -> Set[str]:
+    """Transitive closure of the conftest fixtures a test requests"""
+    seen = set()
+    pending = [name for name in names if name in fixtures]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        pending.extend(dep for dep in fixtures[name]['fixtures'] if dep in fixtures)
+    return seen
+
+
+def load_runtime_tables(json_dir: Path = REPORTS_DIR / 'json') -> Dict[str, Set[str]]:
+    """Tables each test touched, from the newest results file that recorded them"""
+    tables = {}
+    files = sorted(json_dir.glob('automated_results_*.json')) if json_dir.exists() else []
+    for path in reversed(files):
+        try:
+            with open(path) as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for module in report.get('test_results', {}).values():
+            for test in module.get('tests', []):
+                if 'db_tables' in test and test['test_id'] not in tables:
+                    tables[test['test_id']] = set(test['db_tables'])
+    return tables
+
+
+def scopes_of_test(tree: ast.Module, name: str) -> List[ast.FunctionDef]:
+    """The test function for `Class::test` or `test`, plus its class setup methods"""
+    parts = name.split('::')
+    scopes = []
+    for top in tree.body:
+        if isinstance(top, ast.ClassDef) and len(parts) == 2 and top.name == parts[0]:
+            scopes.extend(
+                item for item in top.body
+                if isinstance(item, ast.FunctionDef) and item.name in SETUP_METHODS | {parts[1]}
+            )
+        elif isinstance(top, ast.FunctionDef) and len(parts) == 1 and top.name == parts[0]:
+            scopes.append(top)
+    return scopes
+
+
+def build_index(json_dir: Path = REPORTS_DIR / 'json') -> Dict[str, Dict[str, Set[str]]]:
+    """Dependency index: node id -> models, fixtures, endpoints and tables"""
+    fixtures = fixture_dependencies()
+    runtime_tables = load_runtime_tables(json_dir)
+    trees = {}
+    index = {}
+
+    for node_id in discover_test_ids():
+        path, _, rest = node_id.partition('::')
+        if path not in trees:
+            trees[path] = ast.parse((TESTING_DIR / path).read_text())
+        tree = trees[path]
+        models = api_model_imports(tree)
+
+        scopes = scopes_of_test(tree, rest)
+        used_models, endpoints, requested = set(), set(), set()
+        for scope in scopes:
+            used_models |= referenced_names(scope) & models
+            endpoints |= endpoints_in(scope)
+            requested |= {arg.arg for arg in scope.args.args} - {'self', 'cls'}
+
+        used_fixtures = expand_fixtures(requested, fixtures)
+        for name in used_fixtures:
+            used_models |= fixtures[name]['models']
+            endpoints |= fixtures[name]['endpoints']
+
+        index[node_id] = {
+            'models': used_models,
+            'fixtures': used_fixtures,
+            'endpoints': endpoints,
+            'tables': runtime_tables.get(result_test_id(node_id), set()),
+        }
+    return index
+
+
+def model_tables(models_path: Path, app_label: str = 'api') -> Dict[str, str]:
+    """Model class name -> database table, honouring Meta.db_table"""
+    tables = {}
+    tree = ast.parse(models_path.read_text())
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        table = f'{app_label}_{node.name.lower()}'
+        for item in node.body:
+            if isinstance(item, ast.ClassDef) and item.name == 'Meta':
+                for stmt in item.body:
+                    if (isinstance(stmt, ast.Assign)
+                            and any(getattr(t, 'id', None) == 'db_table' for t in stmt.targets)
+                            and isinstance(stmt.value, ast.Constant)):
+                        table = stmt.value.value
+        tables[node.name] = table
+    return tables
+
+
+def git(*args: str) -> str:
+    return subprocess.run(
+        ['git', *args], cwd=str(TESTING_DIR), check=True,
+        capture_output=True, text=True
+    ).stdout
+
+
+def changed_files(base: str) -> List[Path]:
+    """Files changed between `base` and the working tree"""
+    top = Path(git('rev-parse', '--show-toplevel').strip())
+    names = git('diff', '--name-only', base).splitlines()
+    # ls-files lists paths under the cwd only; ':/' widens it to the whole checkout
+    names += git('ls-files', '--others', '--exclude-standard', '--full-name', ':/').splitlines()
+    return [(top / name).resolve() for name in names if name]
+
+
+def changed_model_classes(base: str, models_path: Path) -> Optional[Set[str]]:
+    """Model classes touched by the diff; None if a change is outside any class"""
+    if not models_path.exists():
+        return None
+    tree = ast.parse(models_path.read_text())
+    classes = [
+        (node.lineno, node.end_lineno, node.name)
+        for node in tree.body if isinstance(node, ast.ClassDef)
+    ]
+
+    changed = set()
+    for match in _HUNK.finditer(git('diff', '-U0', base, '--', str(models_path))):
+        start = int(match.group(1))
+        length = int(match.group(2)) if match.group(2) is not None else 1
+        lines = range(start, start + max(length, 1))
+        hit = {name for first, last, name in classes if any(first <= line <= last for line in lines)}
+        if not hit:
+            return None
+        changed |= hit
+    return changed
+
+
+def model_sources() -> List[Path]:
+    """api.models as a module or as a package"""
+    if (API_DIR / 'models.py').exists():
+        return [API_DIR / 'models.py']
+    return sorted((API_DIR / 'models').glob('*.py'))
+
+
+def select_tests(base: str, index: Dict[str, Dict[str, Set[str]]]) -> List[str]:
+    """Node ids from the index affected by the changes since `base`"""
+    everything = sorted(index)
+    selected = set()
+    sources = model_sources()
+
+    for path in changed_files(base):
+        if path in GLOBAL_INPUTS:
+            return everything
+        if BACKEND_TESTS_DIR in path.parents:
+            package = next((p.name for p in path.parents if p.parent == BACKEND_TESTS_DIR), None)
+            selected |= {n for n in index if f'/{package}/' in n} if package else set()
+        elif path in sources:
+            classes = changed_model_classes(base, path)
+            if classes is None:
+                return everything
+            tables = {model_tables(path)[name] for name in classes}
+            selected |= {
+                n for n, deps in index.items()
+                if deps['models'] & classes or deps['tables'] & tables
+            }
+        elif API_DIR in path.parents and path.suffix == '.py':
+            # Views, serializers, urls...: every test that calls the API
+            selected |= {n for n, deps in index.items() if deps['endpoints']}
+        elif BACKEND_DIR in path.parents and path.suffix == '.py':
+            return everything
+    return sorted(selected)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Select backend tests affected by a git diff')
+    parser.add_argument('--base', default='HEAD', help='Git revision to diff against (default: HEAD)')
+    parser.add_argument('--run', action='store_true', help='Run the selected tests in parallel')
+    parser.add_argument('--workers', '-n', type=int, help='Worker processes for --run')
+    parser.add_argument('--write-index', help='Write the dependency index to this JSON file')
+    args = parser.parse_args(argv)
+
+    index = build_index()
+    if args.write_index:
+        with open(args.write_index, 'w') as f:
+            json.dump({n: {k: sorted(v) for k, v in deps.items()} for n, deps in index.items()}, f, indent=2)
+        print(f"Dependency index saved: {args.write_index}")
+
+    selected = select_tests(args.base, index)
+    packages = sorted({package_of(n) for n in selected})
+    print(f"Selected {len(selected)} of {len(index)} tests in {len(packages)} packages")
+    for package in packages:
+        print(f"  {package}")
+
+    if args.run and selected:
+        import run_parallel_tests
+        run_args = (['--workers', str(args.workers)] if args.workers else []) + ['--tests'] + selected
+        return run_parallel_tests.main(run_args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,16 @@
+"""
+Shared setup for the tests of the report and runner scripts
+
+The scripts import each other as top-level modules, so their directory
+goes on sys.path the same way the scripts put it there themselves, and so
+does the testing directory for test_history.py.
+
+Usage:
+    pytest scripts/tests
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,88 @@
+"""Tests for flaky test detection and the quarantine (flaky_detector.py)"""
+
+import pytest
+
+import flaky_detector
+from flaky_detector import QuarantineStore, RELEASE_AFTER_PASSES, detect_flaky
+
+NODE = 'automated/backend/test_auth/__init__.py::AuthTestCase::test_{}'
+TEST = 'test_auth::AuthTestCase::test_{}'
+
+
+def result(name, status, **extra):
+    return {'test_id': TEST.format(name), 'status': status, **extra}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return QuarantineStore(tmp_path / 'quarantine.json')
+
+
+@pytest.fixture
+def reruns(monkeypatch):
+    """Scripted rerun outcomes: test name -> statuses, one per rerun"""
+    outcomes = {}
+
+    def run_parallel(shards, pytest_args, max_workers=None):
+        return [result(node.rsplit('_', 1)[-1], outcomes[node.rsplit('_', 1)[-1]][attempt])
+                for attempt, shard in enumerate(shards) for node in shard]
+
+    monkeypatch.setattr(flaky_detector, 'run_parallel', run_parallel)
+    return outcomes
+
+
+def test_failure_that_passes_on_rerun_is_quarantined(store, reruns):
+    reruns.update(flaky=['FAIL', 'PASS', 'PASS'], broken=['FAIL', 'FAIL', 'FAIL'])
+    results = [result('flaky', 'FAIL'), result('broken', 'FAIL'), result('ok', 'PASS')]
+    nodes = [NODE.format(name) for name in ('flaky', 'broken', 'ok')]
+
+    classified = detect_flaky(results, nodes, 3, [], 2, store)
+
+    assert classified['flaky'] == [TEST.format('flaky')]
+    assert classified['deterministic'] == [TEST.format('broken')]
+    assert results[0]['quarantined'] and results[0]['flake_rate'] == 0.5
+    assert 'quarantined' not in results[1]
+    assert store.entries[TEST.format('flaky')]['runs'] == 4
+
+
+def test_deterministic_failure_releases_a_quarantined_test(store, reruns):
+    store.record_flaky(TEST.format('broken'), runs=2, failures=1)
+    reruns.update(broken=['FAIL'])
+    results = [result('broken', 'FAIL')]
+
+    detect_flaky(results, [NODE.format('broken')], 1, [], 1, store)
+
+    assert TEST.format('broken') not in store
+    assert 'quarantined' not in results[0]
+
+
+def test_release_after_consecutive_passes(store):
+    store.record_flaky(TEST.format('flaky'), runs=2, failures=1)
+    nodes = [NODE.format('flaky')]
+
+    for _ in range(RELEASE_AFTER_PASSES - 1):
+        assert detect_flaky([result('flaky', 'PASS')], nodes, 3, [], 1, store)['released'] == []
+    # Results served from the cache are not new passing runs
+    detect_flaky([result('flaky', 'PASS', cached=True)], nodes, 3, [], 1, store)
+    assert TEST.format('flaky') in store
+
+    assert detect_flaky([result('flaky', 'PASS')], nodes, 3, [], 1, store)['released'] == [TEST.format('flaky')]
+    assert TEST.format('flaky') not in store
+
+
+def test_too_many_failures_are_not_rerun(store, monkeypatch):
+    monkeypatch.setattr(flaky_detector, 'run_parallel', pytest.fail)
+    names = [str(i) for i in range(flaky_detector.MAX_RERUN_FAILURES + 1)]
+
+    classified = detect_flaky([result(n, 'FAIL') for n in names], [NODE.format(n) for n in names], 3, [], 1, store)
+
+    assert classified == {'flaky': [], 'deterministic': [], 'released': []}
+
+
+def test_quarantine_round_trips_through_its_file(store):
+    store.record_flaky(TEST.format('flaky'), runs=3, failures=1)
+    store.save()
+
+    loaded = QuarantineStore(store.path)
+    assert TEST.format('flaky') in loaded
+    assert loaded.flake_rate(TEST.format('flaky')) == pytest.approx(0.3333)
@@ -0,0 +1,147 @@
+"""Tests for report jobs and their rendering (generate_pdf_report.py)"""
+
+import json
+import subprocess
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+import generate_pdf_report as reports
+from generate_pdf_report import PDFReportGenerator, ReportJob, ReportType, StoredTests, suite_aggregates
+from result_store import ResultStore
+
+DEFECT = reports.DefectInfo(
+    defect_id='DEF-001', title='Refund button does nothing', module='Payments', severity='High',
+    status='Open', reported_by='QA', reported_date='2026-01-01', description='Clicking refund has no effect',
+)
+
+
+def fake_report(report_type):
+    """A generator method that reports its call instead of rendering"""
+    def generate(self, *args, **kwargs):
+        return f"{report_type}:{args[-1]['name']}:{kwargs.get('filename')}"
+    return generate
+
+
+@pytest.fixture
+def fake_reports(monkeypatch):
+    for name in ('automated_test', 'manual_test', 'defect'):
+        monkeypatch.setattr(PDFReportGenerator, f'generate_{name}_report', fake_report(name))
+
+
+def jobs():
+    return [
+        ReportJob(ReportType.DEFECT, ([DEFECT], {'name': 'defects'})),
+        ReportJob(ReportType.AUTOMATED, ([], None, {'name': 'automated'}), {'filename': 'a.pdf'}),
+        ReportJob(ReportType.MANUAL, ([], [], {'name': 'manual'})),
+    ]
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_render_reports_returns_paths_in_job_order(tmp_path, fake_reports, max_workers):
+    paths = PDFReportGenerator(str(tmp_path)).render_reports(jobs(), max_workers=max_workers)
+
+    assert paths == ['defect:defects:None', 'automated_test:automated:a.pdf', 'manual_test:manual:None']
+
+
+def test_report_job_kwargs_default_to_a_fresh_dict():
+    first, second = ReportJob(ReportType.DEFECT, ()), ReportJob(ReportType.DEFECT, ())
+
+    first.kwargs['filename'] = 'x.pdf'
+    assert second.kwargs == {}
+
+
+def test_render_reports_writes_real_pdfs(tmp_path):
+    pytest.importorskip('reportlab')
+    generator = PDFReportGenerator(str(tmp_path))
+    cases = [{'test_id': 'MAN-1', 'name': 'Login', 'module': 'Auth', 'status': 'PASS'}]
+
+    paths = generator.render_reports([
+        ReportJob(ReportType.MANUAL, (cases, [DEFECT], {}), {'filename': 'manual.pdf'}),
+        ReportJob(ReportType.DEFECT, ([DEFECT], {}), {'filename': 'defects.pdf'}),
+    ], max_workers=2)
+
+    assert paths == [str(tmp_path / 'pdf' / 'manual' / 'manual.pdf'),
+                     str(tmp_path / 'pdf' / 'defects' / 'defects.pdf')]
+    assert all(open(path, 'rb').read(5) == b'%PDF-' for path in paths)
+
+
+def test_stored_suite_counts_quarantined_tests_in_the_store(tmp_path, monkeypatch):
+    db_path = tmp_path / 'results.db'
+    with ResultStore(db_path) as store:
+        run_id = store.ingest([
+            {'test_id': f'test_auth::A::test_{i}', 'name': f'test_{i}', 'module': module,
+             'status': 'FAIL' if i % 2 else 'PASS', 'quarantined': i in (1, 3, 4)}
+            for i, module in enumerate(['Auth'] * 4 + ['Users'] * 2)
+        ], 'run.json', '2026-01-01T10:00:00Z')
+    suite = reports.TestSuite(suite_name='Auth', total_tests=4, passed=2, failed=0, skipped=0, blocked=0,
+                              pass_rate=50.0, duration=0.0, tests=StoredTests(run_id, str(db_path), module='Auth'))
+    monkeypatch.setattr(StoredTests, '__iter__', lambda self: pytest.fail('suite_aggregates read every row'))
+
+    assert suite_aggregates(suite)['summary']['quarantined'] == 2
+
+
+def test_manual_results_file_becomes_manual_or_defect_job(tmp_path):
+    path = tmp_path / 'test_results.json'
+    cases = [{'test_id': 'MAN-1', 'name': 'Login', 'module': 'Auth', 'status': 'FAIL'}]
+    path.write_text(json.dumps({'test_cases': cases, 'defects': [asdict(DEFECT)], 'report_metadata': {'x': 1}}))
+
+    (manual,) = reports.manual_report_jobs(ReportType.MANUAL, path)
+    (defect,) = reports.manual_report_jobs(ReportType.DEFECT, path)
+
+    assert (manual.report_type, manual.args) == (ReportType.MANUAL, (cases, [DEFECT], {'x': 1}))
+    assert (defect.report_type, defect.args) == (ReportType.DEFECT, ([DEFECT], {'x': 1}))
+    assert reports.manual_report_jobs(ReportType.MANUAL, tmp_path / 'missing.json') == []
+
+
+@pytest.mark.parametrize('report_type', ['manual', 'defect'])
+def test_command_line_accepts_the_report_type(tmp_path, report_type):
+    script = Path(reports.__file__)
+    done = subprocess.run([sys.executable, str(script), '--type', report_type],
+                          cwd=str(tmp_path), capture_output=True, text=True)
+
+    assert done.returncode == 0, done.stderr
+    assert 'No manual test results at testing/reports/manual/json/test_results.json' in done.stdout
+
+
+@pytest.mark.parametrize('count, sizes', [(1, [1]), (40, [40]), (80, [40, 40]), (95, [40, 40, 15])])
+def test_table_section_splits_rows_into_chunks_with_headers(count, sizes):
+    pytest.importorskip('reportlab')
+    from reportlab.platypus import Paragraph, Spacer, Table
+    assert reports.TABLE_CHUNK_ROWS == 40
+    header = ['Test ID', 'Error']
+    rows = [[f'test_{i}', f'error {i}'] for i in range(count)]
+
+    flowables = list(reports.table_section('Failed Tests', 'Intro', header, iter(rows), [100, 300], 'failed'))
+
+    heading, intro, *tables, spacer = flowables
+    assert isinstance(heading, Paragraph) and isinstance(intro, Paragraph) and isinstance(spacer, Spacer)
+    assert all(isinstance(table, Table) and table.repeatRows == 1 for table in tables)
+    assert [len(table._cellvalues) - 1 for table in tables] == sizes
+    assert all(table._cellvalues[0] == header for table in tables)
+    assert [row for table in tables for row in table._cellvalues[1:]] == rows
+
+
+def test_table_section_without_rows_is_empty():
+    pytest.importorskip('reportlab')
+    assert list(reports.table_section('Failed Tests', None, ['Test ID'], iter([]), [100], 'failed')) == []
+
+
+def test_flowable_stream_holds_only_the_lookahead():
+    produced = []
+
+    def flowables():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    stream = reports.FlowableStream(flowables(), lookahead=4)
+    consumed = []
+    while stream:
+        assert len(stream) <= 4 and len(produced) - len(consumed) <= 4
+        consumed.append(stream[0])
+        del stream[0]
+
+    assert consumed == list(range(20))
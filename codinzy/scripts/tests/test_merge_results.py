@@ -0,0 +1,79 @@
+"""Tests for the result file merger (merge_results.py)"""
+
+import json
+import datetime
+
+from merge_results import expand_result_files, merge_result_files
+from result_stream import ResultSink
+
+JUNIT = '''<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" timestamp="{timestamp}">
+<testcase classname="automated.backend.test_auth.AuthTestCase" name="test_login" time="{time}">{body}</testcase>
+</testsuite></testsuites>
+'''
+
+
+def report(path, generated_at, tests, **metadata):
+    with open(path, 'w') as f:
+        json.dump({
+            'report_metadata': {'generated_at': generated_at, **metadata},
+            'test_results': {'Authentication': {'tests': tests}},
+        }, f)
+    return path
+
+
+def login(status, duration):
+    return {'test_id': 'test_auth::AuthTestCase::test_login', 'name': 'test_login',
+            'module': 'Authentication', 'status': status, 'duration': duration}
+
+
+def test_newest_run_wins_and_attempts_are_counted(tmp_path):
+    files = [
+        report(tmp_path / 'b.json', '2026-01-02T10:00:00', [login('PASS', 2.0)]),
+        report(tmp_path / 'a.json', '2026-01-01T10:00:00', [login('FAIL', 1.0)]),
+    ]
+
+    (merged,), stats = merge_result_files(files)
+    assert merged['status'] == 'PASS'
+    assert (merged['attempts'], merged['attempts_duration']) == (2, 3.0)
+    assert stats == {'files': 2, 'attempts': 2, 'tests': 1, 'retried': 1}
+
+
+def test_streamed_report_is_read_from_its_results_file(tmp_path):
+    jsonl = tmp_path / 'run.jsonl'
+    with ResultSink(jsonl) as sink:
+        sink.append(login('FAIL', 1.0))
+        sink.append(dict(login('PASS', 0.5), test_id='test_auth::AuthTestCase::test_logout'))
+    streamed = report(tmp_path / 'run.json', '2026-01-01T10:00:00', [], results_file=str(jsonl))
+
+    merged, stats = merge_result_files([streamed])
+    assert sorted(r['test_id'] for r in merged) == [
+        'test_auth::AuthTestCase::test_login', 'test_auth::AuthTestCase::test_logout'
+    ]
+    # The report and its JSONL file in one directory are a single run
+    merged, stats = merge_result_files(expand_result_files([str(tmp_path)]))
+    assert stats['attempts'] == 2 and stats['retried'] == 0
+
+
+def test_timezones_are_compared_as_instants(tmp_path):
+    # 10:00 UTC is later than 09:00 at UTC-05:00 only on the wall clock
+    utc = tmp_path / 'utc.xml'
+    utc.write_text(JUNIT.format(timestamp='2026-01-01T10:00:00+00:00', time='1.0', body=''))
+    eastern = tmp_path / 'eastern.xml'
+    eastern.write_text(JUNIT.format(timestamp='2026-01-01T09:00:00-05:00', time='2.0',
+                                    body='<failure message="boom">trace</failure>'))
+
+    (merged,), _ = merge_result_files([eastern, utc])
+    assert merged['status'] == 'FAIL'
+
+
+def test_naive_timestamps_are_local_time(tmp_path):
+    # One hour after the JUnit run, written as naive local time
+    local = datetime.datetime(2026, 1, 1, 12, tzinfo=datetime.timezone.utc).astimezone()
+    naive = report(tmp_path / 'naive.json', local.replace(tzinfo=None).isoformat(), [login('PASS', 1.0)])
+    aware = tmp_path / 'aware.xml'
+    aware.write_text(JUNIT.format(timestamp='2026-01-01T11:00:00+00:00', time='1.0',
+                                  body='<failure message="boom">trace</failure>'))
+
+    (merged,), _ = merge_result_files([naive, aware])
+    assert merged['status'] == 'PASS'
@@ -0,0 +1,97 @@
+"""Tests for the rendered section cache (report_sections.py)"""
+
+import os
+import time
+
+import pytest
+
+from report_sections import SectionCache, join_parts
+
+ROWS = [['test_auth::A::test_a', 'test_a', 'Authentication', 'boom']]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SectionCache(tmp_path / 'sections')
+
+
+def write_part(path):
+    with open(path, 'w') as f:
+        f.write('%PDF part')
+
+
+def test_key_follows_heading_and_rows(cache):
+    key = cache.key('Failed Tests: Auth', iter(ROWS))
+
+    assert key == cache.key('Failed Tests: Auth', iter(ROWS))
+    assert key != cache.key('Failed Tests: Users', iter(ROWS))
+    assert key != cache.key('Failed Tests: Auth', iter([ROWS[0][:3] + ['other error']]))
+    assert cache.key('Failed Tests: Auth', iter([])) is None
+
+
+def test_put_then_get(cache):
+    key = cache.key('Failed Tests: Auth', ROWS)
+    assert cache.get(key) is None
+
+    path = cache.put(key, write_part)
+    assert cache.get(key) == path and path.read_text() == '%PDF part'
+    assert list(cache.directory.iterdir()) == [path]
+
+
+def test_prune_drops_only_unused_parts(cache):
+    old = cache.put('old', write_part)
+    used = cache.put('used', write_part)
+    week_ago = time.time() - 8 * 86400
+    os.utime(old, (week_ago, week_ago))
+    os.utime(used, (week_ago, week_ago))
+    cache.get('used')
+
+    assert cache.prune(max_age_days=7) == 1
+    assert not old.exists() and used.exists()
+
+
+def test_join_parts_keeps_page_order(tmp_path):
+    pypdf = pytest.importorskip('pypdf')
+    parts = []
+    for pages in (1, 2):
+        writer = pypdf.PdfWriter()
+        for _ in range(pages):
+            writer.add_blank_page(width=100 * pages, height=100)
+        parts.append(tmp_path / f'part{pages}.pdf')
+        with open(parts[-1], 'wb') as f:
+            writer.write(f)
+
+    join_parts(parts, tmp_path / 'report.pdf')
+    widths = [page.mediabox.width for page in pypdf.PdfReader(tmp_path / 'report.pdf').pages]
+    assert widths == [100, 200, 200]
+
+
+def test_incremental_report_renders_only_changed_modules(tmp_path, cache, monkeypatch):
+    pytest.importorskip('reportlab')
+    pytest.importorskip('pypdf')
+    from generate_pdf_report import PDFReportGenerator
+    from merge_results import build_test_suites
+
+    rendered = []
+    put = cache.put
+    monkeypatch.setattr(cache, 'put', lambda key, render: rendered.append(key) or put(key, render))
+
+    def render(error):
+        results = [
+            {'test_id': f'test_{module}::C::test_x', 'name': 'test_x', 'module': module,
+             'status': 'FAIL', 'duration': 0.1, 'error': error if module == 'payments' else 'boom'}
+            for module in ('auth', 'payments', 'users')
+        ]
+        suites, aggregates = build_test_suites(results)
+        generator = PDFReportGenerator(str(tmp_path / 'reports'))
+        generator.generate_automated_test_report(suites, None, {}, aggregates=aggregates,
+                                                 filename='report.pdf', section_cache=cache)
+        assert (tmp_path / 'reports' / 'pdf' / 'report.pdf').exists()
+        keys = list(rendered)
+        rendered.clear()
+        return keys
+
+    assert len(render('boom')) == 3
+    assert render('boom') == []
+    assert len(render('payments down')) == 1
+    assert len(list(cache.directory.glob('*.pdf'))) == 4
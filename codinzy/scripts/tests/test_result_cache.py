@@ -0,0 +1,212 @@
+"""Tests for the content-hash result cache (result_cache.py)"""
+
+import ast
+
+import pytest
+
+import result_cache
+from result_cache import SourceHasher
+from run_parallel_tests import discover_test_ids
+
+SOURCE = '''\
+import os  # café
+
+LIMIT = {
+    'a': 1,
+}
+
+
+class Case:
+    name = "naïve"
+
+    def test_one(self):
+        return "ü" + str(LIMIT)
+'''
+
+
+def test_segments_match_ast(tmp_path):
+    path = tmp_path / 'test_sample.py'
+    path.write_text(SOURCE, encoding='utf-8')
+    hasher = SourceHasher()
+    tree = ast.parse(SOURCE)
+
+    for node in ast.walk(tree):
+        if hasattr(node, 'end_lineno'):
+            assert hasher.segment(path, node) == (ast.get_source_segment(SOURCE, node) or '')
+
+
+def test_module_level_skips_classes_and_functions(tmp_path):
+    path = tmp_path / 'test_sample.py'
+    path.write_text(SOURCE, encoding='utf-8')
+
+    assert SourceHasher().module_level(path) == "import os\nLIMIT = {\n    'a': 1,\n}"
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    """A backend tree with an api app and a second app"""
+    import test_impact
+
+    backend_dir = tmp_path / 'backend'
+    api_dir = backend_dir / 'api'
+    for path in ('api/models.py', 'api/views.py', 'api/signals.py', 'api/migrations/0001_initial.py',
+                 'communications/utils.py', 'requirements.txt'):
+        (backend_dir / path).parent.mkdir(parents=True, exist_ok=True)
+        (backend_dir / path).write_text('x = 1\n')
+    monkeypatch.setattr(test_impact, 'API_DIR', api_dir)
+    monkeypatch.setattr(result_cache, 'API_DIR', api_dir)
+    monkeypatch.setattr(result_cache, 'BACKEND_DIR', backend_dir)
+    return backend_dir
+
+
+@pytest.mark.parametrize('path', ['api/signals.py', 'communications/utils.py', 'requirements.txt'])
+def test_untracked_backend_change_invalidates_every_key(backend, path):
+    before = result_cache.environment_digest()
+    (backend / path).write_text('x = 2\n')
+
+    assert result_cache.environment_digest() != before
+
+
+@pytest.mark.parametrize('path', ['api/models.py', 'api/views.py', 'api/migrations/0001_initial.py'])
+def test_tracked_backend_change_leaves_environment_alone(backend, path):
+    before = result_cache.environment_digest()
+    (backend / path).write_text('x = 2\n')
+
+    assert result_cache.environment_digest() == before
+
+
+def test_installed_versions_are_part_of_the_key(backend, monkeypatch):
+    before = result_cache.environment_digest()
+    upgraded = [type('Dist', (), {'metadata': {'Name': 'Django'}, 'version': '99.0'})()]
+    monkeypatch.setattr(result_cache.importlib.metadata, 'distributions', lambda: upgraded)
+
+    assert result_cache.environment_digest() != before
+
+
+def test_keys_follow_environment(backend):
+    node_id = discover_test_ids()[0]
+    before = result_cache.content_keys([node_id])[node_id]
+    (backend / 'api' / 'signals.py').write_text('x = 2\n')
+
+    assert before is not None
+    assert result_cache.content_keys([node_id])[node_id] != before
+
+
+def test_cache_serves_only_matching_keys(tmp_path):
+    node_id = 'automated/backend/test_auth/__init__.py::AuthTestCase::test_login'
+    result = {'test_id': 'test_auth::AuthTestCase::test_login', 'status': 'PASS', 'duration': 0.5}
+    cache = result_cache.ResultCache(tmp_path / 'cache.json')
+    cache.update([result], {node_id: 'key-1'})
+    cache.save()
+
+    cache = result_cache.ResultCache(tmp_path / 'cache.json')
+    assert cache.lookup(node_id, 'key-1') == dict(result, cached=True)
+    assert cache.lookup(node_id, 'key-2') is None
+    assert cache.lookup(node_id, None) is None
+
+
+@pytest.mark.parametrize('flag', ['cached', 'quarantined', 'infrastructure_error'])
+def test_cache_skips_results_that_did_not_really_run(tmp_path, flag):
+    node_id = 'automated/backend/test_auth/__init__.py::AuthTestCase::test_login'
+    cache = result_cache.ResultCache(tmp_path / 'cache.json')
+    cache.update([{'test_id': 'test_auth::AuthTestCase::test_login', 'status': 'FAIL', flag: True}],
+                 {node_id: 'key-1'})
+
+    assert cache.lookup(node_id, 'key-1') is None
+
+
+TESTS = '''\
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+
+def make_user():
+    return 'user'
+
+
+class RoleBasedAccessTestCase(APITestCase):
+    role = 'admin'
+
+
+@override_settings(DEBUG=False)
+class CourseTestCase(RoleBasedAccessTestCase):
+    def setUp(self):
+        self.user = make_user()
+
+    def tearDown(self):
+        pass
+
+    def test_create(self):
+        assert self.user
+
+
+class OtherTestCase(APITestCase):
+    def test_other(self):
+        pass
+
+
+def test_plain():
+    assert make_user()
+'''
+
+NODE = 'automated/backend/test_courses/__init__.py::CourseTestCase::test_create'
+PLAIN_NODE = 'automated/backend/test_courses/__init__.py::test_plain'
+
+
+@pytest.fixture
+def test_module(tmp_path, monkeypatch):
+    """A test package under a temporary testing/ directory, indexed without dependencies"""
+    path = tmp_path / 'automated' / 'backend' / 'test_courses' / '__init__.py'
+    path.parent.mkdir(parents=True)
+    path.write_text(TESTS)
+    deps = {'models': set(), 'fixtures': set(), 'endpoints': set(), 'tables': set()}
+    monkeypatch.setattr(result_cache, 'TESTING_DIR', tmp_path)
+    monkeypatch.setattr(result_cache, 'build_index', lambda: {NODE: deps, PLAIN_NODE: deps})
+    return path
+
+
+def keys():
+    return result_cache.content_keys([NODE, PLAIN_NODE])
+
+
+@pytest.mark.parametrize('old, new', [
+    ('    def tearDown(self):\n        pass', '    def tearDown(self):\n        self.user = None'),
+    ('DEBUG=False', 'DEBUG=True'),
+    ("role = 'admin'", "role = 'student'"),
+])
+def test_class_changes_outside_the_test_change_its_key(test_module, old, new):
+    before = keys()
+    test_module.write_text(TESTS.replace(old, new))
+
+    after = keys()
+    assert after[NODE] != before[NODE]
+    assert after[PLAIN_NODE] == before[PLAIN_NODE]
+
+
+def test_helper_changes_change_every_key(test_module):
+    before = keys()
+    test_module.write_text(TESTS.replace("return 'user'", "return 'admin'"))
+
+    after = keys()
+    assert after[NODE] != before[NODE] and after[PLAIN_NODE] != before[PLAIN_NODE]
+
+
+def test_unrelated_test_class_leaves_the_key_alone(test_module):
+    before = keys()
+    test_module.write_text(TESTS.replace('def test_other(self):\n        pass', 'def test_other(self):\n        1'))
+
+    assert keys() == before
+
+
+def test_base_class_imported_from_another_package(test_module):
+    base = test_module.parent.parent / 'test_auth' / '__init__.py'
+    base.parent.mkdir()
+    base.write_text("class RoleBasedAccessTestCase:\n    role = 'admin'\n")
+    test_module.write_text(
+        TESTS.replace("class RoleBasedAccessTestCase(APITestCase):\n    role = 'admin'\n",
+                      'from automated.backend.test_auth import RoleBasedAccessTestCase\n')
+    )
+    before = keys()
+    base.write_text("class RoleBasedAccessTestCase:\n    role = 'student'\n")
+
+    assert keys()[NODE] != before[NODE]
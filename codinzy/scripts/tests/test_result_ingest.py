@@ -0,0 +1,170 @@
+"""Tests for the JUnit XML and pytest-json ingesters (result_ingest.py)"""
+
+import io
+import json
+
+import pytest
+
+import result_ingest
+from result_ingest import (
+    _JSONReader, is_pytest_json, iter_junit_results, iter_pytest_json_results, read_results
+)
+
+JUNIT = '''<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" timestamp="2026-01-01T10:00:00.000001+00:00">
+<testcase classname="automated.backend.test_auth.AuthenticationTestCase" name="test_login" time="0.5">
+  <properties>
+    <property name="query_count" value="7"/>
+    <property name="sql_time" value="0.02"/>
+    <property name="repeated_queries" value='[{"sql": "SELECT 1", "count": 6}]'/>
+    <property name="markers" value='["smoke", "auth"]'/>
+  </properties>
+</testcase>
+<testcase classname="automated.backend.test_payments.PaymentTestCase" name="test_refund" time="1.25">
+  <failure message="AssertionError: 400 != 200">Traceback (most recent call last):
+AssertionError: 400 != 200</failure>
+</testcase>
+<testcase classname="automated.backend.test_users.UserTestCase" name="test_error" time="0">
+  <error message="fixture 'db' not found">setup failed</error>
+</testcase>
+<testcase classname="automated.backend.test_leads.LeadTestCase" name="test_skip" time="0">
+  <skipped message="not ready"/>
+</testcase>
+</testsuite></testsuites>
+'''
+
+PYTEST_JSON = {
+    'created': 1767261600.0,
+    'duration': 2.0,
+    'exitcode': 1,
+    'root': '/app/testing',
+    'environment': {'Python': '3.11'},
+    'summary': {'passed': 1, 'failed': 1, 'total': 3},
+    'collectors': [{'nodeid': '', 'outcome': 'passed', 'result': []}],
+    'tests': [
+        {
+            'nodeid': 'automated/backend/test_auth/__init__.py::AuthenticationTestCase::test_login',
+            'outcome': 'passed',
+            'setup': {'duration': 0.25, 'outcome': 'passed'},
+            'call': {'duration': 0.5, 'outcome': 'passed'},
+            'teardown': {'duration': 0.25, 'outcome': 'passed'},
+            'user_properties': [['query_count', 3], ['markers', ['smoke']]],
+        },
+        {
+            'nodeid': 'automated/backend/test_payments/__init__.py::PaymentTestCase::test_refund',
+            'outcome': 'failed',
+            'setup': {'duration': 0.1, 'outcome': 'passed'},
+            'call': {'duration': 0.2, 'outcome': 'failed', 'crash': {'message': 'AssertionError: 400 != 200'},
+                     'longrepr': 'Traceback\nAssertionError: 400 != 200'},
+        },
+        {
+            'nodeid': 'automated/backend/test_leads/__init__.py::LeadTestCase::test_skip',
+            'outcome': 'skipped',
+            'setup': {'duration': 0.0, 'outcome': 'skipped'},
+        },
+    ],
+}
+
+
+class ShortReads(io.StringIO):
+    """A file returning at most `size` characters per read"""
+
+    def __init__(self, text, size):
+        super().__init__(text)
+        self.size = size
+
+    def read(self, size=-1):
+        return super().read(self.size)
+
+
+@pytest.fixture
+def junit(tmp_path):
+    path = tmp_path / 'backend-results.xml'
+    path.write_text(JUNIT)
+    return path
+
+
+@pytest.fixture
+def pytest_json(tmp_path):
+    path = tmp_path / 'backend-results.json'
+    path.write_text(json.dumps(PYTEST_JSON, indent=2))
+    return path
+
+
+def test_junit_cases_become_result_dicts(junit):
+    login, refund, error, skip = iter_junit_results(junit)
+
+    assert login == {
+        'test_id': 'test_auth::AuthenticationTestCase::test_login', 'name': 'test_login',
+        'module': 'Authentication', 'status': 'PASS', 'duration': 0.5, 'query_count': 7, 'sql_time': 0.02,
+        'repeated_queries': [{'sql': 'SELECT 1', 'count': 6}], 'markers': ['smoke', 'auth'],
+    }
+    assert (refund['status'], refund['module'], refund['error']) == ('FAIL', 'Payments', 'AssertionError: 400 != 200')
+    assert refund['traceback'].startswith('Traceback')
+    assert (error['status'], error['error'], error['traceback']) == ('FAIL', "fixture 'db' not found", 'setup failed')
+    assert skip['status'] == 'SKIP'
+
+
+def test_pytest_json_tests_become_result_dicts(pytest_json):
+    login, refund, skip = iter_pytest_json_results(pytest_json)
+
+    assert login == {
+        'test_id': 'test_auth::AuthenticationTestCase::test_login', 'name': 'test_login',
+        'module': 'Authentication', 'status': 'PASS', 'duration': 1.0, 'query_count': 3, 'markers': ['smoke'],
+    }
+    assert (refund['status'], refund['error']) == ('FAIL', 'AssertionError: 400 != 200')
+    assert refund['traceback'] == 'Traceback\nAssertionError: 400 != 200'
+    assert refund['duration'] == pytest.approx(0.3)
+    assert skip['status'] == 'SKIP'
+
+
+def test_read_results_reports_the_run_start(junit, pytest_json):
+    started_at, results = read_results(junit)
+    assert started_at == '2026-01-01T10:00:00.000001+00:00' and len(list(results)) == 4
+
+    started_at, results = read_results(pytest_json)
+    assert started_at.startswith('2026-01-01') and len(list(results)) == 3
+
+
+def test_results_json_is_not_pytest_json(tmp_path, pytest_json):
+    report = tmp_path / 'automated_results.json'
+    report.write_text(json.dumps({'report_metadata': {}, 'test_results': {}}))
+    broken = tmp_path / 'broken.json'
+    broken.write_text('not json')
+
+    assert is_pytest_json(pytest_json)
+    assert not is_pytest_json(report)
+    assert not is_pytest_json(broken)
+
+
+@pytest.mark.parametrize('read_size', [1, 2, 3, 7, 64])
+def test_json_reader_values_across_buffer_boundaries(read_size):
+    document = {'number': 12345.678, 'text': 'a "quoted" \\ string', 'list': [1, [2, {'x': None}]], 'last': True}
+    reader = _JSONReader(ShortReads(json.dumps(document), read_size))
+
+    assert {key: reader.value() for key in reader.members()} == document
+
+
+def test_pytest_json_streams_with_small_reads(pytest_json, monkeypatch):
+    monkeypatch.setattr(result_ingest, 'READ_SIZE', 16)
+
+    assert list(iter_pytest_json_results(pytest_json)) == list(
+        map(result_ingest.pytest_json_result, PYTEST_JSON['tests'])
+    )
+
+
+@pytest.mark.parametrize('node_id', [
+    'automated/backend/test_auth/__init__.py::AuthenticationTestCase::test_login',
+    'automated/backend/test_auth/__init__.py::test_token_expiry',
+    'automated/backend/test_auth/test_tokens.py::test_refresh',
+    'automated/backend/test_auth/test_tokens.py::TestRefresh::test_rotates[admin]',
+])
+def test_junit_test_ids_match_node_ids(tmp_path, node_id):
+    # pytest's junitxml: the path without '.py' and the classes, joined by dots
+    *classes, name = node_id.split('::')
+    classname = '.'.join([classes[0][:-len('.py')].replace('/', '.'), *classes[1:]])
+    path = tmp_path / 'results.xml'
+    path.write_text(f'<testsuite><testcase classname="{classname}" name="{name}" time="0"/></testsuite>')
+
+    (result,) = iter_junit_results(path)
+    assert result['test_id'] == result_ingest.result_test_id(node_id)
@@ -0,0 +1,88 @@
+"""Tests for the historical result store (result_store.py)"""
+
+import datetime
+
+import pytest
+
+from result_store import ResultStore
+
+
+def result(test_id, status='PASS', module='Auth', duration=0.1, **extra):
+    return dict(test_id=test_id, name=test_id.split('::')[-1], module=module,
+                status=status, duration=duration, **extra)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultStore(tmp_path / 'results.db') as store:
+        yield store
+
+
+def test_module_counts_separate_failed_and_skipped(store):
+    results = ([result(f'a::t{i}', 'FAIL') for i in range(10)]
+               + [result(f'b::t{i}', 'SKIP') for i in range(13)]
+               + [result('c::t', 'PASS'), result('d::t', 'FAIL', quarantined=True)])
+    run_id = store.ingest(results, 'run.json', '2026-01-01T10:00:00')
+
+    (row,) = store.module_counts(run_id)
+    assert (row['total'], row['passed'], row['failed'], row['skipped'], row['quarantined']) == (25, 1, 10, 13, 1)
+
+
+def test_reingesting_a_source_is_a_no_op(store):
+    assert store.ingest([result('a::t')], 'run.json', '2026-01-01T10:00:00') is not None
+    assert store.ingest([result('a::t')], 'run.json', '2026-01-01T10:00:00') is None
+
+
+def test_duration_trend_is_chronological_for_backfilled_runs(store):
+    # Ingested newest first, as when backfilling old reports
+    for day, duration in (('03', 3.0), ('01', 1.0), ('02', 2.0)):
+        store.ingest([result('a::t', duration=duration)], f'run_{day}.json', f'2026-01-{day}T10:00:00')
+
+    assert [row['duration'] for row in store.duration_trend('a::t')] == [1.0, 2.0, 3.0]
+    assert [row['duration'] for row in store.duration_trend('a::t', runs=2)] == [2.0, 3.0]
+
+
+def test_latest_run_goes_by_start_time(store):
+    store.ingest([result('a::t')], 'new.json', '2026-01-02T10:00:00')
+    store.ingest([result('a::t')], 'old.json', '2026-01-01T10:00:00')
+
+    assert store.latest_run()['source'] == 'new.json'
+
+
+def test_run_results_pages_through_every_row(store):
+    results = [result(f'{module}::t{i:03}', 'FAIL' if i % 3 else 'PASS', module=module, extra=i)
+               for module in ('B', 'A') for i in range(25)]
+    run_id = store.ingest(results, 'run.json', '2026-01-01T10:00:00')
+
+    paged = list(store.run_results(run_id, page_size=7))
+    assert [r['test_id'] for r in paged] == sorted(r['test_id'] for r in results)
+    assert paged[0]['extra'] == 0 and paged[0]['quarantined'] is False
+    failed = list(store.run_results(run_id, status='FAIL', module='B', page_size=4))
+    assert len(failed) == 16 and all(r['module'] == 'B' and r['status'] == 'FAIL' for r in failed)
+
+
+def test_pass_rates_roll_up_per_day(store):
+    store.ingest([result('a::t'), result('b::t', 'FAIL')], 'one.json', '2026-01-01T10:00:00+00:00')
+    store.ingest([result('a::t'), result('b::t')], 'two.json', '2026-01-01T12:00:00Z')
+
+    (row,) = store.pass_rates_by_day(module='Auth')
+    assert (row['day'], row['total'], row['passed'], row['pass_rate']) == ('2026-01-01', 4, 3, 75.0)
+
+
+def test_start_times_are_stored_in_utc(store):
+    # 23:30 at UTC-5 is already the next day in UTC, and later than 03:00 UTC
+    store.ingest([result('a::t')], 'west.json', '2026-01-01T23:30:00-05:00')
+    store.ingest([result('a::t', 'FAIL')], 'utc.json', '2026-01-02T03:00:00Z')
+
+    assert store.latest_run()['source'] == 'west.json'
+    assert store.latest_run()['started_at'] == '2026-01-02T04:30:00.000000+00:00'
+    (row,) = store.pass_rates_by_day(module='Auth')
+    assert (row['day'], row['total'], row['passed']) == ('2026-01-02', 2, 1)
+
+
+def test_naive_start_times_are_local_time(store):
+    local = datetime.datetime(2026, 1, 1, 10, 0).astimezone()
+    store.ingest([result('a::t')], 'run.json', '2026-01-01T10:00:00')
+
+    expected = local.astimezone(datetime.timezone.utc).isoformat(timespec='microseconds')
+    assert store.latest_run()['started_at'] == expected
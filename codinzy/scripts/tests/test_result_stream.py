@@ -0,0 +1,57 @@
+"""Tests for streaming JSONL result files (result_stream.py)"""
+
+import pytest
+
+from result_stream import ResultSink, ResultStream
+
+
+def write_run(path, count, test_type='automated'):
+    with ResultSink(path, test_type) as sink:
+        for i in range(count):
+            sink.append({'test_id': f'a::t{i}', 'status': 'PASS'})
+
+
+def test_complete_run_round_trips(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    write_run(path, 3, 'manual')
+
+    stream = ResultStream(path)
+    assert stream.header['test_type'] == 'manual'
+    assert [r['test_id'] for r in stream] == ['a::t0', 'a::t1', 'a::t2']
+    assert stream.complete and stream.footer['count'] == 3
+
+
+def test_interrupted_run_keeps_finished_results(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    with pytest.raises(KeyboardInterrupt):
+        with ResultSink(path) as sink:
+            sink.append({'test_id': 'a::t0', 'status': 'FAIL'})
+            raise KeyboardInterrupt
+
+    stream = ResultStream(path)
+    assert [r['test_id'] for r in stream] == ['a::t0']
+    assert not stream.complete and stream.footer['status'] == 'interrupted'
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    sink = ResultSink(path)
+    sink.append({'test_id': 'a::t0', 'status': 'PASS'})
+    sink.append({'test_id': 'a::t1', 'status': 'PASS'})
+    # Crash mid-write: no footer, half a line
+    sink._file.write('{"test_id": "a::t2", "sta')
+    sink._file.close()
+
+    stream = ResultStream(path)
+    assert [r['test_id'] for r in stream] == ['a::t0', 'a::t1']
+    assert stream.footer is None and not stream.complete
+
+
+def test_reusing_a_path_starts_a_new_run(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    write_run(path, 5)
+    write_run(path, 2)
+
+    assert path.read_text().count('"header"') == 1
+    stream = ResultStream(path)
+    assert len(list(stream)) == 2 and stream.footer['count'] == 2
@@ -0,0 +1,138 @@
+"""Tests for the columnar result table (result_table.py)"""
+
+import pytest
+
+import result_table
+from result_table import ResultCounters, ResultTable, StringPool, TestResultTable
+
+VIEW_FIELDS = {
+    'test_id': 'test_id', 'name': 'test_name', 'module': 'module', 'status': 'status',
+    'error': 'error_message', 'traceback': 'error_traceback', 'query_count': 'query_count',
+    'repeated_queries': 'repeated_queries', 'quarantined': 'quarantined',
+}
+
+
+def results(count):
+    for i in range(count):
+        failed = i % 3 == 0
+        yield {
+            'test_id': f'test_auth::AuthTestCase::test_case_{i}' if i % 5 else f'custom-{i}',
+            'name': f'test_case_{i}',
+            'module': ('Authentication', 'Payments')[i % 2],
+            'status': 'FAIL' if failed else ('SKIP' if i % 7 == 0 else 'PASS'),
+            'duration': 0.25 * i,
+            'error': f'AssertionError: {i} != 200' if failed else None,
+            'traceback': f'Traceback (most recent call last):\n  line {i}\nAssertionError\n' if failed else None,
+            'query_count': i,
+            'repeated_queries': [{'sql': 'SELECT 1', 'count': 6}] if i == 4 else None,
+            'quarantined': i == 6,
+            'markers': ['smoke'] if i % 4 == 0 else [],
+            'flake_rate': 0.5 if i == 6 else 0.0,
+        }
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_string_pool_round_trip(compressed):
+    pool = StringPool(compressed)
+    values = ['Traceback (most recent call last):\n' * 3, '', 'ünïcödé', None, 'x' * 5000]
+    indexes = [pool.add(value) for value in values]
+
+    assert indexes[3] == 0
+    assert [pool.get(index) for index in indexes] == values
+
+
+def test_views_round_trip_every_field():
+    rows = list(results(50))
+    table = TestResultTable.from_results(rows)
+
+    assert len(table) == 50
+    for row, view in zip(rows, table):
+        for key, attribute in VIEW_FIELDS.items():
+            assert getattr(view, attribute) == row[key], (row['test_id'], key)
+        assert view.duration == pytest.approx(row['duration'])
+        assert view.flake_rate == row['flake_rate']
+    assert table[-1].test_id == rows[-1]['test_id']
+    with pytest.raises(IndexError):
+        table[50]
+
+
+def test_message_without_traceback_and_empty_message():
+    table = TestResultTable.from_results([
+        {'test_id': 'a::t', 'name': 't', 'status': 'FAIL', 'error': ''},
+        {'test_id': 'a::u', 'name': 'u', 'status': 'FAIL', 'traceback': 'trace'},
+        {'test_id': 'a::v', 'name': 'v', 'status': 'PASS'},
+    ])
+
+    assert [(t.error_message, t.error_traceback) for t in table] == [('', None), (None, 'trace'), (None, None)]
+
+
+def test_narrow_columns_widen_when_needed():
+    modules = [{'test_id': f'm{i}::t', 'name': 't', 'module': f'M{i}'} for i in range(300)]
+    table = TestResultTable.from_results(modules + [{'test_id': 'x::t', 'name': 't', 'query_count': 70000}])
+
+    assert [t.module for t in table][:300] == [f'M{i}' for i in range(300)]
+    assert table[300].query_count == 70000
+
+
+def test_aggregate_matches_plain_table():
+    rows = list(results(50))
+
+    assert TestResultTable.from_results(rows).aggregate() == ResultTable.from_results(rows).aggregate()
+
+
+def test_append_test_copies_a_view():
+    source = TestResultTable.from_results(results(10))
+    copy = TestResultTable()
+    for view in source:
+        copy.append_test(view)
+
+    for original, copied in zip(source, copy):
+        assert all(getattr(original, a) == getattr(copied, a) for a in VIEW_FIELDS.values())
+
+
+def test_aggregate_counts_in_one_pass():
+    table = ResultTable.from_results([
+        {'status': 'PASS', 'module': 'Auth', 'duration': 1.0, 'query_count': 3, 'markers': ['smoke'],
+         'peak_memory_kb': 10},
+        {'status': 'FAIL', 'module': 'Auth', 'duration': 2.0, 'markers': ['smoke', 'auth']},
+        {'status': 'FAIL', 'module': 'Users', 'duration': 0.5, 'quarantined': True},
+        {'status': 'SKIP', 'module': 'Users', 'cached': True},
+    ])
+    stats = table.aggregate()
+
+    summary = stats['summary']
+    assert (summary['total'], summary['passed'], summary['failed'], summary['skipped']) == (4, 1, 1, 1)
+    assert (summary['quarantined'], summary['cached'], summary['pass_rate']) == (1, 1, 25.0)
+    assert (summary['duration'], summary['queries'], summary['max_peak_memory_kb']) == (3.5, 3, 10)
+    assert stats['by_module']['Auth']['pass_rate'] == 50.0
+    assert stats['by_module']['Users']['failed'] == 0
+    assert {marker: group['total'] for marker, group in stats['by_marker'].items()} == {'smoke': 2, 'auth': 1}
+    assert stats['by_status'] == {'PASS': {'count': 1, 'duration': 1.0}, 'FAIL': {'count': 2, 'duration': 2.5},
+                                  'SKIP': {'count': 1, 'duration': 0.0}}
+
+
+def test_counters_match_the_table():
+    rows = list(results(50)) + [
+        {'status': 'PASS', 'module': 'Auth', 'markers': ['smoke', 'smoke'], 'cached': True, 'peak_memory_kb': 9},
+        {'status': 'ERROR', 'module': 'Auth', 'markers': [f'm{i}' for i in range(40)]},
+    ]
+    counters = ResultCounters()
+    for row in rows:
+        counters.append(row)
+
+    assert len(counters) == len(rows)
+    assert counters.aggregate() == ResultTable.from_results(rows).aggregate()
+
+
+def test_streamed_report_keeps_no_table(monkeypatch):
+    from run_simple_tests import generate_test_report
+    rows = list(results(50))
+    full = generate_test_report(rows, keep_tests=True)
+    monkeypatch.setattr(result_table, 'ResultTable', pytest.fail)
+
+    streamed = generate_test_report(iter(rows), keep_tests=False)
+
+    assert streamed['summary'] == full['summary']
+    assert (streamed['by_marker'], streamed['by_status']) == (full['by_marker'], full['by_status'])
+    for module, data in full['test_results'].items():
+        assert streamed['test_results'][module] == {k: v for k, v in data.items() if k != 'tests'}
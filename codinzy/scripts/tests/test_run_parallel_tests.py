@@ -0,0 +1,98 @@
+"""Tests for the sharded parallel runner (run_parallel_tests.py)"""
+
+import json
+import subprocess
+
+import run_parallel_tests
+from run_parallel_tests import (
+    DEFAULT_TEST_DURATION, estimate_durations, load_duration_history, run_parallel, run_shard, shard_tests
+)
+
+NODE = 'automated/backend/test_auth/__init__.py::AuthTestCase::test_{}'
+
+
+def test_shard_output_goes_to_its_log(tmp_path, monkeypatch):
+    def fake_run(command, cwd, env, stdout, stderr):
+        assert stderr == subprocess.STDOUT
+        stdout.write(b'ImportError: No module named rest_framework\n')
+
+    monkeypatch.setattr(run_parallel_tests.subprocess, 'run', fake_run)
+
+    junit_path = run_shard(3, [NODE.format('a')], tmp_path, [])
+
+    assert junit_path == tmp_path / 'shard_003.xml'
+    assert (tmp_path / 'shard_003.log').read_text() == 'ImportError: No module named rest_framework\n'
+
+
+def test_crashed_shard_prints_its_log_tail(monkeypatch, capsys):
+    def crash(index, test_ids, output_dir, pytest_args):
+        junit_path = output_dir / f'shard_{index:03d}.xml'
+        junit_path.with_suffix('.log').write_text(''.join(f'line {i}\n' for i in range(100)))
+        return junit_path
+
+    monkeypatch.setattr(run_parallel_tests, 'run_shard', crash)
+
+    results = run_parallel([[NODE.format('a'), NODE.format('b')]], [])
+
+    out = capsys.readouterr().out
+    assert 'Shard 0 exited without producing results' in out
+    assert '  line 99' in out and '  line 60' in out and 'line 59\n' not in out
+    assert [r['status'] for r in results] == ['FAIL', 'FAIL']
+    assert all(r['infrastructure_error'] for r in results)
+
+
+def write_report(path, durations):
+    tests = [{'test_id': test_id, 'status': status, 'duration': duration}
+             for test_id, (status, duration) in durations.items()]
+    path.write_text(json.dumps({'test_results': {'Authentication': {'tests': tests}}}))
+
+
+def test_shards_keep_classes_whole_and_balanced():
+    test_ids = [f'{path}::{cls}::test_{i}'
+                for path, cls, count in (('a.py', 'Slow', 2), ('a.py', 'Mid', 3), ('b.py', 'Fast', 4))
+                for i in range(count)] + ['b.py::test_x', 'b.py::test_y']
+    durations = dict.fromkeys(test_ids, 1.0)
+    durations.update({'a.py::Slow::test_0': 4.0, 'a.py::Slow::test_1': 4.0})
+
+    shards = shard_tests(test_ids, 3, durations)
+
+    classes = [{node_id.rsplit('::', 1)[0] for node_id in shard if node_id.count('::') == 2} for shard in shards]
+    assert sorted(len(shard) for shard in shards) == [2, 4, 5]
+    assert all(not (a & b) for i, a in enumerate(classes) for b in classes[i + 1:])
+    loads = sorted(sum(durations[n] for n in shard) for shard in shards)
+    assert loads == [4.0, 5.0, 8.0]
+    assert sorted(n for shard in shards for n in shard) == sorted(test_ids)
+
+
+def test_no_more_shards_than_classes():
+    shards = shard_tests([NODE.format(i) for i in range(10)], 4)
+
+    assert shards == [sorted(NODE.format(i) for i in range(10))]
+
+
+def test_estimates_fall_back_to_package_then_overall_median():
+    history = {
+        'test_auth::AuthTestCase::test_a': 1.0,
+        'test_auth::AuthTestCase::test_b': 3.0,
+        'test_auth::AuthTestCase::test_c': 8.0,
+        'test_users::UserTestCase::test_a': 10.0,
+    }
+    known = NODE.format('a')
+    new_auth = NODE.format('new')
+    new_package = 'automated/backend/test_leads/__init__.py::LeadTestCase::test_new'
+
+    durations = estimate_durations([known, new_auth, new_package], history)
+
+    assert durations == {known: 1.0, new_auth: 3.0, new_package: 5.5}
+    assert estimate_durations([new_package], {}) == {new_package: DEFAULT_TEST_DURATION}
+
+
+def test_duration_history_takes_the_median_of_recent_runs(tmp_path):
+    test_id = 'test_auth::AuthTestCase::test_a'
+    for run, (status, duration) in enumerate([('PASS', 1.0), ('FAIL', 2.0), ('SKIP', 50.0), ('PASS', 9.0)]):
+        write_report(tmp_path / f'automated_results_2026010{run}_000000.json', {test_id: (status, duration)})
+    (tmp_path / 'automated_results_20260109_000000.json').write_text('not json')
+
+    assert load_duration_history(tmp_path) == {test_id: 2.0}
+    assert load_duration_history(tmp_path, max_files=2) == {test_id: 9.0}
+    assert load_duration_history(tmp_path / 'missing') == {}
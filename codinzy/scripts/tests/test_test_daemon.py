@@ -0,0 +1,45 @@
+"""Tests for the warm test worker daemon (test_daemon.py)"""
+
+import sys
+import socket
+import importlib
+
+import test_daemon
+
+PASSING = 'def test_value():\n    assert 1 == 1\n'
+FAILING = 'def test_value():\n    assert 1 == 2, "edited"\n'
+
+
+def run(args):
+    """Exit code and output of one daemon run over a socket pair"""
+    daemon_end, client_end = socket.socketpair()
+    with daemon_end, client_end:
+        test_daemon.run_request(daemon_end, {'args': args})
+        daemon_end.shutdown(socket.SHUT_WR)
+        output = b''
+        while chunk := client_end.recv(65536):
+            output += chunk
+    output, _, exit_code = output.partition(test_daemon.EXIT_MARKER)
+    return int(exit_code), output.decode()
+
+
+def test_edited_test_file_runs_fresh(tmp_path, monkeypatch):
+    tests_dir = tmp_path / 'backend'
+    tests_dir.mkdir()
+    test_file = tests_dir / 'test_daemon_edit.py'
+    test_file.write_text(PASSING)
+    monkeypatch.setattr(test_daemon, 'BACKEND_TESTS_DIR', tests_dir)
+    monkeypatch.syspath_prepend(str(tests_dir))
+    args = [str(test_file), '-q', '-p', 'no:cacheprovider', '--rootdir', str(tests_dir)]
+
+    # The warm process has the test module loaded, as earlier versions did
+    importlib.import_module('test_daemon_edit')
+    try:
+        assert run(args)[0] == 0
+        test_file.write_text(FAILING)
+        exit_code, output = run(args)
+    finally:
+        sys.modules.pop('test_daemon_edit', None)
+
+    assert exit_code == 1
+    assert 'edited' in output
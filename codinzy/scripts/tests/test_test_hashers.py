@@ -0,0 +1,41 @@
+"""Tests for the memoizing password hasher (test_hashers.py)"""
+
+import pytest
+
+django = pytest.importorskip('django')
+
+
+@pytest.fixture(scope='module')
+def hashers():
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(PASSWORD_HASHERS=['test_hashers.CachedMD5PasswordHasher'])
+    from django.contrib.auth import hashers
+    return hashers
+
+
+def test_make_password_round_trips(hashers):
+    encoded = hashers.make_password('s3cret!')
+
+    assert encoded.startswith('md5$codinzyTestSuiteFixedSalt$')
+    assert encoded == hashers.make_password('s3cret!')
+    assert hashers.check_password('s3cret!', encoded)
+    assert not hashers.check_password('wrong', encoded)
+    assert hashers.check_password('s3cret!', encoded)
+
+
+def test_other_salts_still_verify(hashers):
+    encoded = hashers.make_password('s3cret!', salt='anotherSaltOfEnoughLength')
+
+    assert encoded != hashers.make_password('s3cret!')
+    assert hashers.check_password('s3cret!', encoded)
+    assert not hashers.check_password('wrong', encoded)
+    assert not hashers.check_password('s3cret!', encoded.replace('anotherSalt', 'differentSa'))
+
+
+def test_hashes_match_the_plain_md5_hasher(hashers):
+    from django.contrib.auth.hashers import MD5PasswordHasher
+    encoded = hashers.make_password('s3cret!')
+
+    assert encoded == MD5PasswordHasher().encode('s3cret!', 'codinzyTestSuiteFixedSalt')
+    assert not hashers.is_password_usable(hashers.make_password(None))
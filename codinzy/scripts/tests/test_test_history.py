@@ -0,0 +1,128 @@
+"""Tests for the outcome history and adaptive test order (test_history.py)"""
+
+import pytest
+
+from test_history import DECAY, HISTORY_WINDOW, NEW_TEST_PROBABILITY, OutcomeHistory, class_blocks, order_items
+
+PATH = 'automated/backend/{}/__init__.py::{}'
+
+
+class Item:
+    """The parts of a pytest item the ordering reads"""
+
+    def __init__(self, package, cls, name, smoke=False, combination=()):
+        self.nodeid = PATH.format(package, f'{cls}::{name}')
+        self.parent = (package, cls)
+        self.name = name
+        self.smoke = smoke
+        self.combination = combination
+
+    def get_closest_marker(self, name):
+        return object() if name == 'smoke' and self.smoke else None
+
+    def __repr__(self):
+        return self.name
+
+
+@pytest.fixture
+def history(tmp_path):
+    return OutcomeHistory(tmp_path / 'history.json')
+
+
+def record(history, item, *runs):
+    for status, duration in runs:
+        history.record(f'{item.parent[0]}::{item.parent[1]}::{item.name}', status, duration)
+
+
+def test_recent_failures_weigh_more(history):
+    history.record('t::A::old_failure', 'FAIL', 1.0)
+    history.record('t::A::old_failure', 'PASS', 1.0)
+    history.record('t::A::new_failure', 'PASS', 1.0)
+    history.record('t::A::new_failure', 'FAIL', 1.0)
+
+    assert history.failure_probability('t::A::old_failure') == pytest.approx(DECAY / (1 + DECAY))
+    assert history.failure_probability('t::A::new_failure') == pytest.approx(1 / (1 + DECAY))
+
+
+def test_window_keeps_the_last_runs(history):
+    history.record('t::A::test', 'FAIL', 9.0)
+    for duration in range(HISTORY_WINDOW):
+        history.record('t::A::test', 'PASS', float(duration))
+    history.record('t::A::test', 'SKIP', 0.0)
+
+    assert len(history.entries['t::A::test']) == HISTORY_WINDOW
+    assert history.failure_probability('t::A::test') == 0.0
+    assert history.duration('t::A::test') == pytest.approx((HISTORY_WINDOW - 1) / 2)
+
+
+def test_new_tests_count_as_likely_failures_once_there_is_history(history):
+    assert history.failure_probability('t::A::new') == 0.0
+
+    history.record('t::A::old', 'PASS', 1.0)
+    assert history.failure_probability('t::A::new') == NEW_TEST_PROBABILITY
+    assert history.duration('t::A::new', default=2.0) == 2.0
+
+
+def test_history_round_trips_through_its_file(history):
+    history.record('t::A::test', 'FAIL', 0.123456)
+    history.save()
+
+    assert OutcomeHistory(history.path).entries == {'t::A::test': [['FAIL', 0.1235]]}
+
+
+def test_class_blocks_keep_collection_order():
+    a1, b1, a2 = Item('test_x', 'A', 'a1'), Item('test_x', 'B', 'b1'), Item('test_x', 'A', 'a2')
+
+    assert class_blocks([a1, b1, a2]) == [[a1, a2], [b1]]
+
+
+def test_likely_failures_first_within_a_class(history):
+    items = [Item('test_x', 'A', name) for name in ('passes_slow', 'flaky', 'broken', 'broken_slow', 'passes')]
+    passes_slow, flaky, broken, broken_slow, passes = items
+    record(history, passes_slow, ('PASS', 5.0))
+    record(history, flaky, ('FAIL', 1.0), ('PASS', 1.0))
+    record(history, broken, ('FAIL', 1.0))
+    record(history, broken_slow, ('FAIL', 3.0))
+    record(history, passes, ('PASS', 1.0))
+
+    assert order_items(items, history) == [broken, broken_slow, flaky, passes, passes_slow]
+
+
+def test_passing_tests_group_combinations_then_smoke_then_duration(history):
+    items = [
+        Item('test_x', 'A', 'courses_slow', combination=('course',)),
+        Item('test_x', 'A', 'plain_slow'),
+        Item('test_x', 'A', 'plain_smoke', smoke=True),
+        Item('test_x', 'A', 'courses_fast', combination=('course',)),
+        Item('test_x', 'A', 'plain_fast'),
+        Item('test_x', 'A', 'plain_tie'),
+    ]
+    durations = {'courses_slow': 4.0, 'plain_slow': 3.0, 'plain_smoke': 9.0, 'courses_fast': 1.0,
+                 'plain_fast': 1.0, 'plain_tie': 1.0}
+    for item in items:
+        record(history, item, ('PASS', durations[item.name]))
+
+    ordered = order_items(items, history, lambda item: item.combination)
+
+    assert [item.name for item in ordered] == [
+        'plain_smoke', 'plain_fast', 'plain_tie', 'plain_slow', 'courses_fast', 'courses_slow'
+    ]
+
+
+def test_classes_stay_whole_and_risky_classes_lead(history):
+    calm = [Item('test_a', 'Calm', f'c{i}') for i in range(2)]
+    smoke = [Item('test_a', 'Smoke', 's0', smoke=True), Item('test_a', 'Smoke', 's1')]
+    risky = [Item('test_b', 'Risky', 'r0'), Item('test_b', 'Risky', 'r1')]
+    riskier = [Item('test_b', 'Riskier', 'x0')]
+    for item in calm:
+        record(history, item, ('PASS', 1.0))
+    for item in smoke:
+        record(history, item, ('PASS', 5.0))
+    record(history, risky[0], ('PASS', 1.0))
+    record(history, risky[1], ('FAIL', 1.0), ('PASS', 1.0))
+    record(history, riskier[0], ('FAIL', 1.0))
+    items = [calm[0], smoke[0], risky[0], calm[1], riskier[0], smoke[1], risky[1]]
+
+    ordered = [item.name for item in order_items(items, history)]
+
+    assert ordered == ['x0', 'r1', 'r0', 's0', 's1', 'c0', 'c1']
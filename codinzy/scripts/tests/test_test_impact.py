@@ -0,0 +1,140 @@
+"""Tests for git-diff test selection (test_impact.py)"""
+
+import ast
+import subprocess
+
+import pytest
+
+import test_impact
+from test_impact import changed_model_classes, scopes_of_test, select_tests
+
+MODELS = '''\
+from django.db import models
+
+
+class Course(models.Model):
+    title = models.CharField(max_length=100)
+
+
+class Lead(models.Model):
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = 'crm_lead'
+'''
+
+COURSE = 'automated/backend/test_courses/__init__.py::CourseTestCase::test_create'
+LEAD = 'automated/backend/test_leads/__init__.py::LeadTestCase::test_list'
+TABLES = 'automated/backend/test_reports/__init__.py::ReportTestCase::test_export'
+PLAIN = 'automated/backend/test_utils/__init__.py::test_slugify'
+
+INDEX = {
+    COURSE: {'models': {'Course'}, 'fixtures': set(), 'endpoints': set(), 'tables': {'api_course'}},
+    LEAD: {'models': set(), 'fixtures': set(), 'endpoints': {'/api/leads/'}, 'tables': set()},
+    TABLES: {'models': set(), 'fixtures': set(), 'endpoints': set(), 'tables': {'crm_lead'}},
+    PLAIN: {'models': set(), 'fixtures': set(), 'endpoints': set(), 'tables': set()},
+}
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                   cwd=str(repo), check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A committed checkout with backend/ and testing/ side by side"""
+    root = tmp_path.resolve()
+    testing_dir = root / 'testing'
+    tests_dir = testing_dir / 'automated' / 'backend'
+    backend_dir = root / 'backend'
+    files = {
+        backend_dir / 'api' / 'models.py': MODELS,
+        backend_dir / 'api' / 'views.py': 'VIEWS = []\n',
+        backend_dir / 'communications' / 'utils.py': 'def send():\n    pass\n',
+        tests_dir / 'conftest.py': 'import pytest\n',
+        tests_dir / 'test_leads' / '__init__.py': 'LEADS = []\n',
+    }
+    for path, text in files.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    git(root, 'init', '-q')
+    git(root, 'add', '.')
+    git(root, 'commit', '-q', '-m', 'base')
+
+    monkeypatch.setattr(test_impact, 'TESTING_DIR', testing_dir)
+    monkeypatch.setattr(test_impact, 'BACKEND_TESTS_DIR', tests_dir)
+    monkeypatch.setattr(test_impact, 'BACKEND_DIR', backend_dir)
+    monkeypatch.setattr(test_impact, 'API_DIR', backend_dir / 'api')
+    monkeypatch.setattr(test_impact, 'GLOBAL_INPUTS', {tests_dir / 'conftest.py'})
+    return root
+
+
+def edit(path, old, new):
+    path.write_text(path.read_text().replace(old, new))
+
+
+def test_scopes_of_test_includes_setup_methods():
+    tree = ast.parse(
+        'class C:\n    def setUp(self): pass\n    def helper(self): pass\n    def test_a(self): pass\n'
+        'def test_b(): pass\n'
+    )
+
+    assert [s.name for s in scopes_of_test(tree, 'C::test_a')] == ['setUp', 'test_a']
+    assert [s.name for s in scopes_of_test(tree, 'test_b')] == ['test_b']
+
+
+def test_changed_model_classes_maps_hunks_to_classes(repo):
+    models = repo / 'backend' / 'api' / 'models.py'
+    assert changed_model_classes('HEAD', models) == set()
+
+    edit(models, "db_table = 'crm_lead'", "db_table = 'crm_leads'")
+    assert changed_model_classes('HEAD', models) == {'Lead'}
+
+    edit(models, 'max_length=100)\n\n\nclass Lead', 'max_length=200)\n\n\nclass Lead')
+    assert changed_model_classes('HEAD', models) == {'Course', 'Lead'}
+
+    edit(models, 'from django.db import models', 'from django.db import models  # noqa')
+    assert changed_model_classes('HEAD', models) is None
+
+
+def test_model_change_selects_tests_by_model_and_table(repo):
+    edit(repo / 'backend' / 'api' / 'models.py', 'title = ', 'heading = ')
+    assert select_tests('HEAD', INDEX) == [COURSE]
+
+    edit(repo / 'backend' / 'api' / 'models.py', 'name = ', 'full_name = ')
+    assert select_tests('HEAD', INDEX) == sorted([COURSE, TABLES])
+
+
+def test_api_change_selects_endpoint_tests(repo):
+    edit(repo / 'backend' / 'api' / 'views.py', '[]', '[1]')
+
+    assert select_tests('HEAD', INDEX) == [LEAD]
+
+
+def test_test_package_change_selects_its_tests(repo):
+    edit(repo / 'testing' / 'automated' / 'backend' / 'test_leads' / '__init__.py', '[]', '[1]')
+
+    assert select_tests('HEAD', INDEX) == [LEAD]
+
+
+@pytest.mark.parametrize('path, old, new', [
+    ('backend/communications/utils.py', 'pass', 'return None'),
+    ('testing/automated/backend/conftest.py', 'pytest', 'os'),
+])
+def test_helper_or_global_change_selects_everything(repo, path, old, new):
+    edit(repo / path, old, new)
+
+    assert select_tests('HEAD', INDEX) == sorted(INDEX)
+
+
+def test_untracked_helper_selects_everything(repo):
+    (repo / 'backend' / 'communications' / 'sms.py').write_text('def send():\n    pass\n')
+
+    assert select_tests('HEAD', INDEX) == sorted(INDEX)
+
+
+def test_unrelated_change_selects_nothing(repo):
+    (repo / 'README.md').write_text('docs\n')
+
+    assert select_tests('HEAD', INDEX) == []
@@ -0,0 +1,58 @@
+"""Tests for SQL query fingerprints and recording (test_queries.py)"""
+
+import pytest
+
+from test_queries import QueryRecorder, query_fingerprint
+
+
+@pytest.mark.parametrize('first, second', [
+    ('SELECT * FROM "api_user" WHERE "id" = 1', 'SELECT * FROM "api_user" WHERE "id" = 42'),
+    ("SELECT * FROM api_user WHERE name = 'Ann'", "SELECT * FROM api_user WHERE name = 'O''Brien'"),
+    ('SELECT * FROM api_course WHERE price > 9.99', 'SELECT * FROM api_course WHERE price > %s'),
+    ('SELECT * FROM api_lesson WHERE id IN (1, 2, 3)', 'SELECT * FROM api_lesson WHERE id IN (%s,%s)'),
+    ('SELECT *\n  FROM api_lesson   WHERE id = 1', 'SELECT * FROM api_lesson WHERE id = 2'),
+])
+def test_values_do_not_change_the_fingerprint(first, second):
+    assert query_fingerprint(first) == query_fingerprint(second)
+
+
+def test_fingerprint_shapes():
+    assert query_fingerprint("SELECT * FROM t WHERE a IN (1, 'x') AND b = 'y'") == \
+        'SELECT * FROM t WHERE a IN (?) AND b = ?'
+    assert query_fingerprint('SELECT * FROM t2 WHERE c = 1') != query_fingerprint('SELECT * FROM t3 WHERE c = 1')
+    assert query_fingerprint('SELECT * FROM t WHERE a = 1') != query_fingerprint('SELECT * FROM t WHERE b = 1')
+
+
+def test_recorder_counts_queries_tables_and_repeats():
+    recorder = QueryRecorder()
+    executed = []
+
+    def execute(sql, params, many, context):
+        executed.append(sql)
+        return len(executed)
+
+    for lesson in range(6):
+        recorder(execute, f'SELECT * FROM "api_lesson" WHERE "module_id" = {lesson}', None, False, {})
+    for _ in range(3):
+        recorder(execute, 'SELECT * FROM api_course JOIN api_module ON 1 = 1', None, False, {})
+    assert recorder(execute, 'UPDATE "api_user" SET name = %s', ['x'], False, {}) == 10
+
+    assert recorder.count == 10 and len(executed) == 10
+    assert recorder.tables == {'api_lesson', 'api_course', 'api_module', 'api_user'}
+    assert recorder.repeated(2) == [
+        {'fingerprint': 'SELECT * FROM "api_lesson" WHERE "module_id" = ?', 'count': 6},
+        {'fingerprint': 'SELECT * FROM api_course JOIN api_module ON ? = ?', 'count': 3},
+    ]
+    assert recorder.repeated(5) == recorder.repeated(2)[:1]
+    assert recorder.repeated(6) == []
+
+
+def test_failing_queries_are_recorded_too():
+    recorder = QueryRecorder()
+
+    def execute(sql, params, many, context):
+        raise RuntimeError('database is locked')
+
+    with pytest.raises(RuntimeError):
+        recorder(execute, 'SELECT 1 FROM api_user', None, False, {})
+    assert recorder.count == 1 and recorder.total_time >= 0 and recorder.tables == {'api_user'}
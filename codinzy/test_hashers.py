@@ -0,0 +1,40 @@
+"""
+Password hashers for the Codinzy pytest test runner.
+
+Fixtures and setUp methods create thousands of users with the same few
+passwords, so hashing is memoized per (plaintext, salt, algorithm) for the
+session. New passwords get one fixed salt, so the memo hits for every user
+with the same password. The encoded values are ordinary MD5 hashes, so
+check_password and authenticate keep working unchanged, also for hashes
+with any other salt.
+"""
+from django.contrib.auth.hashers import MD5PasswordHasher
+
+
+class CachedMD5PasswordHasher(MD5PasswordHasher):
+    """MD5 hasher that hashes each distinct password once per process"""
+
+    # Long enough that must_update() never asks to re-hash on login
+    FIXED_SALT = 'codinzyTestSuiteFixedSalt'
+
+    _encoded_cache = {}
+    _verify_cache = {}
+
+    def salt(self):
+        return self.FIXED_SALT
+
+    def encode(self, password, salt):
+        key = (password, salt, self.algorithm)
+        encoded = self._encoded_cache.get(key)
+        if encoded is None:
+            encoded = super().encode(password, salt)
+            self._encoded_cache[key] = encoded
+        return encoded
+
+    def verify(self, password, encoded):
+        key = (password, encoded)
+        verified = self._verify_cache.get(key)
+        if verified is None:
+            verified = super().verify(password, encoded)
+            self._verify_cache[key] = verified
+        return verified
@@ -0,0 +1,112 @@
+"""
+Rolling outcome history for the Codinzy pytest test runner.
+
+The last HISTORY_WINDOW outcomes and durations of every backend test are
+kept in .test_history.json. conftest.py orders each run from it
+(order_items) so that the tests most likely to fail run first and, among
+equally likely tests, the fastest run first.
+"""
+import json
+import statistics
+from pathlib import Path
+
+HISTORY_PATH = Path(__file__).resolve().parent / '.test_history.json'
+
+# Outcomes kept per test
+HISTORY_WINDOW = 20
+
+# Weight of each older outcome relative to the next newer one
+DECAY = 0.7
+
+# Failure probability assumed for tests without any history yet
+NEW_TEST_PROBABILITY = 0.5
+
+
+def history_key(nodeid):
+    """Map a pytest node id to the test_id used in the results JSON"""
+    path, _, name = nodeid.partition('::')
+    package = next((part for part in path.split('/') if part.startswith('test_')), 'unknown')
+    return f'{package}::{name}'
+
+
+class OutcomeHistory:
+    """Recent PASS/FAIL outcomes and durations per test id"""
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self.entries = {}
+        if path.exists():
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def record(self, test_id, status, duration):
+        """Append one outcome; skipped tests are not recorded"""
+        if status not in ('PASS', 'FAIL'):
+            return
+        runs = self.entries.setdefault(test_id, [])
+        runs.append([status, round(duration, 4)])
+        del runs[:-HISTORY_WINDOW]
+
+    def failure_probability(self, test_id):
+        """Exponentially weighted share of recent runs that failed"""
+        runs = self.entries.get(test_id)
+        if not runs:
+            return NEW_TEST_PROBABILITY if self.entries else 0.0
+        weights = [DECAY ** age for age in range(len(runs))]
+        failed = sum(w for w, (status, _) in zip(weights, reversed(runs)) if status == 'FAIL')
+        return failed / sum(weights)
+
+    def duration(self, test_id, default=0.0):
+        """Median recent duration"""
+        runs = self.entries.get(test_id)
+        if not runs:
+            return default
+        return statistics.median(duration for _, duration in runs)
+
+    def save(self):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        tmp_path.replace(self.path)
+
+
+def class_blocks(items):
+    """Items grouped by their test class (or module), in collection order"""
+    blocks = {}
+    for item in items:
+        blocks.setdefault(item.parent, []).append(item)
+    return list(blocks.values())
+
+
+def order_items(items, history, combination=lambda item: ()):
+    """Run likely failures first, then fast and smoke tests, class by class
+
+    The tests of a class always stay together, since every class switch
+    runs setUpClass and setUpTestData again. Classes with recent failures
+    run first, most likely to fail first; the others lead with smoke
+    tests, then go by ascending total duration. Within a class, likely
+    failures run first, most likely and fastest first. The remaining tests
+    keep tests sharing a data fixture `combination` back to back, smoke
+    tests first, then ascending duration. Ties keep collection order.
+    """
+    probability = {item: history.failure_probability(history_key(item.nodeid)) for item in items}
+    duration = {item: history.duration(history_key(item.nodeid)) for item in items}
+
+    def item_order(item):
+        if probability[item] > 0:
+            return (0, -probability[item], (), False, duration[item])
+        return (1, 0, combination(item), item.get_closest_marker('smoke') is None, duration[item])
+
+    def block_order(block):
+        risk = max(probability[item] for item in block)
+        return (risk == 0, -risk,
+                all(item.get_closest_marker('smoke') is None for item in block),
+                sum(duration[item] for item in block))
+
+    blocks = class_blocks(items)
+    for block in blocks:
+        block.sort(key=item_order)
+    return [item for block in sorted(blocks, key=block_order) for item in block]
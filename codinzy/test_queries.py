@@ -0,0 +1,54 @@
+"""
+SQL query recording for the Codinzy pytest test runner.
+
+conftest.record_queries wraps every test's database connection in a
+QueryRecorder. It counts the test's queries and their time, and collapses
+statements that differ only in their values (literals, parameters and IN
+lists) into one fingerprint, so a query repeated per row (N+1) shows up as
+one fingerprint with a high count.
+"""
+import re
+import time
+from collections import Counter
+
+_SQL_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SQL_VALUE_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SQL_TABLES = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE)\s+"?(\w+)"?', re.IGNORECASE)
+
+
+def query_fingerprint(sql):
+    """Normalize SQL so statements differing only in their values match"""
+    sql = _SQL_STRINGS.sub('?', sql)
+    sql = _SQL_NUMBERS.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _SQL_VALUE_LISTS.sub('(?)', sql)
+    return ' '.join(sql.split())
+
+
+class QueryRecorder:
+    """connection.execute_wrapper recording query count, time and shapes"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.fingerprints = Counter()
+        self.tables = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total_time += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[query_fingerprint(sql)] += 1
+            self.tables.update(_SQL_TABLES.findall(sql))
+
+    def repeated(self, threshold):
+        """Query shapes executed more than `threshold` times, most frequent first"""
+        return [
+            {'fingerprint': fingerprint, 'count': count}
+            for fingerprint, count in self.fingerprints.most_common()
+            if count > threshold
+        ]
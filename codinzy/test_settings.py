@@ -86,8 +86,9 @@ MIGRATION_MODULES = {
 
 AUTH_USER_MODEL = 'api.User'
 
+# Memoized MD5: each distinct test password is hashed once per session
 PASSWORD_HASHERS = [
-    'django.contrib.auth.hashers.MD5PasswordHasher',
+    'test_hashers.CachedMD5PasswordHasher',
 ]
 
 REST_FRAMEWORK = {